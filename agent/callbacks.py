@@ -0,0 +1,100 @@
+import time
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from server_config import get_server_config as sc
+from telemetry.metrics import LLM_CALL_DURATION, LLM_TOKENS
+from telemetry.tracing import Span, end_span, start_span
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """
+    Records latency and tokens of LLM calls in metrics,
+    and LLM calls and tool calls of the agent as spans of current trace.
+    """
+
+    # Run in caller's context, so spans are children of the running node
+    run_inline: bool = True
+
+    def __init__(self):
+        self._spans: dict[UUID, Span] = {}
+        # Start time, provider and model of running LLM calls
+        self._llm_calls: dict[UUID, tuple[float, str, str]] = {}
+
+    def _start(self, run_id: UUID, name: str, **attributes: Any):
+        if sc().tracing_enabled:
+            self._spans[run_id] = start_span(name, **attributes)
+
+    def _end(
+        self,
+        run_id: UUID,
+        error: BaseException | None = None,
+        **attributes: Any,
+    ):
+        current = self._spans.pop(run_id, None)
+        if current is not None:
+            current.set(**attributes)
+            end_span(current, error)
+
+    def _end_llm_call(self, run_id: UUID, status: str) -> tuple[str, str]:
+        start, provider, model = self._llm_calls.pop(
+            run_id, (time.perf_counter(), "", "")
+        )
+        LLM_CALL_DURATION.observe(
+            time.perf_counter() - start, provider=provider, model=model, status=status
+        )
+        return provider, model
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[Any]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ):
+        metadata = kwargs.get("metadata") or {}
+        provider = metadata.get("ls_provider", "")
+        model = metadata.get("ls_model_name", "")
+        self._llm_calls[run_id] = (time.perf_counter(), provider, model)
+        self._start(run_id, "llm.call", provider=provider, model=model)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        provider, model = self._end_llm_call(run_id, "ok")
+
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or 0
+        LLM_TOKENS.inc(prompt_tokens, provider=provider, model=model, type="prompt")
+        LLM_TOKENS.inc(
+            completion_tokens, provider=provider, model=model, type="completion"
+        )
+
+        self._end(
+            run_id,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end_llm_call(run_id, "error")
+        self._end(run_id, error)
+
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ):
+        self._start(run_id, f"tool.{serialized.get('name', 'unknown')}")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, output_chars=len(str(output)))
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, error)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import TypedDict
+from typing import Any, TypedDict
 
 from server_config import get_server_config
 
@@ -35,6 +35,21 @@ def set_llm_config(url: str, api_key: str, model: str):
     _config.llm_model = model
 
 
+def get_prompt_cache_kwargs(url: str, prompt_cache_key: str | None) -> dict[str, Any]:
+    """
+    Returns the ChatOpenAI arguments to hint provider's prompt caching.
+    OpenAI routes requests with same `prompt_cache_key` to same cache,
+    other providers cache the common prompt prefix automatically.
+    """
+    if not get_server_config().llm_prompt_cache or prompt_cache_key is None:
+        return {}
+
+    if url.startswith(provider_llm_map["openai"]["url"]):
+        return {"extra_body": {"prompt_cache_key": prompt_cache_key}}
+
+    return {}
+
+
 def get_provider_url(provider: str) -> str:
     provider_info = provider_llm_map.get(provider.lower(), None)
     if provider_info:
@@ -0,0 +1,120 @@
+from langchain.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages import BaseMessage
+
+from mcp_format import count_tokens
+from server_config import get_server_config as sc
+
+STALE_TOOL_OUTPUT = "[Tool output of earlier turn removed]"
+
+
+def _split_turns(messages: list[BaseMessage]) -> list[list[BaseMessage]]:
+    # Every turn starts with User's message
+    turns: list[list[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+
+    return turns
+
+
+def _drop_stale_tool_outputs(
+    turn: list[BaseMessage], keep_latest: bool = False
+) -> list[BaseMessage]:
+    # Outputs after the latest tool calling message are still being answered
+    end = len(turn)
+    if keep_latest:
+        end = max(
+            (idx for idx, message in enumerate(turn) if isinstance(message, AIMessage)),
+            default=0,
+        )
+
+    # Keep the tool message to preserve tool call sequence but remove its payload
+    return [
+        message.model_copy(update={"content": STALE_TOOL_OUTPUT})
+        if isinstance(message, ToolMessage) and idx < end
+        else message
+        for idx, message in enumerate(turn)
+    ]
+
+
+def _summarize_turns(turns: list[list[BaseMessage]]) -> SystemMessage | None:
+    # Summary of dropped turns is list of questions user has asked earlier
+    questions = [
+        str(turn[0].content)[:200]
+        for turn in turns
+        if turn and isinstance(turn[0], HumanMessage)
+    ]
+    if not questions:
+        return None
+
+    return SystemMessage(
+        content="Earlier in this conversation user asked: "
+        + "; ".join(questions[-sc().context_max_turns :])
+    )
+
+
+def _count_turn_tokens(turn: list[BaseMessage]) -> int:
+    return sum(count_tokens(str(message.content)) for message in turn)
+
+
+def _count_tokens(summary: SystemMessage | None, turns: list[list[BaseMessage]]) -> int:
+    summary_tokens = count_tokens(str(summary.content)) if summary is not None else 0
+    return summary_tokens + sum(_count_turn_tokens(turn) for turn in turns)
+
+
+def compact_conversation(messages: list[BaseMessage]) -> list[BaseMessage]:
+    """
+    Compacts the conversation before it is sent to the LLM.
+    Last `context_max_turns` turns are kept verbatim and older turns are replaced by a short summary.
+    Tool outputs are only kept for the latest turn, and oldest turns are dropped until
+    the conversation with its summary fits in `context_max_tokens`.
+    """
+    turns = _split_turns(messages)
+    if not turns:
+        return messages
+
+    # Split Turns to keep and drop
+    max_turns = max(sc().context_max_turns, 1)
+    dropped_turns = turns[:-max_turns]
+    kept_turns = turns[-max_turns:]
+
+    # Remove stale tool payloads from all but latest turn
+    kept_turns = [_drop_stale_tool_outputs(turn) for turn in kept_turns[:-1]] + [
+        kept_turns[-1]
+    ]
+
+    # Drop oldest turns until token ceiling is met, latest turn is always kept
+    max_tokens = sc().context_max_tokens
+    summary = _summarize_turns(dropped_turns)
+    while len(kept_turns) > 1 and _count_tokens(summary, kept_turns) > max_tokens:
+        dropped_turns.append(kept_turns.pop(0))
+        summary = _summarize_turns(dropped_turns)
+
+    # Latest turn alone is over the ceiling, keep only its latest tool outputs
+    if _count_tokens(summary, kept_turns) > max_tokens:
+        kept_turns[-1] = _drop_stale_tool_outputs(kept_turns[-1], keep_latest=True)
+
+    # Summary goes last, latest turn is what the LLM has to answer
+    if _count_tokens(summary, kept_turns) > max_tokens:
+        summary = None
+
+    # Generate compacted conversation
+    compacted: list[BaseMessage] = []
+    if summary is not None:
+        compacted.append(summary)
+
+    for turn in kept_turns:
+        compacted.extend(turn)
+
+    return compacted
+
+
+def get_conversation_for_shortlist(messages: list[BaseMessage]) -> list[BaseMessage]:
+    # Shortlisting only needs what was said, not the tool calls and outputs
+    return [
+        message
+        for message in messages
+        if isinstance(message, (HumanMessage, SystemMessage))
+        or (isinstance(message, AIMessage) and message.content)
+    ]
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import re
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from server_config import get_server_config as sc
+
+from .messages import TURN_CONTEXT_HEADER
+
+# Deterministic OpenAI compatible LLM to profile agent without a real provider
+# Run with `uvicorn agent.fake_llm:app --port 8020` and set
+# `LLM_API_URL=http://localhost:8020/v1`, `LLM_MODEL=fake` and `LLM_API_KEY=fake`
+app = FastAPI(title="Fake LLM")
+
+SEARCH_TOOL = "search_nse_stocks_by_name_or_symbol"
+PRICE_TOOL = "get_current_stock_price"
+HISTORY_TOOL = "get_stock_history_prices_for_range_not_more_than_1_year"
+CHART_TOOL = "get_line_chart_for_data"
+
+# Intent keywords and the tools needed to answer, checked in order
+INTENT_TOOLS: list[tuple[tuple[str, ...], list[str]]] = [
+    (("52 week high",), ["get_stock_running_at_52week_high"]),
+    (("52 week low",), ["get_stock_running_at_52week_low"]),
+    (("volume",), ["weekly_volume_gainer_stocks"]),
+    (("market open", "market status", "market closed"), ["check_equity_market_status"]),
+    (
+        ("sector", "industry"),
+        [
+            "search_nse_sector_or_industry_keys",
+            "get_top_stocks_in_industries_by_industry_keys",
+        ],
+    ),
+    (
+        ("financial", "analyse", "analyze"),
+        [SEARCH_TOOL, "analyse_stock_corporate_filings_financial_results_and_actions"],
+    ),
+    (("performed", "history", "trend", "month", "chart"), [SEARCH_TOOL, HISTORY_TOOL]),
+    (("price", "close"), [SEARCH_TOOL, PRICE_TOOL]),
+]
+
+
+def _count_tokens(text: str) -> int:
+    return max(len(text) // 4, 1)
+
+
+def _message_text(message: dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(str(part.get("text", "")) for part in content)
+    return str(content)
+
+
+def _last_question(messages: list[dict[str, Any]]) -> tuple[str, int]:
+    for idx in range(len(messages) - 1, -1, -1):
+        # Context message after the question is not asked by user
+        text = _message_text(messages[idx])
+        if messages[idx]["role"] == "user" and not text.startswith(TURN_CONTEXT_HEADER):
+            return text, idx
+    return "", -1
+
+
+def _plan_tools(question: str) -> list[str]:
+    question = question.lower().replace("-", " ")
+    for keywords, tools in INTENT_TOOLS:
+        if any(keyword in question for keyword in keywords):
+            return tools
+    return []
+
+
+def _extract_company(question: str) -> str:
+    # Company name is usually after "of" or "is" like "current price of Infosys?"
+    match = re.search(
+        r"(?:price of|analyse|analyze|how has|of)\s+(.+?)(?:\s+stock|\s+and|\s+performed|'s|\?|\.|$)",
+        question,
+        flags=re.IGNORECASE,
+    )
+    return match.group(1).strip() if match else question.split(" ")[-1].strip("?.")
+
+
+def _first_symbol(tool_output: str) -> str | None:
+    # Search tool responds with `symbol,name` table
+    lines = [line for line in tool_output.splitlines() if line.strip()]
+    if len(lines) < 2 or not lines[0].lower().startswith("symbol"):
+        return None
+    return lines[1].split(",")[0]
+
+
+def _tool_arguments(tool: str, question: str, symbol: str | None) -> dict[str, Any]:
+    if tool == SEARCH_TOOL:
+        return {"search_key": _extract_company(question)}
+    if tool == HISTORY_TOOL:
+        to_date = datetime.now()
+        from_date = to_date - timedelta(days=90)
+        return {
+            "symbol": symbol or "",
+            "from_date": from_date.strftime("%d-%m-%Y"),
+            "to_date": to_date.strftime("%d-%m-%Y"),
+        }
+    if tool == "search_nse_sector_or_industry_keys":
+        return {"search_key": _extract_company(question)}
+    if tool == "get_top_stocks_in_industries_by_industry_keys":
+        return {"industry_keys": [_extract_company(question)], "top_n": 5}
+    if tool in (
+        PRICE_TOOL,
+        "analyse_stock_corporate_filings_financial_results_and_actions",
+    ):
+        return {"symbol": symbol or ""}
+    return {}
+
+
+def shortlist_response(messages: list[dict[str, Any]]) -> str:
+    question, _ = _last_question(messages)
+    tools = _plan_tools(question)
+    if HISTORY_TOOL in tools:
+        tools = tools + [CHART_TOOL]
+    return json.dumps({"tools": tools})
+
+
+def execution_response(
+    messages: list[dict[str, Any]],
+    available_tools: list[str],
+) -> tuple[str, list[dict[str, Any]]]:
+    """
+    Returns the next step of scripted plan, either tool calls or final answer.
+    """
+    question, question_idx = _last_question(messages)
+    plan = [tool for tool in _plan_tools(question) if tool in available_tools]
+
+    # Tool outputs received in this turn
+    tool_outputs = [
+        _message_text(message)
+        for message in messages[question_idx + 1 :]
+        if message["role"] == "tool"
+    ]
+
+    # Next tool in plan
+    if len(tool_outputs) < len(plan):
+        symbol = _first_symbol(tool_outputs[0]) if tool_outputs else None
+        tool = plan[len(tool_outputs)]
+        return "", [
+            {
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "function",
+                "function": {
+                    "name": tool,
+                    "arguments": json.dumps(_tool_arguments(tool, question, symbol)),
+                },
+            }
+        ]
+
+    # Final Answer from last tool output
+    if tool_outputs:
+        return f"Here is what I found:\n\n```\n{tool_outputs[-1][:1000]}\n```", []
+
+    return "Hello! Ask me anything about NSE listed stocks.", []
+
+
+async def _simulate_latency(completion_tokens: int):
+    delay_ms = (
+        sc().fake_llm_first_token_ms
+        + completion_tokens * sc().fake_llm_token_latency_ms
+    )
+    await asyncio.sleep(delay_ms / 1000)
+
+
+def _stream_chunks(completion: dict[str, Any]):
+    # Whole message is sent as single delta followed by finish chunk
+    choice = completion["choices"][0]
+    delta: dict[str, Any] = {
+        "role": "assistant",
+        "content": choice["message"]["content"],
+    }
+    if choice["message"].get("tool_calls"):
+        delta["tool_calls"] = [
+            {"index": idx, **tool_call}
+            for idx, tool_call in enumerate(choice["message"]["tool_calls"])
+        ]
+
+    for choice_update in [
+        {"index": 0, "delta": delta, "finish_reason": None},
+        {"index": 0, "delta": {}, "finish_reason": choice["finish_reason"]},
+    ]:
+        chunk = {
+            "id": completion["id"],
+            "object": "chat.completion.chunk",
+            "created": completion["created"],
+            "model": completion["model"],
+            "choices": [choice_update],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages: list[dict[str, Any]] = body.get("messages", [])
+
+    # Structured output is only used for tool shortlisting
+    if body.get("response_format", {}).get("type") in ("json_schema", "json_object"):
+        content, tool_calls = shortlist_response(messages), []
+    else:
+        available_tools = [tool["function"]["name"] for tool in body.get("tools", [])]
+        content, tool_calls = execution_response(messages, available_tools)
+
+    prompt_tokens = sum(_count_tokens(_message_text(m)) for m in messages)
+    completion_tokens = _count_tokens(content + json.dumps(tool_calls))
+    await _simulate_latency(completion_tokens)
+
+    message: dict[str, Any] = {"role": "assistant", "content": content or None}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+
+    completion = {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+    if body.get("stream"):
+        return StreamingResponse(
+            _stream_chunks(completion), media_type="text/event-stream"
+        )
+
+    return JSONResponse(completion)
@@ -1,25 +1,29 @@
 from functools import cache
-from typing import Annotated, TypedDict
+from typing import TYPE_CHECKING, Annotated, TypedDict
 
-from langchain.agents import create_agent
-from langchain.messages import HumanMessage
+import httpx
+from langchain.messages import HumanMessage, SystemMessage
 from langchain_core.messages import BaseMessage
 from langchain_core.tools import BaseTool
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langchain_openai import ChatOpenAI
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
 from pydantic import BaseModel, Field, SecretStr
 
 from server_config import get_server_config as sc
+from telemetry.tracing import inject_traceparent, traced
 
-from .config import get_config
+from .config import get_config, get_prompt_cache_kwargs
+from .context import get_conversation_for_shortlist
 from .local_tools import get_line_chart_for_data
 from .messages import (
     get_execution_system_message,
     get_shortlist_message,
+    get_shortlist_system_message,
 )
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
 config = get_config()
 
 
@@ -35,12 +39,31 @@ class ShortlistOutput(TypedDict):
     tools: list[str]
 
 
+def _create_mcp_http_client(
+    headers: dict[str, str] | None = None,
+    timeout: httpx.Timeout | None = None,
+    auth: httpx.Auth | None = None,
+) -> httpx.AsyncClient:
+    # Same defaults as MCP client, and trace context is passed to MCP server, so
+    # tool spans are part of the chat turn
+    return httpx.AsyncClient(
+        headers=headers,
+        timeout=timeout if timeout is not None else httpx.Timeout(30.0),
+        auth=auth,
+        follow_redirects=True,
+        event_hooks={"request": [inject_traceparent]},
+    )
+
+
 async def _get_all_tools():
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
     mcp_client = MultiServerMCPClient(
         {
             "nse-mcp": {
                 "url": config.nse_mcp_url,
                 "transport": "streamable_http",
+                "httpx_client_factory": _create_mcp_http_client,
             }
         }
     )
@@ -50,30 +73,55 @@ async def _get_all_tools():
     #  Add Local Tools
     all_tools.append(get_line_chart_for_data)
 
-    # Return Tools
-    return all_tools
+    # Return Tools in fixed order, tool schemas are part of cached prompt prefix
+    return sorted(all_tools, key=lambda tool: tool.name)
+
+
+async def get_tools_by_name() -> dict[str, BaseTool]:
+    """
+    All agent tools by name, to call them without LLM.
+    """
+    return {tool.name: tool for tool in await _get_all_tools()}
+
 
+def _get_llm_model(prompt_cache_key: str | None = None) -> "ChatOpenAI":
+    # LLM client is slow to import, load on first use
+    from langchain_openai import ChatOpenAI
 
-def _get_llm_model() -> ChatOpenAI:
     return ChatOpenAI(
         base_url=config.llm_api_url,
         api_key=SecretStr(config.llm_api_key),
         model=config.llm_model,
+        **get_prompt_cache_kwargs(config.llm_api_url, prompt_cache_key),
     )
 
 
+def _uses_shortlist() -> bool:
+    # Shortlisted tools change tool schemas every turn, which breaks provider's
+    # prompt cache, so shortlist is skipped when prompt caching is on
+    return not sc().llm_prompt_cache
+
+
 # Generate First Node to Shortlist tools for the task
+@traced("agent.tool_shortlist")
 async def tools_shortlist_node(state: GraphState) -> GraphState:
     # Generate List of Tool Names
     all_tools = await _get_all_tools()
     all_tool_names = [tool.name for tool in all_tools]
 
-    # Instruction for Model
+    # Instruction for Model, static instructions first to reuse provider's prompt cache
     user_message = [
-        HumanMessage(content=get_shortlist_message(all_tool_names, state.messages))
+        SystemMessage(content=get_shortlist_system_message(all_tool_names)),
+        HumanMessage(
+            content=get_shortlist_message(
+                get_conversation_for_shortlist(state.messages)
+            )
+        ),
     ]
 
-    llm = _get_llm_model().with_structured_output(ShortlistOutput, strict=True)
+    llm = _get_llm_model("nse-chatbot-shortlist").with_structured_output(
+        ShortlistOutput, strict=True
+    )
     output: ShortlistOutput = llm.invoke(user_message)
 
     # Extract the shortlisted tools from the output
@@ -86,11 +134,17 @@ async def tools_shortlist_node(state: GraphState) -> GraphState:
 
 
 # Node to execute User command with available Tools
+@traced("agent.user_command_execution")
 async def user_command_execution_node(state: GraphState) -> GraphState:
+    from langchain.agents import create_agent
+
+    # Without shortlist all tools are bound, in fixed order to keep prompt prefix stable
+    tools = state.tools if _uses_shortlist() else await _get_all_tools()
+
     # Generate Tool calling Agent
     execution_agent = create_agent(
-        model=_get_llm_model(),
-        tools=state.tools,
+        model=_get_llm_model("nse-chatbot-execution"),
+        tools=tools,
         system_prompt=get_execution_system_message(),
     )
 
@@ -103,12 +157,14 @@ async def user_command_execution_node(state: GraphState) -> GraphState:
 
 
 async def get_agent_react():
+    from langchain.agents import create_agent
+
     # Get All Tools
     all_tools = await _get_all_tools()
 
     # Return ReAct agent with all tools
     return create_agent(
-        model=_get_llm_model(),
+        model=_get_llm_model("nse-chatbot-execution"),
         tools=all_tools,
         system_prompt=get_execution_system_message(),
     )
@@ -121,12 +177,15 @@ def get_agent_flow():
     graph = StateGraph(GraphState)
 
     # Add Nodes
-    graph.add_node("tool_shortlist", tools_shortlist_node)
     graph.add_node("user_command_execution", user_command_execution_node)
 
     # Edges for Graph Execution
-    graph.add_edge(START, "tool_shortlist")
-    graph.add_edge("tool_shortlist", "user_command_execution")
+    if _uses_shortlist():
+        graph.add_node("tool_shortlist", tools_shortlist_node)
+        graph.add_edge(START, "tool_shortlist")
+        graph.add_edge("tool_shortlist", "user_command_execution")
+    else:
+        graph.add_edge(START, "user_command_execution")
     graph.add_edge("user_command_execution", END)
 
     # Compile Graph
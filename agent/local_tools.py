@@ -1,8 +1,6 @@
 import os
 from tempfile import NamedTemporaryFile
 
-import matplotlib.pyplot as plt
-import seaborn as sns
 from langchain.tools import tool
 
 from server_config import get_server_config as sc
@@ -17,6 +15,10 @@ def get_line_chart_for_data(
     The First element is X Axis value and the second element is Y Axis value.
     This function returns an markdown image tag with chart image url which can be embedded as is it in the response without any processing.
     """
+    # Charting libraries are slow to import, load on first chart
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     plt.figure(figsize=(12, 6))
     fig = sns.lineplot(x=[x for x, _ in data], y=[y for _, y in data])
     fig.set_title(title)
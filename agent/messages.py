@@ -2,9 +2,16 @@ from datetime import datetime
 
 from langchain_core.messages import (
     BaseMessage,
+    HumanMessage,
     get_buffer_string,
 )
 
+# Prompts are split in static prefix and dynamic suffix.
+# Static prefix must not change between turns so that LLM providers can cache it.
+
+# First line of context message which follows the question of a turn
+TURN_CONTEXT_HEADER = "## TURN CONTEXT ##"
+
 
 def get_execution_system_message():
     return "\n".join(
@@ -30,14 +37,32 @@ def get_execution_system_message():
             "* Only Generate the 'arguments' field in tool call is the function actually requires parameters. DO NOT generate 'arguments': '{}' or 'arguments': '{\"\":\"\"}' for function that take no input.",
             "* When showing Trends or charts DO NOT SHOW any dummy or made up chart. Always use the provided tool to get right chart to display.",
             "* MOST IMPORTANT: NEVER recomment stock or any financial advice. You are an analyst not a financial advisor. Provide only factual information.",
-            "",
-            "## CURRENT DATE ##",
-            datetime.now().strftime("%A, %d %B %Y"),
+            "* Latest question is followed by a TURN CONTEXT message, which is not from the User.",
+            "* Use the current date given in TURN CONTEXT for any date calculations.",
+            "* Companies already resolved to NSE symbols may be given in TURN CONTEXT. Use these symbols directly without searching.",
         ]
     )
 
 
-def get_shortlist_message(tools: list[str], user_conversation: list[BaseMessage]):
+def get_turn_context_message(companies: list[tuple[str, str]]) -> HumanMessage:
+    """
+    Context which changes every turn, sent after the question as user message since
+    several OpenAI compatible providers reject system messages which are not first.
+    Companies are (name, symbol) found in latest question.
+    """
+    lines = [
+        TURN_CONTEXT_HEADER,
+        "### CURRENT DATE ###",
+        datetime.now().strftime("%A, %d %B %Y"),
+    ]
+    if companies:
+        lines.append("### RESOLVED COMPANIES ###")
+        lines.extend(f"* {name}: {symbol}" for name, symbol in companies)
+
+    return HumanMessage(content="\n".join(lines))
+
+
+def get_shortlist_system_message(tools: list[str]):
     return "\n".join(
         [
             "## ROLE ##",
@@ -71,8 +96,14 @@ def get_shortlist_message(tools: list[str], user_conversation: list[BaseMessage]
             '\tAnswer: {"tools": []}',
             "",
             "## TOOLS LIST ##",
-            ", ".join(tools),
-            "",
+            ", ".join(sorted(tools)),
+        ]
+    )
+
+
+def get_shortlist_message(user_conversation: list[BaseMessage]):
+    return "\n".join(
+        [
             "## CONVERSATION ##",
             get_buffer_string(user_conversation),
         ]
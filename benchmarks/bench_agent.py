@@ -0,0 +1,63 @@
+import time
+from collections import defaultdict
+from typing import Any
+
+from fastapi import FastAPI
+
+from .common import percentiles, start_server_in_thread
+
+QUESTIONS: list[str] = [
+    "What is current price of Infosys?",
+    "Give me list of 10 Stocks which are currently at their 52 week high.",
+    "How has HCL Tech performed in last 3 months?",
+]
+
+
+def start_mcp_server(port: int):
+    import mcp_tools
+    from server_config import get_server_config as sc
+
+    # Same mount as main app, without UI
+    mcp_http_app = mcp_tools.mcp.http_app(path="/")
+    app = FastAPI(lifespan=mcp_http_app.lifespan)
+    app.mount(sc().mcp_path, mcp_http_app)
+
+    return start_server_in_thread(app, port)
+
+
+async def run(iterations: int) -> dict[str, Any]:
+    """
+    Measures latency of agent turns and of each graph node in the turn.
+    """
+    from langchain.messages import HumanMessage
+
+    from agent.graph import get_agent
+    from agent.messages import get_turn_context_message
+    from chat.utils import generate_agent_state
+
+    turn_durations: list[float] = []
+    node_durations: defaultdict[str, list[float]] = defaultdict(list)
+
+    for _ in range(iterations):
+        for question in QUESTIONS:
+            agent = await get_agent()
+            state = generate_agent_state(
+                [HumanMessage(content=question), get_turn_context_message([])]
+            )
+
+            # Each update is yielded when a node finishes
+            turn_start = node_start = time.perf_counter()
+            async for update in agent.astream(state, stream_mode="updates"):
+                now = time.perf_counter()
+                for node in update.keys():
+                    node_durations[node].append((now - node_start) * 1000)
+                node_start = now
+
+            turn_durations.append((time.perf_counter() - turn_start) * 1000)
+
+    return {
+        "turn": percentiles(turn_durations),
+        "nodes": {
+            node: percentiles(durations) for node, durations in node_durations.items()
+        },
+    }
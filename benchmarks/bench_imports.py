@@ -0,0 +1,151 @@
+import os
+import subprocess
+import sys
+import time
+from typing import Any
+
+# Import time budget in ms and modules which must not be loaded by each entry module.
+# Charting and LLM client are loaded on first use, MCP and refresh processes never load UI.
+IMPORT_BUDGETS: dict[str, tuple[float, list[str]]] = {
+    "main": (12000, ["matplotlib", "seaborn", "langchain_openai"]),
+    "mcp_tools": (
+        4000,
+        ["gradio", "langchain", "langgraph", "langchain_openai", "matplotlib"],
+    ),
+    "dbman.actions": (
+        1500,
+        ["gradio", "fastmcp", "langchain", "langgraph", "matplotlib"],
+    ),
+    "agent.graph": (2000, ["gradio", "langchain_openai", "matplotlib", "seaborn"]),
+    "chat.agent_chat": (8000, ["langchain_openai", "matplotlib", "seaborn"]),
+}
+
+# Budgets of `main` when started in a single role
+ROLE_IMPORT_BUDGETS: dict[str, tuple[float, list[str]]] = {
+    "mcp": (
+        5000,
+        [
+            "gradio",
+            "langchain",
+            "langchain_core",
+            "langchain_openai",
+            "langgraph",
+            "matplotlib",
+        ],
+    ),
+    "refresh-worker": (
+        2500,
+        [
+            "gradio",
+            "fastmcp",
+            "langchain",
+            "langchain_core",
+            "langgraph",
+            "matplotlib",
+            "sqlalchemy",
+        ],
+    ),
+}
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(module: str, role: str | None = None) -> dict[str, Any]:
+    """
+    Imports module in fresh interpreter with `-X importtime` and reads its cumulative time.
+    """
+    env = {**os.environ, "SERVER_ROLE": role} if role else None
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    # Lines are `import time: self [us] | cumulative | imported package`
+    loaded: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if cumulative.strip().isdigit():
+            loaded[name.strip()] = int(cumulative.strip())
+
+    return {
+        "import_ms": loaded.get(module, 0) / 1000,
+        "process_wall_ms": wall_ms,
+        "ok": result.returncode == 0,
+        "error": result.stderr.strip().splitlines()[-1]
+        if result.returncode != 0
+        else None,
+        "modules": set(loaded),
+    }
+
+
+def get_import_entries() -> list[tuple[str, str, str | None, float, list[str]]]:
+    """
+    Returns name, module, role, budget in ms and forbidden packages of each measured import.
+    """
+    return [
+        (module, module, None, budget_ms, forbidden)
+        for module, (budget_ms, forbidden) in IMPORT_BUDGETS.items()
+    ] + [
+        (f"main[{role}]", "main", role, budget_ms, forbidden)
+        for role, (budget_ms, forbidden) in ROLE_IMPORT_BUDGETS.items()
+    ]
+
+
+def get_forbidden_loaded(forbidden: list[str], loaded: set[str]) -> list[str]:
+    return sorted(
+        package
+        for package in forbidden
+        if any(name == package or name.startswith(f"{package}.") for name in loaded)
+    )
+
+
+def run() -> dict[str, Any]:
+    results: dict[str, Any] = {}
+
+    for name, module, role, budget_ms, forbidden in get_import_entries():
+        measured = measure_import(module, role)
+        forbidden_loaded = get_forbidden_loaded(forbidden, measured.pop("modules"))
+
+        results[name] = {
+            **measured,
+            "budget": budget_ms,
+            "forbidden_loaded": forbidden_loaded,
+            "within_budget": measured["ok"]
+            and measured["import_ms"] <= budget_ms
+            and not forbidden_loaded,
+        }
+        print(
+            f"{name}: {measured['import_ms']:.0f} ms (budget {budget_ms:.0f} ms)"
+            + (f", loads {', '.join(forbidden_loaded)}" if forbidden_loaded else "")
+        )
+
+    return results
+
+
+def get_budget_violations(results: dict[str, Any]) -> list[str]:
+    return [
+        f"{module} {result['import_ms']:.0f} ms, budget {result['budget']:.0f} ms"
+        + (
+            f", loads {', '.join(result['forbidden_loaded'])}"
+            if result["forbidden_loaded"]
+            else ""
+        )
+        + (f", failed: {result['error']}" if result["error"] else "")
+        for module, result in results.items()
+        if not result["within_budget"]
+    ]
+
+
+if __name__ == "__main__":
+    # Usage: python -m benchmarks.bench_imports
+    violations = get_budget_violations(run())
+    for violation in violations:
+        print(f"OVER BUDGET {violation}")
+    sys.exit(1 if violations else 0)
@@ -0,0 +1,47 @@
+import time
+from typing import Any
+
+import httpx
+from sqlalchemy import event
+
+from .common import flatten_metrics
+
+
+def run(emulator_url: str, table_size: int) -> dict[str, Any]:
+    from dbman.actions import refresh_market_metadata
+    from dbman.helper import get_engine
+
+    from .bench_search import populate_nse_metadata
+
+    # Start with table populated like production, so refresh updates rows
+    populate_nse_metadata(table_size)
+
+    # Count write statements sent to Postgres
+    db_writes = {"count": 0}
+
+    def count_writes(conn, cursor, statement: str, *args: Any):
+        if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            db_writes["count"] += 1
+
+    event.listen(get_engine(), "after_cursor_execute", count_writes)
+
+    # Upstream requests are counted by emulator
+    stats_before = httpx.get(f"{emulator_url}/emulator/stats").json()
+
+    start = time.perf_counter()
+    try:
+        refresh_market_metadata()
+    finally:
+        event.remove(get_engine(), "after_cursor_execute", count_writes)
+    wall_time_ms = (time.perf_counter() - start) * 1000
+
+    stats_after = httpx.get(f"{emulator_url}/emulator/stats").json()
+    upstream_requests = sum(flatten_metrics(stats_after).values()) - sum(
+        flatten_metrics(stats_before).values()
+    )
+
+    return {
+        "wall_time_ms": round(wall_time_ms, 3),
+        "db_writes": db_writes["count"],
+        "upstream_requests": upstream_requests,
+    }
@@ -0,0 +1,68 @@
+from datetime import datetime
+from typing import Any
+
+from sqlmodel import Session, delete
+
+from .common import measure
+
+SEARCH_KEYS: list[str] = ["Tata", "TCS", "Infosys", "Bank", "Synthetic 0500"]
+
+
+def populate_nse_metadata(size: int):
+    """
+    Replaces the content of `nse_metadata` table with synthetic companies.
+    """
+    from dbman.helper import get_engine
+    from dbman.nse_metadata import NSEMetadata
+    from nse import synthetic
+
+    rows = []
+    for symbol in synthetic.get_symbols(size):
+        quote = synthetic.stock_quote(symbol)
+        trade_info = synthetic.stock_trade_info(symbol)["marketDeptOrderBook"][
+            "tradeInfo"
+        ]
+        rows.append(
+            NSEMetadata(
+                symbol=symbol,
+                name=quote["info"]["companyName"],
+                sector=quote["industryInfo"]["sector"],
+                industry=quote["industryInfo"]["industry"],
+                industry_info=quote["industryInfo"]["basicIndustry"],
+                total_traded_volume_in_lakhs=trade_info["totalTradedVolume"],
+                total_traded_value_in_crore=trade_info["totalTradedValue"],
+                total_market_cap_in_crore=trade_info["totalMarketCap"],
+                refresh_dtm=datetime.now(),
+            )
+        )
+
+    with Session(get_engine()) as session:
+        session.exec(delete(NSEMetadata))
+        session.add_all(rows)
+        session.commit()
+
+
+def run(iterations: int, sizes: list[int]) -> dict[str, Any]:
+    from dbman.helper import (
+        search_nse_company_by_name_or_symbol_indb,
+        search_sector_or_industry_indb,
+    )
+
+    results: dict[str, Any] = {}
+    for size in sizes:
+        populate_nse_metadata(size)
+
+        results[f"rows_{size}"] = {
+            "company": {
+                key: measure(
+                    lambda key=key: search_nse_company_by_name_or_symbol_indb(key),
+                    iterations,
+                )
+                for key in SEARCH_KEYS
+            },
+            "industry": measure(
+                lambda: search_sector_or_industry_indb("Software"), iterations
+            ),
+        }
+
+    return results
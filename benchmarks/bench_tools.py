@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any
+
+from .common import get_tool_fn, measure
+
+
+def run(iterations: int, symbol: str) -> dict[str, Any]:
+    import mcp_tools
+    from nse.market_state import get_market_state_poller
+
+    # Market status is UNKNOWN until poller has polled once
+    get_market_state_poller().wait_for_first_poll()
+
+    to_date = datetime.now()
+    from_date = to_date - timedelta(days=90)
+
+    cases = {
+        "check_equity_market_status": lambda: asyncio.run(
+            get_tool_fn(mcp_tools.check_equity_market_status)()
+        ),
+        "get_current_stock_price": lambda: get_tool_fn(
+            mcp_tools.get_current_stock_price
+        )(symbol),
+        "get_stock_history_prices_for_range_not_more_than_1_year": lambda: get_tool_fn(
+            mcp_tools.get_stock_history_prices_for_range_not_more_than_1_year
+        )(symbol, from_date.strftime("%d-%m-%Y"), to_date.strftime("%d-%m-%Y")),
+        "get_stock_running_at_52week_high": get_tool_fn(
+            mcp_tools.get_stock_running_at_52week_high
+        ),
+        "get_stock_running_at_52week_low": get_tool_fn(
+            mcp_tools.get_stock_running_at_52week_low
+        ),
+        "weekly_volume_gainer_stocks": get_tool_fn(
+            mcp_tools.weekly_volume_gainer_stocks
+        ),
+        "search_nse_stocks_by_name_or_symbol": lambda: get_tool_fn(
+            mcp_tools.search_nse_stocks_by_name_or_symbol
+        )("Tata"),
+        "search_nse_sector_or_industry_keys": lambda: get_tool_fn(
+            mcp_tools.search_nse_sector_or_industry_keys
+        )("IT"),
+        "get_top_stocks_in_industries_by_industry_keys": lambda: get_tool_fn(
+            mcp_tools.get_top_stocks_in_industries_by_industry_keys
+        )(["Computers - Software & Consulting"], 10),
+        "analyse_stock_corporate_filings_financial_results_and_actions": lambda: (
+            get_tool_fn(
+                mcp_tools.analyse_stock_corporate_filings_financial_results_and_actions
+            )(symbol)
+        ),
+    }
+
+    results: dict[str, Any] = {}
+    for name, fn in cases.items():
+        # Tools using Postgres fail when database is not available, keep measuring rest
+        try:
+            results[name] = measure(fn, iterations)
+        except Exception as e:
+            results[name] = {"error": str(e)}
+
+    return results
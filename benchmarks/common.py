@@ -0,0 +1,120 @@
+import json
+import statistics
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import uvicorn
+
+
+def percentiles(durations_ms: list[float]) -> dict[str, float]:
+    if not durations_ms:
+        return {}
+
+    ordered = sorted(durations_ms)
+
+    def pick(p: float) -> float:
+        return ordered[min(int(round(p * (len(ordered) - 1))), len(ordered) - 1)]
+
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 3),
+        "p50": round(pick(0.50), 3),
+        "p95": round(pick(0.95), 3),
+        "p99": round(pick(0.99), 3),
+    }
+
+
+def measure(fn: Callable[[], Any], iterations: int) -> dict[str, float]:
+    durations_ms: list[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        durations_ms.append((time.perf_counter() - start) * 1000)
+
+    return percentiles(durations_ms)
+
+
+async def measure_async(
+    fn: Callable[[], Awaitable[Any]], iterations: int
+) -> dict[str, float]:
+    durations_ms: list[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        durations_ms.append((time.perf_counter() - start) * 1000)
+
+    return percentiles(durations_ms)
+
+
+def start_server_in_thread(app: Any, port: int) -> uvicorn.Server:
+    """
+    Starts the ASGI app with uvicorn in a daemon thread and waits till it accepts requests.
+    """
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+
+    # Wait for server to start
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Server did not start on port {port}")
+        time.sleep(0.05)
+
+    return server
+
+
+def flatten_metrics(results: dict[str, Any], prefix: str = "") -> dict[str, float]:
+    # Flatten nested results to `suite.case.metric` keys for comparison
+    metrics: dict[str, float] = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            metrics.update(flatten_metrics(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = float(value)
+
+    return metrics
+
+
+def compare_with_baseline(
+    results: dict[str, Any],
+    baseline_path: str,
+    threshold: float,
+) -> list[str]:
+    """
+    Compares latency and count metrics with baseline and returns the regressions.
+    A metric regresses when it is more than `threshold` fraction above baseline.
+    """
+    with open(baseline_path, encoding="utf-8") as baseline_file:
+        baseline = flatten_metrics(json.load(baseline_file))
+
+    current = flatten_metrics(results)
+
+    regressions: list[str] = []
+    for name, value in sorted(current.items()):
+        # Only compare time and count metrics, higher is worse for all of them
+        if not name.endswith(
+            ("mean", "p50", "p95", "p99", "_ms", "_requests", "_writes")
+        ):
+            continue
+
+        baseline_value = baseline.get(name)
+        if baseline_value is None or baseline_value <= 0:
+            continue
+
+        change = (value - baseline_value) / baseline_value
+        if change > threshold:
+            regressions.append(
+                f"{name}: {baseline_value:.3f} -> {value:.3f} (+{change * 100:.1f}%)"
+            )
+
+    return regressions
+
+
+def get_tool_fn(tool: Any) -> Callable[..., Any]:
+    # Older FastMCP wraps the tool function in Tool object
+    return getattr(tool, "fn", tool)
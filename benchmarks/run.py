@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any
+
+from .common import compare_with_baseline, start_server_in_thread
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks against offline NSE emulator",
+    )
+    parser.add_argument(
+        "--suites",
+        default="tools,agent",
+        help="Comma separated suites from tools, search, refresh, agent, imports",
+    )
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--symbol", default="TCS")
+    parser.add_argument(
+        "--table-sizes",
+        default="500,2000,8000",
+        help="Comma separated nse_metadata sizes for search suite",
+    )
+    parser.add_argument("--emulator-port", type=int, default=8010)
+    parser.add_argument("--mcp-port", type=int, default=8011)
+    parser.add_argument("--fake-llm-port", type=int, default=8012)
+    parser.add_argument(
+        "--real-llm",
+        action="store_true",
+        help="Run agent suite against configured LLM instead of fake LLM",
+    )
+    parser.add_argument("--output", default="benchmarks/results.json")
+    parser.add_argument("--baseline", help="Baseline JSON to compare results with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed fraction of slowdown against baseline",
+    )
+    parser.add_argument(
+        "--allow-db-writes",
+        action="store_true",
+        help="Required for search and refresh suites, they replace nse_metadata rows",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    suites = [suite.strip() for suite in args.suites.split(",") if suite.strip()]
+
+    if {"search", "refresh"} & set(suites) and not args.allow_db_writes:
+        print("search and refresh suites replace nse_metadata rows, use a scratch")
+        print("database and pass --allow-db-writes to run them")
+        return 2
+
+    # Point app to local emulator and MCP server before app modules read config
+    emulator_url = f"http://127.0.0.1:{args.emulator_port}"
+    os.environ["NSE_BASE_URL"] = emulator_url
+    os.environ["NSE_RECORD_MODE"] = "off"
+    os.environ["PORT"] = str(args.mcp_port)
+    # Every call reaches the emulator, shared cache and prefetch would measure cache hits
+    os.environ["SHARED_CACHE"] = "none"
+    os.environ["PREFETCH_ENABLED"] = "false"
+
+    from nse.emulator import app as emulator_app
+
+    start_server_in_thread(emulator_app, args.emulator_port)
+
+    results: dict[str, Any] = {
+        "meta": {
+            "started_at": datetime.now().isoformat(),
+            "iterations": args.iterations,
+            "suites": suites,
+        }
+    }
+
+    if "imports" in suites:
+        from . import bench_imports
+
+        results["imports"] = bench_imports.run()
+
+    if "tools" in suites:
+        from . import bench_tools
+
+        results["tools"] = bench_tools.run(args.iterations, args.symbol)
+
+    if "search" in suites:
+        from . import bench_search
+
+        sizes = [int(size) for size in args.table_sizes.split(",")]
+        results["search"] = bench_search.run(args.iterations, sizes)
+
+    if "refresh" in suites:
+        from . import bench_refresh
+
+        sizes = [int(size) for size in args.table_sizes.split(",")]
+        results["refresh"] = bench_refresh.run(emulator_url, max(sizes))
+
+    if "agent" in suites:
+        from agent.config import get_config, set_llm_config
+
+        from . import bench_agent
+
+        # Fake LLM isolates our orchestration cost from provider latency
+        if not args.real_llm:
+            from agent.fake_llm import app as fake_llm_app
+
+            start_server_in_thread(fake_llm_app, args.fake_llm_port)
+            set_llm_config(f"http://127.0.0.1:{args.fake_llm_port}/v1", "fake", "fake")
+
+        if not get_config().llm_api_url:
+            results["agent"] = {"skipped": "LLM_API_URL is not configured"}
+        else:
+            bench_agent.start_mcp_server(args.mcp_port)
+            results["agent"] = asyncio.run(bench_agent.run(args.iterations))
+
+    # Save Results
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(results, output, indent=2)
+    print(f"Results saved to {args.output}")
+
+    # Import time budgets are checked without baseline
+    if "imports" in suites:
+        from .bench_imports import get_budget_violations
+
+        violations = get_budget_violations(results["imports"])
+        for violation in violations:
+            print(f"OVER BUDGET {violation}")
+        if violations:
+            return 1
+
+    # Compare with baseline
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions against baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    # Usage: python -m benchmarks.run --suites tools --baseline benchmarks/baseline.json
+    sys.exit(main())
@@ -1,41 +1,142 @@
-from typing import Any
+import asyncio
+import sys
+from collections.abc import AsyncIterator
+from contextlib import nullcontext
 
+import gradio as gr
+from langchain.messages import AIMessage, HumanMessage
+from langchain_core.messages import BaseMessage
+
+from agent.callbacks import TelemetryCallbackHandler
+from agent.context import compact_conversation
 from agent.graph import get_agent
+from agent.messages import get_turn_context_message
+from server_config import get_server_config as sc
+from telemetry.profiler import profile_task, should_profile
+from telemetry.tracing import span
 
-from .model import GradioMessage, GradioMessageContent
+from .answer_cache import get_answer_cache, is_cacheable_question
+from .entity_resolution import (
+    get_entity_resolver,
+    prefetch_entities,
+    resolve_entities,
+)
+from .fast_path import answer_fast_path
+from .model import ChatDelta
+from .session import get_session_store
 from .utils import (
-    generate_agent_state_from_messages,
+    generate_agent_state,
     langchain_messages_to_gradio,
 )
 
 
 async def agent_chat_fn(
     message: str,
-    history: list[GradioMessage],
-) -> list[GradioMessage]:
-    agent = await get_agent()
-
-    # Add User question to history
-    history.append(
-        GradioMessage(
-            role="user",
-            content=[GradioMessageContent(type="message", text=message)],
-        )
+    request: gr.Request,
+) -> AsyncIterator[tuple[ChatDelta, str]]:
+    # Conversation is kept on server, so browser only sends the new message and
+    # receives messages of this turn, which it appends to the chat
+    session_store = get_session_store()
+    session_id = request.session_hash or "default"
+    history = await asyncio.to_thread(session_store.get_messages, session_id)
+    offset = len(langchain_messages_to_gradio(history))
+
+    # Show User question in chat and clear the input
+    user_message = HumanMessage(content=message)
+    yield (
+        {"offset": offset, "messages": langchain_messages_to_gradio([user_message])},
+        "",
+    )
+
+    # Turn runs in Gradio's queue task, profile keeps event loop samples of this frame
+    profiling = (
+        profile_task(f"chat_{session_id}", "chat turn", sys._getframe())
+        if should_profile(request.headers, request.query_params)
+        else nullcontext()
     )
 
-    # Generate State Object
-    state = generate_agent_state_from_messages(history)
+    # Whole turn is one trace and profile, neither is kept open across yields as
+    # Gradio may resume the generator in another context
+    async with profiling as profile_url:
+        with span("chat.turn", session_id=session_id) as turn:
+            if turn is not None and profile_url is not None:
+                turn.set(profile_url=profile_url)
+
+            # Answer simple questions with a direct tool call, others fall through to agent
+            fast_answer = (
+                await answer_fast_path(message) if sc().fast_path_enabled else None
+            )
+
+            # Companies in question are resolved locally, they key cached answers and
+            # are given to agent, so it can skip searching them
+            entities = (
+                await resolve_entities(message)
+                if fast_answer is None and sc().entity_resolution_enabled
+                else []
+            )
+
+            # Answer repeated questions from cache without calling LLM
+            use_answer_cache = sc().answer_cache_enabled and is_cacheable_question(
+                message, has_history=len(history) > 0
+            )
+            cached_answer = (
+                get_answer_cache().lookup(message, entities)
+                if use_answer_cache and fast_answer is None
+                else None
+            )
 
-    resp = await agent.ainvoke(state)
-    return langchain_messages_to_gradio(resp["messages"])
+            if fast_answer is not None:
+                new_messages: list[BaseMessage] = [AIMessage(content=fast_answer)]
+                if turn is not None:
+                    turn.set(fast_path=True)
+            elif cached_answer is not None and cached_answer.answer is not None:
+                new_messages = [AIMessage(content=cached_answer.answer)]
+                if turn is not None:
+                    turn.set(answer_cache_hit=True)
+            else:
+                agent = await get_agent()
 
+                if entities:
+                    prefetch_entities(entities)
 
-def send_message_to_ui(
-    message: str, history: list[GradioMessage]
-) -> tuple[list[GradioMessage], str]:
-    return history + [
-        GradioMessage(
-            role="user",
-            content=[GradioMessageContent(type="text", text=message)],
-        )
-    ], ""
+                # Generate State Object, turn context goes at the end to keep prompt prefix stable
+                input_messages = compact_conversation(history + [user_message]) + [
+                    get_turn_context_message(
+                        [(entity.name, entity.symbol) for entity in entities]
+                    )
+                ]
+
+                state = generate_agent_state(input_messages)
+
+                resp = await agent.ainvoke(
+                    state, config={"callbacks": [TelemetryCallbackHandler()]}
+                )
+
+                # Agent returns input messages followed by new messages of this turn
+                new_messages = resp["messages"][len(input_messages) :]
+
+                # Companies agent had to search for are resolved locally next time
+                if sc().entity_resolution_enabled:
+                    get_entity_resolver().learn_from_messages(new_messages)
+
+                # Cache final answer for repeated questions
+                if (
+                    use_answer_cache
+                    and new_messages
+                    and isinstance(new_messages[-1], AIMessage)
+                ):
+                    answer = new_messages[-1].text
+                    if answer:
+                        get_answer_cache().store(message, answer, entities)
+
+            await asyncio.to_thread(
+                session_store.append_messages, session_id, [user_message] + new_messages
+            )
+
+    yield (
+        {
+            "offset": offset,
+            "messages": langchain_messages_to_gradio([user_message] + new_messages),
+        },
+        "",
+    )
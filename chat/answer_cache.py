@@ -0,0 +1,209 @@
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import date
+from functools import cache
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from nse.market_state import CAPITAL_MARKET, get_market_state_poller, get_market_status
+from nse.models import MarketStatus
+from server_config import get_server_config as sc
+from telemetry.metrics import CACHE_REQUESTS
+
+if TYPE_CHECKING:
+    from .entity_resolution import ResolvedEntity
+
+# Words which do not identify what the question is about
+_STOP_WORDS: set[str] = set(
+    (
+        "a about all an and any are at be by can current currently day did do does "
+        + "for from get give has have how i in is list me much now of on please "
+        + "price show stock stocks tell the their to today was what whats which "
+        + "with you"
+    ).split()
+)
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    trigrams: Counter[str]
+    answer: str
+    market_state: MarketStatus | None
+    trade_date: date
+    expires_at: float
+    hits: int = 0
+
+
+@dataclass
+class AnswerCacheLookup:
+    answer: str | None
+    similarity: float = 0
+    entities: tuple[str, ...] = field(default_factory=tuple)
+
+
+def normalize_question(question: str) -> str:
+    question = question.lower().replace("'", "")
+    question = re.sub(r"[^a-z0-9&.\- ]+", " ", question)
+    return re.sub(r"\s+", " ", question).strip(" .")
+
+
+def extract_entities(question: str) -> tuple[str, ...]:
+    # Entities are the words left after removing stop words, like company names and numbers
+    return tuple(
+        sorted(
+            {word for word in question.split(" ") if word and word not in _STOP_WORDS}
+        )
+    )
+
+
+def canonicalize_question(question: str, entities: list["ResolvedEntity"]) -> str:
+    # Companies are replaced by their symbols, so any name of a company finds same answer
+    canonical = normalize_question(question)
+    for entity in entities:
+        canonical = re.sub(
+            rf"(?<!\S){re.escape(entity.mention)}(?!\S)",
+            entity.symbol.lower(),
+            canonical,
+        )
+    return canonical
+
+
+def _trigrams(question: str) -> Counter[str]:
+    padded = f"  {question} "
+    return Counter(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def _cosine_similarity(left: Counter[str], right: Counter[str]) -> float:
+    dot = sum(count * right[gram] for gram, count in left.items())
+    norm = math.sqrt(sum(c * c for c in left.values())) * math.sqrt(
+        sum(c * c for c in right.values())
+    )
+    return dot / norm if norm else 0
+
+
+class AnswerCache:
+    """
+    Cache of final answers of first questions in a conversation, keyed by the companies
+    resolved in question and its other words.
+    Answers are matched by character trigram similarity and expire based on market state,
+    a short TTL while market is open and a longer one while it is closed.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries: int = max_entries
+        self._entries: OrderedDict[tuple[str, ...], list[CachedAnswer]] = OrderedDict()
+        self._size: int = 0
+        self._lock: Lock = Lock()
+
+    def _get_ttl(self, market_state: MarketStatus | None) -> float:
+        if market_state == MarketStatus.OPEN or market_state is None:
+            return sc().answer_cache_ttl_open
+        return sc().answer_cache_ttl_closed
+
+    def _is_fresh(self, entry: CachedAnswer, market_state: MarketStatus | None):
+        return (
+            entry.expires_at > time.monotonic()
+            and entry.market_state == market_state
+            and entry.trade_date == date.today()
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def on_market_state_change(
+        self, market: str, old: MarketStatus | None, new: MarketStatus | None
+    ):
+        # Answers from earlier market state are never served again, free them now
+        if market == CAPITAL_MARKET:
+            self.clear()
+
+    def lookup(
+        self, question: str, entities: list["ResolvedEntity"]
+    ) -> AnswerCacheLookup:
+        result = self._lookup(canonicalize_question(question, entities))
+        CACHE_REQUESTS.inc(
+            cache="answer", result="miss" if result.answer is None else "hit"
+        )
+        return result
+
+    def _lookup(self, normalized: str) -> AnswerCacheLookup:
+        entities = extract_entities(normalized)
+
+        with self._lock:
+            candidates = list(self._entries.get(entities, []))
+
+        if not candidates:
+            return AnswerCacheLookup(answer=None, entities=entities)
+
+        # Find most similar question asked earlier
+        trigrams = _trigrams(normalized)
+        similarity, best = max(
+            (
+                (_cosine_similarity(trigrams, entry.trigrams), entry)
+                for entry in candidates
+            ),
+            key=lambda x: x[0],
+        )
+        if similarity < sc().answer_cache_similarity:
+            return AnswerCacheLookup(None, similarity, entities)
+
+        # Answer must be from the same market state and freshness window
+        if not self._is_fresh(best, get_market_status()):
+            return AnswerCacheLookup(None, similarity, entities)
+
+        best.hits += 1
+        return AnswerCacheLookup(best.answer, similarity, entities)
+
+    def store(self, question: str, answer: str, entities: list["ResolvedEntity"]):
+        normalized = canonicalize_question(question, entities)
+        entity_key = extract_entities(normalized)
+        market_state = get_market_status()
+
+        entry = CachedAnswer(
+            question=normalized,
+            trigrams=_trigrams(normalized),
+            answer=answer,
+            market_state=market_state,
+            trade_date=date.today(),
+            expires_at=time.monotonic() + self._get_ttl(market_state),
+        )
+
+        with self._lock:
+            # Replace stale entries of same question
+            entries = [
+                e
+                for e in self._entries.pop(entity_key, [])
+                if e.question != normalized and e.expires_at > time.monotonic()
+            ]
+            entries.append(entry)
+            self._entries[entity_key] = entries
+            self._size = sum(len(e) for e in self._entries.values())
+
+            # Evict least recently stored entities
+            while self._size > self.max_entries and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+def is_cacheable_question(question: str, has_history: bool) -> bool:
+    """
+    Cache is shared by all sessions, so only first question of a conversation is
+    answered from it. Follow ups depend on earlier turns of that conversation.
+    """
+    if has_history:
+        return False
+
+    return len(extract_entities(normalize_question(question))) > 0
+
+
+@cache
+def get_answer_cache() -> AnswerCache:
+    answer_cache = AnswerCache(sc().answer_cache_max_entries)
+    get_market_state_poller().subscribe(answer_cache.on_market_state_change)
+    return answer_cache
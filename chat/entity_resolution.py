@@ -0,0 +1,298 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cache
+
+from langchain.messages import AIMessage, ToolMessage
+from langchain_core.messages import BaseMessage
+
+from server_config import get_server_config as sc
+from telemetry.metrics import ENTITY_RESOLUTIONS
+from telemetry.tracing import span
+
+from .answer_cache import normalize_question
+
+# Longest company name looked up in question, in words
+MAX_NAME_WORDS = 6
+
+# Tool which agent calls to find symbol of a company, learned aliases come from its calls
+SEARCH_TOOL = "search_nse_stocks_by_name_or_symbol"
+
+# Turns in which a search key must resolve to same symbol before it is learned
+LEARN_AFTER_SEEN = 2
+
+# Names and short forms users commonly use which do not match NSE name or symbol
+COMPANY_ALIASES: dict[str, str] = {
+    "airtel": "BHARTIARTL",
+    "axis": "AXISBANK",
+    "dr reddy": "DRREDDY",
+    "dr reddys": "DRREDDY",
+    "eicher": "EICHERMOT",
+    "hcl": "HCLTECH",
+    "hcl tech": "HCLTECH",
+    "hdfc": "HDFCBANK",
+    "hero": "HEROMOTOCO",
+    "hero motocorp": "HEROMOTOCO",
+    "hul": "HINDUNILVR",
+    "icici": "ICICIBANK",
+    "indusind": "INDUSINDBK",
+    "kotak": "KOTAKBANK",
+    "kotak bank": "KOTAKBANK",
+    "l&t": "LT",
+    "larsen": "LT",
+    "lic": "LICI",
+    "mahindra": "M&M",
+    "nestle": "NESTLEIND",
+    "reliance": "RELIANCE",
+    "ril": "RELIANCE",
+    "sbi": "SBIN",
+    "sun pharma": "SUNPHARMA",
+    "ultratech": "ULTRACEMCO",
+}
+
+# Words which are never a company by themselves, even if they are a symbol or start a name
+_COMMON_WORDS: set[str] = set(
+    (
+        "a about all an and any are at be best between by can chart close closing "
+        + "companies company compare current currently data day days did do does "
+        + "for from gainers get give good has have high history how i idea in "
+        + "industry info is know last list low market me month months much new "
+        + "news now of on one open or performance please price sector share shares "
+        + "show stock stocks tell than thing the their to today top trend two "
+        + "volume vs was week weeks what whats which with year years you"
+    ).split()
+)
+
+# Words at the end of NSE company names which users leave out
+_NAME_SUFFIXES: set[str] = {"limited", "ltd", "ltd.", "corporation", "corp"}
+
+
+@dataclass
+class ResolvedEntity:
+    mention: str
+    symbol: str
+    name: str
+    # `alias`, `learned`, `symbol` or `name`
+    source: str
+
+
+def _strip_name_suffix(words: list[str]) -> list[str]:
+    while len(words) > 1 and words[-1] in _NAME_SUFFIXES:
+        words = words[:-1]
+    return words
+
+
+class EntityResolver:
+    """
+    Finds company names in a question with n-gram lookup against NSE symbols and names,
+    so agent gets the symbols without a search step. Names match in full or by a leading
+    part of at least two words which only one company starts with. Mentions which agent
+    resolved by searching to the same symbol in `LEARN_AFTER_SEEN` turns are learned as
+    aliases, used only when nothing else matches. Most recent `max_aliases` are kept.
+    """
+
+    def __init__(self, max_aliases: int, index_ttl_seconds: float):
+        self.max_aliases: int = max_aliases
+        self.index_ttl_seconds: float = index_ttl_seconds
+        self._names: dict[str, str] = {}
+        self._symbols: dict[str, str] = {}
+        # Name with and without suffix like `limited` to symbol
+        self._full_names: dict[str, str] = {}
+        # Leading part of name to symbol, None when several companies start with it.
+        # Single words like `tech` or `state` start too many questions to match by them.
+        self._name_keys: dict[str, str | None] = {}
+        self._learned: OrderedDict[str, str] = OrderedDict()
+        # Search keys not learned yet, with symbol they resolved to and times seen
+        self._pending: OrderedDict[str, tuple[str, int]] = OrderedDict()
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def _load_index(self):
+        from dbman.helper import get_all_company_names
+
+        try:
+            company_names = get_all_company_names()
+        except Exception as e:
+            print(f"Failed to load company names for entity resolution: {e}")
+            company_names = None
+
+        with self._lock:
+            self._loaded_at = time.monotonic()
+            if company_names is None:
+                return
+
+            self._names = {symbol: name for symbol, name in company_names}
+            self._symbols = {symbol.lower(): symbol for symbol, _ in company_names}
+            self._full_names = {}
+            self._name_keys = {}
+            for symbol, name in company_names:
+                words = normalize_question(name).split(" ")
+                stripped = _strip_name_suffix(words)
+                self._full_names[" ".join(words)] = symbol
+                self._full_names[" ".join(stripped)] = symbol
+                for length in range(1, len(stripped)):
+                    key = " ".join(stripped[:length])
+                    if self._name_keys.get(key, symbol) != symbol:
+                        self._name_keys[key] = None
+                    else:
+                        self._name_keys[key] = symbol
+
+    def _ensure_index(self):
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.index_ttl_seconds:
+            self._load_index()
+
+    def _lookup(self, mention: str) -> ResolvedEntity | None:
+        words = mention.split(" ")
+        if all(word in _COMMON_WORDS or word.isdigit() for word in words):
+            return None
+
+        symbol, source = COMPANY_ALIASES.get(mention), "alias"
+        if symbol is None:
+            symbol, source = self._symbols.get(mention), "symbol"
+        if symbol is None:
+            symbol, source = self._full_names.get(mention), "name"
+        if symbol is None and len(words) > 1:
+            symbol = self._name_keys.get(mention)
+        if symbol is None:
+            symbol, source = self._learned.get(mention), "learned"
+        if symbol is None:
+            return None
+
+        # Aliases of delisted companies are ignored once names are loaded
+        if self._names and symbol not in self._names:
+            return None
+
+        return ResolvedEntity(
+            mention=mention,
+            symbol=symbol,
+            name=self._names.get(symbol, symbol),
+            source=source,
+        )
+
+    def resolve_name(self, company: str) -> ResolvedEntity | None:
+        """
+        Resolves text which is only a company name, like `tata motors`.
+        """
+        self._ensure_index()
+        with self._lock:
+            return self._lookup(normalize_question(company))
+
+    def resolve(self, question: str) -> list[ResolvedEntity]:
+        """
+        Companies mentioned in question, longest matching phrase wins.
+        """
+        self._ensure_index()
+        words = normalize_question(question).split(" ")
+        entities: list[ResolvedEntity] = []
+
+        with self._lock:
+            start = 0
+            while start < len(words):
+                for length in range(min(MAX_NAME_WORDS, len(words) - start), 0, -1):
+                    entity = self._lookup(" ".join(words[start : start + length]))
+                    if entity is not None:
+                        break
+                else:
+                    start += 1
+                    continue
+
+                if entity.symbol not in {found.symbol for found in entities}:
+                    entities.append(entity)
+                start += length
+
+        for entity in entities:
+            ENTITY_RESOLUTIONS.inc(source=entity.source)
+        return entities
+
+    def learn(self, mention: str, symbol: str):
+        """
+        Learns mention as alias of symbol once it was seen `LEARN_AFTER_SEEN` times.
+        Mentions which several company names start with are never learned.
+        """
+        mention = normalize_question(mention)
+        if not mention:
+            return
+
+        with self._lock:
+            # Ambiguous or already matched without learning
+            if mention in self._name_keys and self._name_keys[mention] is None:
+                return
+            if (
+                mention in COMPANY_ALIASES
+                or mention in self._symbols
+                or mention in self._full_names
+            ):
+                return
+
+            seen_symbol, seen = self._pending.pop(mention, (symbol, 0))
+            seen = seen + 1 if seen_symbol == symbol else 1
+            if seen < LEARN_AFTER_SEEN:
+                self._pending[mention] = (symbol, seen)
+                while len(self._pending) > self.max_aliases:
+                    self._pending.popitem(last=False)
+                return
+
+            self._learned[mention] = symbol
+            self._learned.move_to_end(mention)
+            while len(self._learned) > self.max_aliases:
+                self._learned.popitem(last=False)
+
+    def learn_from_messages(self, messages: list[BaseMessage]):
+        """
+        Learns search keys of a turn as aliases of the symbol agent went on to use,
+        when exactly one symbol from search results was used.
+        """
+        search_keys: dict[str, str] = {}
+        search_outputs: dict[str, str] = {}
+        used_symbols: set[str] = set()
+
+        for message in messages:
+            if isinstance(message, AIMessage):
+                for tool_call in message.tool_calls:
+                    args = tool_call["args"]
+                    if tool_call["name"] == SEARCH_TOOL:
+                        search_keys[tool_call["id"] or ""] = str(
+                            args.get("search_key", "")
+                        )
+                    elif "symbol" in args:
+                        used_symbols.add(str(args["symbol"]).upper())
+            elif (
+                isinstance(message, ToolMessage) and message.tool_call_id in search_keys
+            ):
+                search_outputs[search_keys[message.tool_call_id]] = message.text
+
+        for search_key, output in search_outputs.items():
+            # Search output is a table with symbol in first column
+            listed = {line.split(",", 1)[0] for line in output.splitlines()[1:]}
+            matched = used_symbols & listed
+            if len(matched) == 1:
+                self.learn(search_key, matched.pop())
+
+
+@cache
+def get_entity_resolver() -> EntityResolver:
+    return EntityResolver(
+        sc().entity_alias_cache_max_entries, sc().entity_index_ttl_seconds
+    )
+
+
+async def resolve_entities(question: str) -> list[ResolvedEntity]:
+    with span("chat.entity_resolution") as resolution_span:
+        entities = await asyncio.to_thread(get_entity_resolver().resolve, question)
+        if resolution_span is not None:
+            resolution_span.set(symbols=",".join(entity.symbol for entity in entities))
+
+    return entities
+
+
+def prefetch_entities(entities: list[ResolvedEntity]):
+    # Agent no longer searches these companies first, so quotes are fetched ahead
+    from nse.prefetch import get_prefetcher
+
+    prefetcher = get_prefetcher()
+    if prefetcher is not None:
+        for entity in entities:
+            prefetcher.prefetch_symbol(entity.symbol)
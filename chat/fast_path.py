@@ -0,0 +1,317 @@
+import asyncio
+import csv
+import inspect
+import re
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.tools import BaseTool
+
+from nse.stale_responses import format_stale_note, track_stale_responses
+from server_config import get_server_config as sc
+from telemetry.metrics import FAST_PATH_REQUESTS
+from telemetry.tracing import span
+
+from .answer_cache import normalize_question
+from .entity_resolution import get_entity_resolver
+
+# Optional words around the question, like "what is the"
+_ASK = r"(?:what is |whats |tell me |show me |show |get |give me |list )?(?:the |a )?"
+# Past tense asks only for closing price, current price of a past day needs the agent
+_ASK_PAST = (
+    r"(?:what was |what is |whats |tell me |show me |show |get |give me )?(?:the |a )?"
+)
+_STOCKS = r"(?:which |list of )?(?:top )?(?:(?P<count>\d+) )?(?:top )?(?:stocks|companies|shares)"
+_NOW = r"(?: now| today| right now| currently)?"
+
+# Grammar of simple questions answered by a single tool, matched against whole question
+INTENT_PATTERNS: dict[str, list[re.Pattern[str]]] = {
+    "previous_close": [
+        re.compile(
+            _ASK_PAST
+            + r"(?:last|previous|prev|yesterdays) (?:day )?(?:closing|close) price of "
+            + r"(?P<company>.+?)(?: share| stock| shares)?"
+        ),
+        re.compile(
+            _ASK_PAST
+            + r"(?P<company>.+?)(?: share| stock)? (?:last|previous) (?:closing|close)(?: price)?"
+        ),
+    ],
+    "price": [
+        re.compile(
+            _ASK
+            + r"(?:current |latest |live |todays )?(?:share |stock )?price of "
+            + r"(?P<company>.+?)(?: share| stock| shares)?"
+            + _NOW
+        ),
+        re.compile(
+            _ASK + r"(?:current )?(?P<company>.+?)(?: share| stock)? price" + _NOW
+        ),
+        re.compile(r"how much is (?P<company>.+?)(?: share| stock)? trading at" + _NOW),
+    ],
+    "52week": [
+        re.compile(
+            _ASK
+            + _STOCKS
+            + r"(?: which are| that are| which| that| are)?(?: currently| now| running| trading)*"
+            + r" at (?:their )?52 week (?P<side>high|low)s?"
+            + _NOW
+        ),
+        re.compile(_ASK + r"52 week (?P<side>high|low)s?(?: stocks| list)?" + _NOW),
+    ],
+    "volume_gainers": [
+        re.compile(
+            _ASK
+            + _STOCKS
+            + r" (?:which|that) (?:have )?gained volume(?: in)?(?: this| the last| last)? week"
+        ),
+        re.compile(
+            _ASK + r"(?:top )?(?:weekly )?volume gainers?(?: stocks)?(?: this week)?"
+        ),
+    ],
+    "market_status": [
+        re.compile(
+            r"(?:is )?(?:the )?(?:equity |stock |capital |share )?market (?:open|closed)"
+            + _NOW
+        ),
+        re.compile(
+            _ASK + r"(?:current )?(?:equity |stock |capital )?market status" + _NOW
+        ),
+    ],
+}
+
+# Questions about several companies are left to agent
+_MULTI_COMPANY = re.compile(r"\b(?:and|vs|versus|or|compared?)\b|,")
+
+# Companies referred from earlier turns, like "price of it", are left to agent
+_REFERENCES: set[str] = {
+    "it",
+    "its",
+    "this",
+    "that",
+    "them",
+    "they",
+    "these",
+    "those",
+    "same",
+    "the same",
+    "this one",
+    "that one",
+    "the company",
+    "this company",
+    "that company",
+    "the stock",
+    "this stock",
+    "that stock",
+}
+
+
+@dataclass
+class Intent:
+    name: str
+    company: str | None = None
+    count: int = 10
+    side: str | None = None
+
+
+def match_intent(question: str) -> Intent | None:
+    normalized = normalize_question(question).replace("-", " ")
+    for name, patterns in INTENT_PATTERNS.items():
+        for pattern in patterns:
+            match = pattern.fullmatch(normalized)
+            if match is None:
+                continue
+
+            groups = match.groupdict()
+            company = groups.get("company")
+            if company is not None and (
+                _MULTI_COMPANY.search(company) or company in _REFERENCES
+            ):
+                return None
+
+            return Intent(
+                name=name,
+                company=company,
+                count=min(int(groups.get("count") or 10), 50),
+                side=groups.get("side"),
+            )
+
+    return None
+
+
+def _serves_mcp() -> bool:
+    # With `all` role MCP tools run in this process, so they are called without MCP
+    return sc().server_role in ("all", "mcp")
+
+
+_tools: dict[str, BaseTool] = {}
+
+
+async def _call_local_tool(name: str, args: dict[str, Any]) -> tuple[str, str | None]:
+    from mcp_tools import mcp
+
+    tool_fn = (await mcp.get_tool(name)).fn
+    with track_stale_responses() as served:
+        if inspect.iscoroutinefunction(tool_fn):
+            output = await tool_fn(**args)
+        else:
+            output = await asyncio.to_thread(tool_fn, **args)
+    return str(output), format_stale_note(served) if served else None
+
+
+async def _call_mcp_tool(name: str, args: dict[str, Any]) -> tuple[str, str | None]:
+    if not _tools:
+        from agent.graph import get_tools_by_name
+
+        _tools.update(await get_tools_by_name())
+
+    result = await _tools[name].ainvoke(args)
+
+    # MCP tools return content blocks, first is the output and next one a note
+    if isinstance(result, list):
+        texts = [
+            block.get("text", "") if isinstance(block, dict) else str(block)
+            for block in result
+        ]
+        return texts[0] if texts else "", "\n".join(texts[1:]) or None
+    return str(result), None
+
+
+async def _call_tool(
+    name: str, args: dict[str, Any]
+) -> tuple[list[dict[str, str]], str | None]:
+    """
+    Calls tool, returns rows of its output and note about stale data if there was one.
+    """
+    if _serves_mcp():
+        output, note = await _call_local_tool(name, args)
+    else:
+        output, note = await _call_mcp_tool(name, args)
+
+    # Market status is plain text, other tools return a table
+    if name == "check_equity_market_status":
+        status = output.strip()
+        return [{"status": status}] if not status.startswith("UNKNOWN") else [], note
+    return _parse_rows(output), note
+
+
+def _parse_rows(output: str) -> list[dict[str, str]]:
+    lines = [line for line in output.splitlines() if not line.startswith("... ")]
+    if len(lines) < 2:
+        return []
+    return list(csv.DictReader(lines))
+
+
+def _money(value: str) -> str:
+    try:
+        return f"₹{float(value):,.2f}"
+    except ValueError:
+        return value
+
+
+async def _answer_price(intent: Intent) -> str | None:
+    # Only names resolved from index, a database search is slower than the agent
+    entity = await asyncio.to_thread(
+        get_entity_resolver().resolve_name, intent.company or ""
+    )
+    if entity is None:
+        return None
+    symbol, name = entity.symbol, entity.name
+
+    (rows, note), (status_rows, _) = await asyncio.gather(
+        _call_tool("get_current_stock_price", {"symbol": symbol}),
+        _call_tool("check_equity_market_status", {}),
+    )
+    if not rows or rows[0].get("CurrentPrice") in (None, "UNKNOWN", "NA", "None"):
+        return None
+
+    current = rows[0]["CurrentPrice"]
+    previous = rows[0]["PreviousClosePrice"]
+    is_open = bool(status_rows) and status_rows[0]["status"] == "Open"
+
+    if intent.name == "previous_close":
+        # Once market is closed, last close is today's closing price
+        close = previous if is_open else current
+        answer = f"Last closing price of **{name} ({symbol})** was **{_money(close)}**."
+    else:
+        answer = (
+            f"**{name} ({symbol})** is trading at **{_money(current)}**"
+            if is_open
+            else f"**{name} ({symbol})** closed at **{_money(current)}**"
+        )
+        try:
+            change = float(current) - float(previous)
+            percent = change / float(previous) * 100
+            answer += (
+                f", {'up' if change >= 0 else 'down'} {_money(str(abs(change)))} "
+                + f"({abs(percent):.2f}%) from previous close of {_money(previous)}."
+            )
+        except (ValueError, ZeroDivisionError):
+            answer += "."
+
+    return answer + (f"\n\n_{note}_" if note else "")
+
+
+async def _answer_stock_list(intent: Intent) -> str | None:
+    if intent.name == "52week":
+        tool = f"get_stock_running_at_52week_{intent.side}"
+        title = f"Stocks at their 52 week {intent.side}"
+    else:
+        tool = "weekly_volume_gainer_stocks"
+        title = "Weekly volume gainers"
+
+    rows, note = await _call_tool(tool, {})
+    rows = rows[: intent.count]
+    if not rows:
+        return None
+
+    lines = [f"**{title}**", "", "| Symbol | Company |", "| --- | --- |"]
+    lines.extend(f"| {row['symbol']} | {row['name']} |" for row in rows)
+    return "\n".join(lines) + (f"\n\n_{note}_" if note else "")
+
+
+async def _answer_market_status(intent: Intent) -> str | None:
+    rows, note = await _call_tool("check_equity_market_status", {})
+    if not rows:
+        return None
+    status = rows[0]["status"]
+    if status == "Close":
+        status = "Closed"
+    return f"Equity market is currently **{status}**." + (
+        f"\n\n_{note}_" if note else ""
+    )
+
+
+INTENT_HANDLERS: dict[str, Callable[[Intent], Awaitable[str | None]]] = {
+    "price": _answer_price,
+    "previous_close": _answer_price,
+    "52week": _answer_stock_list,
+    "volume_gainers": _answer_stock_list,
+    "market_status": _answer_market_status,
+}
+
+
+async def answer_fast_path(question: str) -> str | None:
+    """
+    Answers simple questions with one tool call and a template, without LLM.
+    Returns None if question is not simple or could not be answered, so agent answers it.
+    """
+    intent = match_intent(question)
+    if intent is None:
+        return None
+
+    with span("chat.fast_path", intent=intent.name) as fast_path_span:
+        try:
+            answer = await INTENT_HANDLERS[intent.name](intent)
+        except Exception as e:
+            print(f"Fast path failed for {intent.name}: {e}")
+            answer = None
+
+        if fast_path_span is not None:
+            fast_path_span.set(answered=answer is not None)
+
+    FAST_PATH_REQUESTS.inc(
+        intent=intent.name, result="answered" if answer is not None else "fallthrough"
+    )
+    return answer
@@ -9,3 +9,9 @@ class GradioMessageContent(TypedDict):
 class GradioMessage(TypedDict):
     role: str
     content: list[GradioMessageContent]
+
+
+class ChatDelta(TypedDict):
+    # Messages of this turn replace chat messages from `offset` in the browser
+    offset: int
+    messages: list[GradioMessage]
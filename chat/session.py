@@ -0,0 +1,103 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import cache
+from threading import Lock
+
+from langchain_core.messages import (
+    BaseMessage,
+    messages_from_dict,
+    messages_to_dict,
+)
+
+from dbman.helper import append_chat_session_messages, get_chat_session
+from server_config import get_server_config as sc
+from telemetry.metrics import CACHE_REQUESTS
+
+
+class SessionStore(ABC):
+    """
+    Server side store of conversation per session.
+    Keeps complete LangChain messages including tool calls and tool outputs.
+    Methods block, call them from event loop with `asyncio.to_thread`.
+    """
+
+    @abstractmethod
+    def get_messages(self, session_id: str) -> list[BaseMessage]: ...
+
+    @abstractmethod
+    def append_messages(self, session_id: str, messages: list[BaseMessage]): ...
+
+
+class InMemorySessionStore(SessionStore):
+    def __init__(self, max_sessions: int):
+        self.max_sessions: int = max_sessions
+        self._sessions: OrderedDict[str, list[BaseMessage]] = OrderedDict()
+        self._lock: Lock = Lock()
+
+    def _get_session(self, session_id: str) -> list[BaseMessage] | None:
+        with self._lock:
+            messages = self._sessions.get(session_id)
+            if messages is not None:
+                self._sessions.move_to_end(session_id)
+            return messages
+
+    def _set_session(self, session_id: str, messages: list[BaseMessage]):
+        with self._lock:
+            self._sessions[session_id] = messages
+            self._sessions.move_to_end(session_id)
+
+            # Evict least recently used sessions
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def get_messages(self, session_id: str) -> list[BaseMessage]:
+        return list(self._get_session(session_id) or [])
+
+    def _append_session(self, session_id: str, messages: list[BaseMessage]) -> bool:
+        # Appended under one lock, so overlapping turns of a session keep all messages
+        with self._lock:
+            existing = self._sessions.get(session_id)
+            if existing is None:
+                return False
+            self._sessions[session_id] = existing + messages
+            self._sessions.move_to_end(session_id)
+            return True
+
+    def append_messages(self, session_id: str, messages: list[BaseMessage]):
+        if not self._append_session(session_id, messages):
+            self._set_session(session_id, messages)
+
+
+class PostgresSessionStore(InMemorySessionStore):
+    """
+    Session store persisted in Postgres with in-memory LRU in front of it.
+    Sessions survive restarts of the server.
+    """
+
+    def get_messages(self, session_id: str) -> list[BaseMessage]:
+        messages = self._get_session(session_id)
+        CACHE_REQUESTS.inc(
+            cache="session", result="miss" if messages is None else "hit"
+        )
+        if messages is not None:
+            return list(messages)
+
+        # Load from Database if not in memory
+        chat_session = get_chat_session(session_id)
+        messages = messages_from_dict(chat_session.messages) if chat_session else []
+        self._set_session(session_id, messages)
+
+        return list(messages)
+
+    def append_messages(self, session_id: str, messages: list[BaseMessage]):
+        # Database appends in place, session not in memory is loaded from it when read
+        append_chat_session_messages(session_id, messages_to_dict(messages))
+        self._append_session(session_id, messages)
+
+
+@cache
+def get_session_store() -> SessionStore:
+    if sc().session_store == "postgres":
+        return PostgresSessionStore(sc().session_store_max_sessions)
+
+    return InMemorySessionStore(sc().session_store_max_sessions)
@@ -1,6 +1,6 @@
 from typing import Any
 
-from langchain.messages import AIMessage, HumanMessage, SystemMessage
+from langchain.messages import AIMessage, HumanMessage
 from langchain_core.messages import BaseMessage
 
 from agent.graph import GraphState
@@ -47,34 +47,11 @@ def langchain_messages_to_gradio(
     return gradio_messages
 
 
-def gradio_messages_to_langchain(
-    messages: list[GradioMessage],
-) -> list[BaseMessage]:
-    langchain_messages: list[BaseMessage] = []
-    for message in messages:
-        if message["role"] == "assistant":
-            langchain_messages.append(
-                AIMessage(content=str(message["content"][0]["text"]))
-            )
-        elif message["role"] == "user":
-            langchain_messages.append(
-                HumanMessage(content=str(message["content"][0]["text"]))
-            )
-        elif message["role"] == "system":
-            langchain_messages.append(
-                SystemMessage(content=str(message["content"][0]["text"]))
-            )
-    return langchain_messages
-
-
-def generate_agent_state_from_messages(
-    messages: list[GradioMessage],
+def generate_agent_state(
+    messages: list[BaseMessage],
 ) -> GraphState | dict[str, Any]:
-    # Convert messages to Langchain format
-    lc_messages = gradio_messages_to_langchain(messages)
-
     # Use message in state
     if sc().select_agent_type == "flow":
-        return GraphState(messages=lc_messages)
+        return GraphState(messages=messages)
     else:
-        return {"messages": lc_messages}
+        return {"messages": messages}
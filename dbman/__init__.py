@@ -3,4 +3,7 @@ from sqlmodel import SQLModel
 DbMetadata = SQLModel.metadata
 
 # Import models here to make them available in metadata
+from .chat_session import ChatSession  # noqa
 from .nse_metadata import NSEMetadata  # noqa
+from .refresh_job import RefreshJob  # noqa
+from .shared_cache_entry import SharedCacheEntry  # noqa
@@ -1,19 +1,44 @@
+import asyncio
+import time
 from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from dbman.nse_metadata import NSEMetadata
-from nse.helper import get_all_market_pre_open, get_stock_details
+from nse.helper import (
+    aget_stock_details,
+    get_all_market_pre_open,
+    get_stock_history_for_specific_range,
+)
+from nse.market_calendar import CLOSE_TIME, IST
+from nse.request_scheduler import RequestPriority, request_priority
+from server_config import get_server_config as sc
+from telemetry.metrics import (
+    REFRESH_LAST_SUCCESS,
+    REFRESH_RUNNING,
+    REFRESH_SYMBOLS_DONE,
+    REFRESH_SYMBOLS_TOTAL,
+)
 
-from .helper import delete_outdated_symbols, save_nse_metadata
+from .helper import (
+    delete_outdated_symbols,
+    get_top_companies_by_market_cap,
+    save_nse_metadata,
+)
 
+# Symbols fetched from NSE at a time during refresh
+REFRESH_CONCURRENCY = 5
 
-def task_executor(symbol: str):
-    stock_detail = get_stock_details(symbol, with_trade=True)
+
+async def refresh_symbol(symbol: str):
+    # Refresh reads every symbol once, so it skips shared cache
+    stock_detail = await aget_stock_details(symbol, with_trade=True, cache_ttl=0)
     if stock_detail is None:
+        REFRESH_SYMBOLS_DONE.inc(result="skipped")
         return
 
     # Save the metadat to Database
-    save_nse_metadata(
+    await asyncio.to_thread(
+        save_nse_metadata,
         NSEMetadata(
             symbol=symbol,
             name=stock_detail.info.companyName,
@@ -24,11 +49,39 @@ def task_executor(symbol: str):
             total_traded_value_in_crore=stock_detail.tradeInfo.totalTradedValue,
             total_market_cap_in_crore=stock_detail.tradeInfo.totalMarketCap,
             refresh_dtm=datetime.now(),
-        )
+        ),
     )
+    REFRESH_SYMBOLS_DONE.inc(result="saved")
+
+
+async def refresh_symbols(symbols: list[str]):
+    """
+    Refreshes symbols in one event loop, `REFRESH_CONCURRENCY` of them at a time.
+    """
+    semaphore = asyncio.Semaphore(REFRESH_CONCURRENCY)
+
+    async def refresh(symbol: str):
+        async with semaphore:
+            try:
+                await refresh_symbol(symbol)
+            except Exception as e:
+                print(f"Failed to refresh {symbol}: {e}")
+                REFRESH_SYMBOLS_DONE.inc(result="failed")
+
+    # Refresh yields to user requests
+    with request_priority(RequestPriority.BULK):
+        await asyncio.gather(*(refresh(symbol) for symbol in symbols))
 
 
 def refresh_market_metadata():
+    REFRESH_RUNNING.set(1)
+    try:
+        _refresh_market_metadata()
+    finally:
+        REFRESH_RUNNING.set(0)
+
+
+def _refresh_market_metadata():
     market_data = get_all_market_pre_open()
 
     # Skip if no market data found
@@ -40,9 +93,45 @@ def refresh_market_metadata():
         market.symbol for market in market_data if market.symbol is not None
     ]
 
-    # Run in multi thread to get and save metadata
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        executor.map(task_executor, market_symbols)
+    REFRESH_SYMBOLS_TOTAL.set(len(market_symbols))
+
+    # Get and save metadata concurrently
+    asyncio.run(refresh_symbols(market_symbols))
 
     # Delete Outdated Symbols
     delete_outdated_symbols(market_symbols)
+
+    REFRESH_LAST_SUCCESS.set(time.time())
+
+
+def warm_market_open_cache():
+    """
+    Fetches history of top companies into shared cache before market opens.
+    History does not change until today's close, so it is kept till then and
+    first questions after open on every host are served from the cache.
+    Only `postgres` cache is shared across hosts, other caches are skipped.
+    """
+    if sc().shared_cache != "postgres":
+        print(
+            f"Skipping market open cache warm-up, `{sc().shared_cache}` cache is not shared across hosts"
+        )
+        return
+
+    now = datetime.now(IST)
+    ttl = (datetime.combine(now.date(), CLOSE_TIME, IST) - now).total_seconds()
+    if ttl <= 0:
+        return
+
+    # Same window as prefetch, which history tool is usually asked for
+    to_date = now.strftime("%d-%m-%Y")
+    from_date = (now - timedelta(days=sc().prefetch_history_days)).strftime("%d-%m-%Y")
+
+    def warm_history(symbol: str):
+        get_stock_history_for_specific_range(symbol, from_date, to_date, ttl)
+
+    symbols = [
+        company.symbol
+        for company in get_top_companies_by_market_cap(sc().warmup_top_symbols)
+    ]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(warm_history, symbols))
@@ -0,0 +1,15 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+
+class ChatSession(SQLModel, table=True):
+    __tablename__ = "chat_session"
+    session_id: str = Field(primary_key=True)
+    messages: list[dict[str, Any]] = Field(
+        default_factory=list, sa_column=Column(JSONB, nullable=False)
+    )
+    updated_dtm: datetime | None = Field(default_factory=datetime.now, index=True)
@@ -1,17 +1,34 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import cache
 from typing import Any
 
-from sqlmodel import Session, create_engine, func, select
+from sqlalchemy import Engine, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, and_, create_engine, delete, func, or_, select
 
 from server_config import get_server_config as sc
+from telemetry.metrics import DB_QUERY_DURATION, timed
+from telemetry.tracing import traced
 
+from .chat_session import ChatSession
 from .nse_metadata import NSEMetadata
+from .refresh_job import PENDING_CONDITION, PENDING_STATUSES, RefreshJob
+from .shared_cache_entry import SharedCacheEntry
 
-engine = create_engine(sc().pg_url, connect_args={"connect_timeout": 30})
+
+# Engine is created on first query, so importing models and helpers stays cheap
+@cache
+def get_engine() -> Engine:
+    return create_engine(sc().pg_url, connect_args={"connect_timeout": 30})
 
 
 # Add or update NSE Metadata
+@traced("db.save_nse_metadata")
+@timed(DB_QUERY_DURATION, helper="save_nse_metadata")
 def save_nse_metadata(metadata: NSEMetadata):
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         # Check if metadata already exist
         q_existing_metadata = select(NSEMetadata).where(
             NSEMetadata.symbol == metadata.symbol
@@ -28,9 +45,38 @@ def save_nse_metadata(metadata: NSEMetadata):
         session.commit()
 
 
+# Get Chat Session by Session Id
+@traced("db.get_chat_session")
+@timed(DB_QUERY_DURATION, helper="get_chat_session")
+def get_chat_session(session_id: str) -> ChatSession | None:
+    with Session(get_engine()) as session:
+        return session.get(ChatSession, session_id)
+
+
+# Append messages to Chat Session, in one statement so concurrent turns keep all messages
+@traced("db.append_chat_session_messages")
+@timed(DB_QUERY_DURATION, helper="append_chat_session_messages")
+def append_chat_session_messages(session_id: str, messages: list[dict[str, Any]]):
+    with Session(get_engine()) as session:
+        q_append = insert(ChatSession).values(
+            session_id=session_id, messages=messages, updated_dtm=datetime.now()
+        )
+        q_append = q_append.on_conflict_do_update(
+            index_elements=[ChatSession.session_id],
+            set_={
+                "messages": ChatSession.messages.concat(q_append.excluded.messages),
+                "updated_dtm": q_append.excluded.updated_dtm,
+            },
+        )
+        session.execute(q_append)
+        session.commit()
+
+
 # Delete Outdated Symbols
+@traced("db.delete_outdated_symbols")
+@timed(DB_QUERY_DURATION, helper="delete_outdated_symbols")
 def delete_outdated_symbols(symbols: list[str]):
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         q_outdated_symbols = select(NSEMetadata).where(
             NSEMetadata.symbol.not_in(symbols)
         )
@@ -44,11 +90,13 @@ def delete_outdated_symbols(symbols: list[str]):
         session.commit()
 
 
+@traced("db.search_nse_data_in_db")
+@timed(DB_QUERY_DURATION, helper="search_nse_data_in_db")
 def search_nse_data_in_db(
     search_key: str,
     search_fields: list[Any],
 ) -> list[NSEMetadata]:
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         # Output
         output: list[NSEMetadata] = []
 
@@ -117,6 +165,29 @@ def search_nse_company_by_name_or_symbol_indb(search_key: str) -> list[NSEMetada
     )
 
 
+def get_confident_match(
+    search_key: str, companies: list[NSEMetadata]
+) -> NSEMetadata | None:
+    """
+    Company which search key surely refers to, exact symbol or the only prefix match.
+    """
+    key = search_key.strip().lower()
+    if not key or not companies:
+        return None
+
+    for company in companies:
+        if company.symbol.lower() == key:
+            return company
+
+    prefix_matches = [
+        company
+        for company in companies
+        if company.symbol.lower().startswith(key)
+        or company.name.lower().startswith(key)
+    ]
+    return prefix_matches[0] if len(prefix_matches) == 1 else None
+
+
 def search_sector_or_industry_indb(search_key: str) -> list[str]:
     sector_or_industries = search_nse_data_in_db(
         search_key=search_key,
@@ -133,11 +204,13 @@ def search_sector_or_industry_indb(search_key: str) -> list[str]:
     )
 
 
+@traced("db.get_companies_in_specified_industry")
+@timed(DB_QUERY_DURATION, helper="get_companies_in_specified_industry")
 def get_companies_in_specified_industry(
     industry_keys: list[str],
     top_n: int = 10,
-) -> list[dict[str, str]]:
-    with Session(engine) as session:
+) -> list[NSEMetadata]:
+    with Session(get_engine()) as session:
         q_company_in_sector_industry = (
             select(NSEMetadata)
             .where(NSEMetadata.industry.in_(industry_keys))
@@ -146,9 +219,191 @@ def get_companies_in_specified_industry(
         )
 
         # Get data
-        company_in_industry = [
-            {row.symbol: row.name}
-            for row in session.exec(q_company_in_sector_industry).all()
-        ]
+        company_in_industry = session.exec(q_company_in_sector_industry).all()
+
+        return list(company_in_industry)
+
+
+# Queue Refresh Job, returns pending job of same type if there is one
+@traced("db.enqueue_refresh_job")
+@timed(DB_QUERY_DURATION, helper="enqueue_refresh_job")
+def enqueue_refresh_job(job_type: str) -> RefreshJob:
+    with Session(get_engine()) as session:
+        while True:
+            # Unique index on pending jobs makes concurrent enqueues insert only one
+            q_insert = (
+                insert(RefreshJob)
+                .values(job_type=job_type, status="queued", created_dtm=datetime.now())
+                .on_conflict_do_nothing(
+                    index_elements=[RefreshJob.job_type],
+                    index_where=PENDING_CONDITION,
+                )
+                .returning(RefreshJob.id)
+            )
+            job_id = session.execute(q_insert).scalar_one_or_none()
+            session.commit()
+
+            q_job = select(RefreshJob).where(
+                RefreshJob.id == job_id
+                if job_id is not None
+                else and_(
+                    RefreshJob.job_type == job_type,
+                    RefreshJob.status.in_(PENDING_STATUSES),
+                )
+            )
+            job = session.exec(q_job).first()
+
+            # Pending job may have finished in between, queue again
+            if job is not None:
+                return job
+
+
+# Claim oldest queued job, jobs running longer than timeout are considered abandoned
+@traced("db.claim_refresh_job")
+@timed(DB_QUERY_DURATION, helper="claim_refresh_job")
+def claim_refresh_job(worker: str, timeout_seconds: int) -> RefreshJob | None:
+    with Session(get_engine()) as session:
+        q_next_job = (
+            select(RefreshJob)
+            .where(
+                or_(
+                    RefreshJob.status == "queued",
+                    and_(
+                        RefreshJob.status == "running",
+                        RefreshJob.started_dtm
+                        < datetime.now() - timedelta(seconds=timeout_seconds),
+                    ),
+                )
+            )
+            .order_by(RefreshJob.id)
+            .limit(1)
+            # Other workers skip the row instead of waiting for it
+            .with_for_update(skip_locked=True)
+        )
+        job = session.exec(q_next_job).first()
+        if job is None:
+            return None
+
+        job.status = "running"
+        job.worker = worker
+        job.started_dtm = datetime.now()
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+
+        return job
+
 
-        return company_in_industry
+# Mark job as done or failed
+@traced("db.finish_refresh_job")
+@timed(DB_QUERY_DURATION, helper="finish_refresh_job")
+def finish_refresh_job(job_id: int, error: str | None = None):
+    with Session(get_engine()) as session:
+        job = session.get(RefreshJob, job_id)
+        if job is None:
+            return
+
+        job.status = "failed" if error else "done"
+        job.error = error
+        job.finished_dtm = datetime.now()
+        session.add(job)
+        session.commit()
+
+
+# Companies with highest market cap
+@traced("db.get_top_companies_by_market_cap")
+@timed(DB_QUERY_DURATION, helper="get_top_companies_by_market_cap")
+def get_top_companies_by_market_cap(top_n: int) -> list[NSEMetadata]:
+    with Session(get_engine()) as session:
+        q_top_companies = (
+            select(NSEMetadata)
+            .order_by(NSEMetadata.total_market_cap_in_crore.desc())
+            .limit(top_n)
+        )
+        return list(session.exec(q_top_companies).all())
+
+
+# Symbol and name of all companies, used to find company names in questions
+@traced("db.get_all_company_names")
+@timed(DB_QUERY_DURATION, helper="get_all_company_names")
+def get_all_company_names() -> list[tuple[str, str]]:
+    with Session(get_engine()) as session:
+        q_company_names = select(NSEMetadata.symbol, NSEMetadata.name)
+        return [(symbol, name) for symbol, name in session.exec(q_company_names).all()]
+
+
+# Get latest job of given type
+@traced("db.get_last_refresh_job")
+@timed(DB_QUERY_DURATION, helper="get_last_refresh_job")
+def get_last_refresh_job(job_type: str) -> RefreshJob | None:
+    with Session(get_engine()) as session:
+        q_last_job = (
+            select(RefreshJob)
+            .where(RefreshJob.job_type == job_type)
+            .order_by(RefreshJob.id.desc())
+            .limit(1)
+        )
+        return session.exec(q_last_job).first()
+
+
+# Get Refresh Job by Id
+@traced("db.get_refresh_job")
+@timed(DB_QUERY_DURATION, helper="get_refresh_job")
+def get_refresh_job(job_id: int) -> RefreshJob | None:
+    with Session(get_engine()) as session:
+        return session.get(RefreshJob, job_id)
+
+
+# Get unexpired Shared Cache Entry
+@traced("db.get_shared_cache_entry")
+@timed(DB_QUERY_DURATION, helper="get_shared_cache_entry")
+def get_shared_cache_entry(key: str) -> SharedCacheEntry | None:
+    with Session(get_engine()) as session:
+        q_entry = select(SharedCacheEntry).where(
+            SharedCacheEntry.key == key,
+            SharedCacheEntry.expires_at > datetime.now(),
+        )
+        return session.exec(q_entry).first()
+
+
+# Add or update Shared Cache Entry in single statement
+@traced("db.save_shared_cache_entry")
+@timed(DB_QUERY_DURATION, helper="save_shared_cache_entry")
+def save_shared_cache_entry(entry: SharedCacheEntry):
+    with Session(get_engine()) as session:
+        q_upsert = insert(SharedCacheEntry).values(
+            key=entry.key, value=entry.value, expires_at=entry.expires_at
+        )
+        q_upsert = q_upsert.on_conflict_do_update(
+            index_elements=[SharedCacheEntry.key],
+            set_={
+                "value": q_upsert.excluded.value,
+                "expires_at": q_upsert.excluded.expires_at,
+            },
+        )
+        session.execute(q_upsert)
+
+        # Delete Expired Entries
+        session.execute(
+            delete(SharedCacheEntry).where(
+                SharedCacheEntry.expires_at < datetime.now() - timedelta(minutes=10)
+            )
+        )
+
+        session.commit()
+
+
+# Postgres advisory lock, held by one process across all hosts
+@contextmanager
+def shared_cache_lock(key: str) -> Iterator[None]:
+    with get_engine().connect() as connection:
+        connection.execute(
+            text("SELECT pg_advisory_lock(hashtextextended(:key, 0))"), {"key": key}
+        )
+        try:
+            yield
+        finally:
+            connection.execute(
+                text("SELECT pg_advisory_unlock(hashtextextended(:key, 0))"),
+                {"key": key},
+            )
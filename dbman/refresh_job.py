@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from sqlalchemy import Index, text
+from sqlmodel import Field, SQLModel
+
+# Statuses of a job which is not finished yet
+PENDING_STATUSES: tuple[str, ...] = ("queued", "running")
+PENDING_CONDITION = text("status IN ('queued', 'running')")
+
+
+class RefreshJob(SQLModel, table=True):
+    __tablename__ = "refresh_job"
+    # At most one pending job of each type, enforced by database across schedulers
+    __table_args__ = (
+        Index(
+            "ix_refresh_job_pending_job_type",
+            "job_type",
+            unique=True,
+            postgresql_where=PENDING_CONDITION,
+        ),
+    )
+    id: int | None = Field(default=None, primary_key=True)
+    job_type: str = Field(index=True)
+    # `queued`, `running`, `done` or `failed`
+    status: str = Field(default="queued", index=True)
+    worker: str | None = None
+    error: str | None = None
+    created_dtm: datetime | None = Field(default_factory=datetime.now)
+    started_dtm: datetime | None = None
+    finished_dtm: datetime | None = None
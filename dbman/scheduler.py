@@ -0,0 +1,148 @@
+import threading
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from typing import Any
+
+from nse.market_calendar import IST, PRE_OPEN_TIME, get_market_calendar
+from nse.market_state import get_market_state_poller
+from nse.models import MarketStatus
+from server_config import get_server_config as sc
+
+from .helper import enqueue_refresh_job, get_last_refresh_job
+from .refresh_job import RefreshJob
+
+
+@dataclass
+class ScheduledJob:
+    job_type: str
+    # Queued at this IST time on trading days, skipped if worker is down until `until`
+    at: time
+    until: time
+    # Heavy jobs wait while market is open, like special evening sessions
+    heavy: bool = False
+    # Run only if market traded today, catches holidays missing in config
+    after_session: bool = False
+
+
+def get_scheduled_jobs() -> list[ScheduledJob]:
+    jobs = [
+        ScheduledJob(
+            "market_metadata",
+            at=time.fromisoformat(sc().scheduler_refresh_time),
+            until=time.max,
+            heavy=True,
+            after_session=True,
+        ),
+    ]
+
+    # Warm-up reaches every host only through cache shared across hosts
+    if sc().shared_cache == "postgres":
+        jobs.insert(
+            0,
+            ScheduledJob(
+                "cache_warmup",
+                at=time.fromisoformat(sc().scheduler_warmup_time),
+                until=PRE_OPEN_TIME,
+            ),
+        )
+
+    return jobs
+
+
+def _get_created_at(job: RefreshJob | None) -> datetime | None:
+    # Jobs are created in server local time
+    if job is None or job.created_dtm is None:
+        return None
+    return job.created_dtm.astimezone(IST)
+
+
+def is_job_due(
+    job: ScheduledJob, last_job: RefreshJob | None, now: datetime | None = None
+) -> bool:
+    now = now or datetime.now(IST)
+    if not get_market_calendar().is_trading_day(now.date()):
+        return False
+
+    if not job.at <= now.time() < job.until:
+        return False
+
+    # Already queued today
+    created_at = _get_created_at(last_job)
+    if created_at is not None and created_at >= datetime.combine(
+        now.date(), job.at, IST
+    ):
+        return False
+
+    if job.heavy or job.after_session:
+        state = get_market_state_poller().get_state()
+        if state is not None:
+            if job.heavy and state.marketStatus == MarketStatus.OPEN:
+                return False
+            # Trade date stays on last trading day during holidays
+            if job.after_session and not state.tradeDate.startswith(
+                now.strftime("%d-%b-%Y")
+            ):
+                return False
+
+    return True
+
+
+def get_next_run_at(job: ScheduledJob, now: datetime | None = None) -> datetime:
+    now = now or datetime.now(IST)
+    calendar = get_market_calendar()
+    day = now.date()
+    if not calendar.is_trading_day(day) or now.time() >= job.at:
+        day = calendar.next_trading_day(day)
+    return datetime.combine(day, job.at, IST)
+
+
+def run_scheduler(stop_event: threading.Event | None = None):
+    """
+    Queues scheduled jobs when they are due, jobs are run by refresh worker.
+    """
+    stop_event = stop_event or threading.Event()
+
+    while not stop_event.is_set():
+        for job in get_scheduled_jobs():
+            try:
+                if is_job_due(job, get_last_refresh_job(job.job_type)):
+                    queued = enqueue_refresh_job(job.job_type)
+                    print(f"Scheduled {job.job_type} job {queued.id}")
+            except Exception as e:
+                print(f"Failed to schedule {job.job_type} job: {e}")
+
+        stop_event.wait(sc().scheduler_poll_seconds)
+
+
+def start_scheduler_thread() -> threading.Event:
+    """
+    Runs scheduler in background thread of current process, returns event to stop it.
+    """
+    stop_event = threading.Event()
+    threading.Thread(target=run_scheduler, args=(stop_event,), daemon=True).start()
+    return stop_event
+
+
+def get_schedule_report() -> list[dict[str, Any]]:
+    report: list[dict[str, Any]] = []
+    for job in get_scheduled_jobs():
+        last_job = get_last_refresh_job(job.job_type)
+        duration: timedelta | None = None
+        if last_job and last_job.started_dtm and last_job.finished_dtm:
+            duration = last_job.finished_dtm - last_job.started_dtm
+
+        report.append(
+            {
+                "job_type": job.job_type,
+                "at": job.at.isoformat(),
+                "next_run_at": get_next_run_at(job).isoformat(),
+                "last_job_id": last_job.id if last_job else None,
+                "last_status": last_job.status if last_job else None,
+                "last_run_at": last_job.started_dtm if last_job else None,
+                "last_duration_seconds": duration.total_seconds()
+                if duration is not None
+                else None,
+                "last_error": last_job.error if last_job else None,
+            }
+        )
+    return report
@@ -0,0 +1,15 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+
+class SharedCacheEntry(SQLModel, table=True):
+    __tablename__ = "shared_cache"
+    # Entries are disposable, unlogged table skips WAL writes
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+    key: str = Field(primary_key=True)
+    value: Any = Field(sa_column=Column(JSONB, nullable=False))
+    expires_at: datetime = Field(index=True)
@@ -0,0 +1,78 @@
+import os
+import socket
+import threading
+import time
+from collections.abc import Callable
+
+from nse.request_scheduler import RequestPriority, request_priority
+from server_config import get_server_config as sc
+from telemetry.metrics import REFRESH_JOB_DURATION, REFRESH_JOB_LAST_RUN
+
+from .actions import refresh_market_metadata, warm_market_open_cache
+from .helper import claim_refresh_job, finish_refresh_job
+
+# Job types and the functions which run them
+JOB_HANDLERS: dict[str, Callable[[], None]] = {
+    "market_metadata": refresh_market_metadata,
+    "cache_warmup": warm_market_open_cache,
+}
+
+
+def run_next_job(worker: str) -> bool:
+    """
+    Runs the oldest queued job. Returns False if there was no job to run.
+    """
+    job = claim_refresh_job(worker, sc().refresh_job_timeout_seconds)
+    if job is None or job.id is None:
+        return False
+
+    handler = JOB_HANDLERS.get(job.job_type)
+    if handler is None:
+        finish_refresh_job(job.id, f"Unknown job type {job.job_type}")
+        return True
+
+    status = "failed"
+    start = time.perf_counter()
+    try:
+        # Jobs are background work and yield NSE requests to users
+        with request_priority(RequestPriority.BULK):
+            handler()
+        status = "done"
+        finish_refresh_job(job.id)
+    except Exception as e:
+        print(f"Refresh job {job.id} failed: {e}")
+        finish_refresh_job(job.id, str(e))
+    finally:
+        REFRESH_JOB_DURATION.observe(
+            time.perf_counter() - start, job_type=job.job_type, status=status
+        )
+        REFRESH_JOB_LAST_RUN.set(time.time(), job_type=job.job_type)
+
+    return True
+
+
+def run_refresh_worker(stop_event: threading.Event | None = None):
+    """
+    Polls job queue in Postgres and runs refresh jobs until stopped.
+    """
+    stop_event = stop_event or threading.Event()
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+
+    while not stop_event.is_set():
+        try:
+            # Run queued jobs back to back, wait only when queue is empty
+            if run_next_job(worker):
+                continue
+        except Exception as e:
+            print(f"Failed to get refresh job: {e}")
+
+        stop_event.wait(sc().refresh_worker_poll_seconds)
+
+
+def start_refresh_worker_thread() -> threading.Event:
+    """
+    Runs refresh worker in background thread of current process, returns event to stop it.
+    """
+    stop_event = threading.Event()
+    threading.Thread(target=run_refresh_worker, args=(stop_event,), daemon=True).start()
+    return stop_event
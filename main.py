@@ -1,22 +1,76 @@
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import datetime
 
-import gradio as gr
 import uvicorn
-from fastapi import BackgroundTasks, FastAPI
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import (
+    FileResponse,
+    HTMLResponse,
+    JSONResponse,
+    PlainTextResponse,
+    RedirectResponse,
+)
 from fastapi.staticfiles import StaticFiles
 
-from dbman.actions import refresh_market_metadata
-from mcp_tools import mcp as mcp_app
 from server_config import get_server_config as sc
-from ui.chatui import ui as gradio_ui
-from ui.theme import app_css, app_theme
+from telemetry.loop_monitor import get_loop_monitor
+from telemetry.metrics import render_metrics
+from telemetry.profiler import ProfilerMiddleware, get_profile_path
+from telemetry.tracing import get_recent_traces, get_trace, render_waterfall
+from warmup import get_warmup_state, warm_up
+
+# Parts of the app served by this process, see `server_role` in config
+SERVES_UI = sc().server_role in ("all", "ui")
+SERVES_MCP = sc().server_role in ("all", "mcp")
+RUNS_REFRESH_WORKER = sc().server_role in ("all", "refresh-worker")
 
 # Create MCP HTTP App
-mcp_http_app = mcp_app.http_app(path="/")
+if SERVES_MCP:
+    from mcp_tools import mcp as mcp_app
+
+    mcp_http_app = mcp_app.http_app(path="/")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Watch event loop for blocking calls
+    if sc().loop_monitor_enabled:
+        get_loop_monitor().start()
+
+    # Warm up in background, `/ready` reports when done
+    warmup_task = None
+    if sc().warmup_enabled:
+        warmup_task = asyncio.create_task(warm_up(SERVES_UI, SERVES_MCP))
+    else:
+        get_warmup_state().ready = True
+
+    # Run refresh jobs and queue scheduled jobs in background threads
+    stop_events = []
+    if RUNS_REFRESH_WORKER:
+        from dbman.worker import start_refresh_worker_thread
+
+        stop_events.append(start_refresh_worker_thread())
+
+        if sc().scheduler_enabled:
+            from dbman.scheduler import start_scheduler_thread
+
+            stop_events.append(start_scheduler_thread())
+
+    async with AsyncExitStack() as stack:
+        # Run MCP's Lifespan
+        if SERVES_MCP:
+            await stack.enter_async_context(mcp_http_app.lifespan(app))
+        yield
+
+    for stop_event in stop_events:
+        stop_event.set()
+    if warmup_task is not None:
+        warmup_task.cancel()
+
 
 # Create Fastapi app with MCP's Lifespan
-app = FastAPI(title="NSE Chatbot App", lifespan=mcp_http_app.lifespan)
+app = FastAPI(title="NSE Chatbot App", lifespan=lifespan)
 
 
 # Return Favicon
@@ -25,41 +79,116 @@ async def favicon():
     return FileResponse(sc().favicon_path)
 
 
-# Server Files Generated in Temp Assets Directory
-app.mount(
-    f"/{sc().temp_assets_dir}",
-    StaticFiles(directory=sc().temp_assets_url),
-    name=sc().temp_assets_dir,
-)
+# Readiness for load balancer, ready after startup warm-up
+@app.get("/ready")
+async def ready():
+    state = get_warmup_state()
+    return JSONResponse(state.to_dict(), status_code=200 if state.ready else 503)
 
 
-# Add route for redirecting root to UI
-@app.get("/")
-async def redirect_to_ui():
-    return RedirectResponse(sc().ui_path)
+# Prometheus Metrics
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 
-# Add Route to Refresh Equity Metadata
-@app.get("/refresh")
-async def refresh_metadata(background_tasks: BackgroundTasks):
-    # Add Background Task
-    background_tasks.add_task(refresh_market_metadata)
+# Recent traces and their waterfall, served only when tracing is on
+if sc().tracing_enabled:
 
-    # Return Response
-    return f"Refreshed triggered at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    @app.get("/debug/traces")
+    async def list_traces():
+        return get_recent_traces()
 
+    @app.get("/debug/traces/{trace_id}", response_class=HTMLResponse)
+    async def show_trace(trace_id: str):
+        return render_waterfall(get_trace(trace_id))
 
-# Mount Gradio UI on App
-app = gr.mount_gradio_app(
-    app,
-    gradio_ui,
-    path=sc().ui_path,
-    theme=app_theme,
-    css=app_css,
+
+# Blocking calls detected in event loop, served only when the monitor runs
+if sc().loop_monitor_enabled:
+
+    @app.get("/debug/loop-stalls")
+    async def loop_stalls():
+        return get_loop_monitor().get_report()
+
+
+# Scheduled jobs with their last run and duration, served only when scheduling is on
+if sc().scheduler_enabled:
+
+    @app.get("/debug/scheduler")
+    def scheduler():
+        from dbman.scheduler import get_schedule_report
+
+        return get_schedule_report()
+
+
+# Saved profiles of chat turns and MCP requests, served only when profiling is allowed
+if sc().profiler_enabled:
+
+    @app.get("/debug/profiles/{filename}")
+    def show_profile(filename: str):
+        path = get_profile_path(filename)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return FileResponse(path, media_type="text/plain")
+
+
+# Server Files Generated in Temp Assets Directory, like charts
+app.mount(
+    f"/{sc().temp_assets_dir}",
+    StaticFiles(directory=sc().temp_assets_url),
+    name=sc().temp_assets_dir,
 )
 
+if SERVES_UI:
+    import gradio as gr
+
+    from dbman.helper import enqueue_refresh_job, get_refresh_job
+    from ui.chatui import ui as gradio_ui
+    from ui.theme import app_css, app_theme
+
+    # Add route for redirecting root to UI
+    @app.get("/")
+    async def redirect_to_ui():
+        return RedirectResponse(sc().ui_path)
+
+    # Add Route to Refresh Equity Metadata, job is run by refresh worker
+    @app.get("/refresh")
+    def refresh_metadata():
+        job = enqueue_refresh_job("market_metadata")
+
+        # Return Response
+        return (
+            f"Refresh job {job.id} {job.status} at "
+            + f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        )
+
+    # Status of Refresh Job
+    @app.get("/refresh/{job_id}")
+    def refresh_status(job_id: int):
+        job = get_refresh_job(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Refresh job not found")
+        return job
+
+    # Mount Gradio UI on App
+    app = gr.mount_gradio_app(
+        app,
+        gradio_ui,
+        path=sc().ui_path,
+        theme=app_theme,
+        css=app_css,
+    )
+
 # Mount MCP ON app
-app.mount(sc().mcp_path, mcp_http_app)
+if SERVES_MCP:
+    app.mount(sc().mcp_path, mcp_http_app)
+
+# Profile MCP requests on demand, chat turns are profiled in chat
+app.add_middleware(ProfilerMiddleware)
 
 if __name__ == "__main__":
+    # Roles are selected with `SERVER_ROLE`, like `SERVER_ROLE=mcp python main.py`
     uvicorn.run(app, host=sc().host, port=sc().port)
@@ -0,0 +1,197 @@
+import csv
+import io
+import re
+from dataclasses import dataclass
+from functools import cache
+from typing import Any, Literal
+
+from pydantic_core import to_json
+
+from server_config import get_server_config as sc
+
+# Token budget per tool, tools not listed here use `mcp_tool_token_budget`
+TOOL_TOKEN_BUDGETS: dict[str, int] = {
+    "check_equity_market_status": 50,
+    "get_current_stock_price": 100,
+    "get_stock_history_prices_for_range_not_more_than_1_year": 3000,
+    "search_nse_sector_or_industry_keys": 300,
+    "analyse_stock_corporate_filings_financial_results_and_actions": 600,
+}
+
+
+@dataclass
+class TokenUsage:
+    calls: int = 0
+    before_tokens: int = 0
+    after_tokens: int = 0
+
+
+# Numbers which come as string in NSE responses like "1,234.50"
+_NUMBER_PATTERN = re.compile(r"^-?[\d,]*\.?\d+$")
+
+# Token usage per tool collected when `mcp_token_report` is enabled
+_token_usage: dict[str, TokenUsage] = {}
+
+
+@cache
+def _get_encoder() -> Any | None:
+    # Tiktoken comes with langchain-openai, fallback to approximation if unavailable
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Returns the number of LLM tokens in given text.
+    Falls back to approximation of 4 characters per token when tokenizer is not available.
+    """
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+
+    return (len(text) + 3) // 4
+
+
+def get_tool_token_budget(tool_name: str) -> int:
+    return TOOL_TOKEN_BUDGETS.get(tool_name, sc().mcp_tool_token_budget)
+
+
+def compact_value(value: Any, digits: int = 2) -> Any:
+    # Missing values
+    if value is None or value == "":
+        return "NA"
+
+    # Round floats and drop trailing zeros like 105.0 -> 105
+    if isinstance(value, float):
+        value = round(value, digits)
+        return int(value) if value.is_integer() else value
+
+    # Numbers in strings are rounded as well
+    if isinstance(value, str):
+        value = value.strip()
+        if _NUMBER_PATTERN.match(value):
+            return compact_value(float(value.replace(",", "")), digits)
+        return value
+
+    return value
+
+
+def _csv_line(values: list[Any]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(
+        [compact_value(value) for value in values]
+    )
+    return buffer.getvalue()
+
+
+def format_table(
+    tool_name: str,
+    headers: list[str],
+    rows: list[list[Any]],
+    footer: list[str] | None = None,
+    keep: Literal["first", "last"] = "first",
+) -> str:
+    """
+    Formats the rows as CSV text with a header row.
+    Rows which do not fit in the token budget of the tool are dropped and a hint is added instead,
+    `keep` tells which end of the rows is kept, like the latest rows of a history.
+    """
+    footer = footer or []
+    if not rows:
+        return "\n".join(["No data available", *footer])
+
+    budget = get_tool_token_budget(tool_name)
+
+    # Header and footer are always part of response
+    header = _csv_line(headers)
+    used_tokens = count_tokens("\n".join([header, *footer]))
+
+    # Fill rows from the kept end
+    ordered_rows = rows if keep == "first" else rows[::-1]
+    lines: list[str] = []
+    for idx, row in enumerate(ordered_rows):
+        line = _csv_line(row)
+        line_tokens = count_tokens(line) + 1
+
+        # Stop adding rows once budget is exhausted
+        if used_tokens + line_tokens > budget and idx > 0:
+            break
+
+        lines.append(line)
+        used_tokens += line_tokens
+
+    dropped = len(rows) - len(lines)
+    if keep == "first":
+        if dropped:
+            lines.append(
+                f"... {dropped} more rows available, refine the request to get them"
+            )
+    else:
+        lines.reverse()
+        if dropped:
+            lines.insert(
+                0,
+                f"... {dropped} earlier rows available, refine the request to get them",
+            )
+
+    return "\n".join([header, *lines, *footer])
+
+
+def format_mapping(tool_name: str, data: dict[str, Any]) -> str:
+    """
+    Formats the dictionary as `key: value` lines and truncates the text to the token budget of the tool.
+    """
+    text = "\n".join(f"{key}: {compact_value(value)}" for key, value in data.items())
+    return truncate_to_budget(tool_name, text)
+
+
+def truncate_to_budget(tool_name: str, text: str) -> str:
+    budget = get_tool_token_budget(tool_name)
+    if count_tokens(text) <= budget:
+        return text
+
+    # Cut by approximate character count and mark the truncation
+    cut_text = text[: budget * 4]
+    return f"{cut_text}\n... more available, refine the request to get it"
+
+
+def record_token_usage(tool_name: str, before: Any, after: str) -> str:
+    """
+    Records the tokens of raw data (NSE payload or database rows) and compact response of a tool
+    for the token report. Returns the compact response as is.
+    """
+    if not sc().mcp_token_report:
+        return after
+
+    before_text = (
+        before if isinstance(before, str) else to_json(before, fallback=str).decode()
+    )
+
+    usage = _token_usage.setdefault(tool_name, TokenUsage())
+    usage.calls += 1
+    usage.before_tokens += count_tokens(before_text)
+    usage.after_tokens += count_tokens(after)
+
+    return after
+
+
+def get_token_report() -> dict[str, TokenUsage]:
+    return dict(_token_usage)
+
+
+def print_token_report():
+    print(f"{'Tool':<64} {'Calls':>6} {'Before':>8} {'After':>8} {'Saved':>7}")
+    for tool_name, usage in sorted(_token_usage.items()):
+        saved = (
+            (1 - usage.after_tokens / usage.before_tokens) * 100
+            if usage.before_tokens
+            else 0
+        )
+        print(
+            f"{tool_name:<64} {usage.calls:>6} {usage.before_tokens:>8} "
+            + f"{usage.after_tokens:>8} {saved:>6.1f}%"
+        )
@@ -0,0 +1,56 @@
+import sys
+
+import mcp_tools
+from benchmarks.common import get_tool_fn
+from mcp_format import print_token_report
+from server_config import get_server_config as sc
+
+
+def _call_tool(tool, *args):
+    fn = get_tool_fn(tool)
+    try:
+        fn(*args)
+    except Exception as e:
+        print(f"{getattr(fn, '__name__', fn)} failed: {e}")
+
+
+def run_token_report(symbol: str, search_key: str):
+    """
+    Calls every MCP tool once and prints the tokens of verbose (before) and compact (after) responses.
+    """
+    # Token usage is only collected when enabled in config, which is loaded on import
+    if not sc().mcp_token_report:
+        print("Token report is disabled, run with MCP_TOKEN_REPORT=true")
+        sys.exit(1)
+
+    _call_tool(mcp_tools.get_current_stock_price, symbol)
+    _call_tool(
+        mcp_tools.get_stock_history_prices_for_range_not_more_than_1_year,
+        symbol,
+        "01-01-2025",
+        "31-12-2025",
+    )
+    _call_tool(mcp_tools.get_stock_running_at_52week_high)
+    _call_tool(mcp_tools.get_stock_running_at_52week_low)
+    _call_tool(mcp_tools.weekly_volume_gainer_stocks)
+    _call_tool(mcp_tools.search_nse_stocks_by_name_or_symbol, search_key)
+    _call_tool(mcp_tools.search_nse_sector_or_industry_keys, "IT")
+    _call_tool(
+        mcp_tools.get_top_stocks_in_industries_by_industry_keys,
+        ["Computers - Software & Consulting"],
+        10,
+    )
+    _call_tool(
+        mcp_tools.analyse_stock_corporate_filings_financial_results_and_actions,
+        symbol,
+    )
+
+    print_token_report()
+
+
+if __name__ == "__main__":
+    # Usage: MCP_TOKEN_REPORT=true python mcp_token_report.py [SYMBOL] [SEARCH KEY]
+    run_token_report(
+        sys.argv[1] if len(sys.argv) > 1 else sc().test_symbol,
+        sys.argv[2] if len(sys.argv) > 2 else "Tata",
+    )
@@ -1,15 +1,26 @@
+import time
 from datetime import datetime
 from typing import Any
 
 from fastmcp import FastMCP
+from fastmcp.server.dependencies import get_http_headers
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from fastmcp.tools.tool import ToolResult
+from mcp.types import CallToolRequestParams, TextContent
 
 from dbman.helper import (
     get_companies_in_specified_industry,
+    get_confident_match,
     search_nse_company_by_name_or_symbol_indb,
     search_sector_or_industry_indb,
 )
+from mcp_format import (
+    compact_value,
+    format_mapping,
+    format_table,
+    record_token_usage,
+)
 from nse.helper import (
-    get_capital_market_state,
     get_stock_corporate_filing_info,
     get_stock_details,
     get_stock_history_for_specific_range,
@@ -17,21 +28,66 @@ from nse.helper import (
     get_stock_running_52week_low,
     get_weekly_volume_gainers,
 )
+from nse.market_state import get_market_status
 from nse.models import (
     MarketStatus,
     Stock52weekAnalysis,
     StockDetailResponse,
     StockWeeklyVolumeGainers,
 )
+from nse.prefetch import get_prefetcher, history_key, quote_key
+from nse.stale_responses import format_stale_note, track_stale_responses
+from telemetry.metrics import TOOL_CALL_DURATION
+from telemetry.tracing import parse_traceparent, span
+
 
-mcp = FastMCP()
+class TelemetryMiddleware(Middleware):
+    """
+    Records duration of every tool call and its span, continuing the trace of calling agent.
+    Tells agent the age of data when stale NSE responses were used.
+    """
+
+    async def on_call_tool(
+        self,
+        context: MiddlewareContext[CallToolRequestParams],
+        call_next: CallNext[CallToolRequestParams, Any],
+    ) -> Any:
+        tool = context.message.name
+        remote_parent = parse_traceparent(get_http_headers().get("traceparent"))
+        status = "error"
+        start = time.perf_counter()
+        try:
+            with (
+                span(f"mcp.{tool}", remote_parent=remote_parent),
+                track_stale_responses() as stale_responses,
+            ):
+                result = await call_next(context)
+            if stale_responses and isinstance(result, ToolResult):
+                result.content.append(
+                    TextContent(type="text", text=format_stale_note(stale_responses))
+                )
+            status = "ok"
+            return result
+        finally:
+            TOOL_CALL_DURATION.observe(
+                time.perf_counter() - start, tool=tool, status=status
+            )
+
+
+mcp = FastMCP(middleware=[TelemetryMiddleware()])
+
+
+def _record_prefetch_use(key: str, tool: str):
+    prefetcher = get_prefetcher()
+    if prefetcher is not None:
+        prefetcher.record_use(key, tool)
 
 
 # Register MCP
 @mcp.tool()
 async def check_equity_market_status() -> str:
     """Check whether the Equity / Capital Market is open or closed. Returns a string indicating the market status."""
-    market_state = get_capital_market_state()
+    market_state = get_market_status()
 
     if market_state is None:
         return "UNKNOWN: Unable to get Market Status from NSE"
@@ -40,7 +96,7 @@ async def check_equity_market_status() -> str:
 
 
 @mcp.tool()
-def get_current_stock_price(symbol: str) -> dict[str, Any]:
+def get_current_stock_price(symbol: str) -> str:
     """
     Returns the Current price and previous day close price of the given stock symbol.
     If market is closed, CurrentPrice will be the Closing price on market day.
@@ -49,17 +105,15 @@ def get_current_stock_price(symbol: str) -> dict[str, Any]:
         symbol: Stock Symbol
 
     :RESPONSE:
-        {
-            "Symbol": <Stock Symbol>,
-            "CurrentPrice": <Current or Closing Price>,
-            "PreviousClosePrice": <Closing Price on previous market day>,
-        }
+        Symbol,CurrentPrice,PreviousClosePrice
+        <Stock Symbol>,<Current or Closing Price>,<Closing Price on previous market day>
     """
+    _record_prefetch_use(quote_key(symbol), "get_current_stock_price")
     stock_detail: StockDetailResponse | None = get_stock_details(symbol)
-    market_state = get_capital_market_state()
+    market_state = get_market_status()
 
     if stock_detail is None or market_state is None:
-        return {
+        response = {
             "Symbol": symbol,
             "CurrentPrice": stock_detail.priceInfo.lastPrice
             if stock_detail
@@ -70,18 +124,29 @@ def get_current_stock_price(symbol: str) -> dict[str, Any]:
         }
 
     # Check for market status
-    if market_state == MarketStatus.CLOSED or market_state == MarketStatus.CLOSE:
-        return {
+    elif market_state == MarketStatus.CLOSED or market_state == MarketStatus.CLOSE:
+        response = {
             "Symbol": symbol,
             "CurrentPrice": stock_detail.priceInfo.close,
             "PreviousClosePrice": stock_detail.priceInfo.previousClose,
         }
 
-    return {
-        "Symbol": symbol,
-        "CurrentPrice": stock_detail.priceInfo.lastPrice,
-        "PreviousClosePrice": stock_detail.priceInfo.previousClose,
-    }
+    else:
+        response = {
+            "Symbol": symbol,
+            "CurrentPrice": stock_detail.priceInfo.lastPrice,
+            "PreviousClosePrice": stock_detail.priceInfo.previousClose,
+        }
+
+    return record_token_usage(
+        "get_current_stock_price",
+        stock_detail if stock_detail is not None else response,
+        format_table(
+            "get_current_stock_price",
+            list(response.keys()),
+            [list(response.values())],
+        ),
+    )
 
 
 @mcp.tool()
@@ -89,7 +154,7 @@ def get_stock_history_prices_for_range_not_more_than_1_year(
     symbol: str,
     from_date: str,
     to_date: str,
-) -> dict[str, Any] | str:
+) -> str:
     """
     Returns the historical prices of a stock for selected date range. Make sure the range is not more than 1 year.
     This tool does not support giving data for range more than 1 year.
@@ -100,93 +165,130 @@ def get_stock_history_prices_for_range_not_more_than_1_year(
         to_date: Range End Date in DD-MM-YYYY format.
 
     :RESPONSE:
-        {<Symbol>:[
-            {
-                "date": <Date in YYYY-MM-DD Format>,
-                "close": <Closing Price>,
-            }, ...
-        ],
-        "highest": <Highest Price in Date Range>,
-        "lowest": <Lowest Price in Date Range>}
+        date,close
+        <Date>,<Closing Price>
+        ...
+        highest: <Highest Price in Date Range>
+        lowest: <Lowest Price in Date Range>
 
     Example Input: symbol="IRCTC", from_date="01-01-2023", to_date="02-01-2023"
-    Example Output: {"IRCTC":[
-            {"date": "2023-01-01","open": 100.0,"close": 105.0,"high": 110.0,"low": 95.0},
-            {"date": "2023-01-02","open": 105.0,"close": 110.0,"high": 115.0,"low": 100.0}
-        ], "highest": 120.9, "lowest": 92.0}
+    Example Output:
+        date,close
+        01-Jan-2023,105
+        02-Jan-2023,110.5
+        highest: 120.9
+        lowest: 92
     """
+    _record_prefetch_use(
+        history_key(symbol, from_date, to_date),
+        "get_stock_history_prices_for_range_not_more_than_1_year",
+    )
     data = get_stock_history_for_specific_range(symbol, from_date, to_date)
 
     if data is None:
         return "Unable to fetch historical data from NSE"
 
-    stock_data = [
-        {
-            "date": stock.mtimestamp,
-            "close": stock.chClosingPrice,
-        }
-        for stock in data
-    ]
-
-    return {
-        symbol: stock_data,
-        "highest": max(data, key=lambda x: x.chTradeHighPrice).chTradeHighPrice,
-        "lowest": min(data, key=lambda x: x.chTradeLowPrice).chTradeLowPrice,
-    }
+    if len(data) == 0:
+        return f"No historical data found for {symbol} in given date range"
+
+    highest = max(data, key=lambda x: x.chTradeHighPrice).chTradeHighPrice
+    lowest = min(data, key=lambda x: x.chTradeLowPrice).chTradeLowPrice
+
+    # Oldest first, so that the latest prices are kept when rows are over budget
+    history = sorted(data, key=lambda x: datetime.strptime(x.mtimestamp, "%d-%b-%Y"))
+
+    return record_token_usage(
+        "get_stock_history_prices_for_range_not_more_than_1_year",
+        data,
+        format_table(
+            "get_stock_history_prices_for_range_not_more_than_1_year",
+            ["date", "close"],
+            [[stock.mtimestamp, stock.chClosingPrice] for stock in history],
+            footer=[
+                f"highest: {compact_value(highest)}",
+                f"lowest: {compact_value(lowest)}",
+            ],
+            keep="last",
+        ),
+    )
 
 
 @mcp.tool()
-def get_stock_running_at_52week_high() -> list[dict[str, str]] | str:
+def get_stock_running_at_52week_high() -> str:
     """Returns the list of stock that are currently running at their 52-week high price.
 
-    Example Output: [
-            {"TCS" : "Tata Consultancy Services Limited"},
-            {"INFY" : "Infosys Limited"}
-        ]
+    Example Output:
+        symbol,name
+        TCS,Tata Consultancy Services Limited
+        INFY,Infosys Limited
     """
     data: list[Stock52weekAnalysis] | None = get_stock_running_52week_high()
     if data is None:
         return "Unable to fetch 52-week high data from NSE"
 
-    return [{item.symbol: item.comapnyName} for item in data]
+    return record_token_usage(
+        "get_stock_running_at_52week_high",
+        data,
+        format_table(
+            "get_stock_running_at_52week_high",
+            ["symbol", "name"],
+            [[item.symbol, item.comapnyName] for item in data],
+        ),
+    )
 
 
 @mcp.tool()
-def get_stock_running_at_52week_low() -> list[dict[str, str]] | str:
+def get_stock_running_at_52week_low() -> str:
     """Returns the list of stocks that are currently running at their 52-week low price.
 
-    Example Output: [
-            {"TCS" : "Tata Consultancy Services Limited"},
-            {"INFY" : "Infosys Limited"}
-        ]
+    Example Output:
+        symbol,name
+        TCS,Tata Consultancy Services Limited
+        INFY,Infosys Limited
     """
     data: list[Stock52weekAnalysis] | None = get_stock_running_52week_low()
     if data is None:
         return "Unable to fetch 52-week low data from NSE"
 
-    return [{item.symbol: item.comapnyName} for item in data]
+    return record_token_usage(
+        "get_stock_running_at_52week_low",
+        data,
+        format_table(
+            "get_stock_running_at_52week_low",
+            ["symbol", "name"],
+            [[item.symbol, item.comapnyName] for item in data],
+        ),
+    )
 
 
 @mcp.tool()
-def weekly_volume_gainer_stocks() -> list[dict[str, str]] | str:
+def weekly_volume_gainer_stocks() -> str:
     """Returns the list of stocks which are weekly volume gainers.
 
-    Example Output: [
-            {"TCS" : "Tata Consultancy Services Limited"},
-            {"INFY" : "Infosys Limited"}
-        ]
+    Example Output:
+        symbol,name
+        TCS,Tata Consultancy Services Limited
+        INFY,Infosys Limited
     """
     data: list[StockWeeklyVolumeGainers] | None = get_weekly_volume_gainers()
     if data is None:
         return "Unable to fetch weekly volume gainers from NSE"
 
-    return [{item.symbol: item.companyName} for item in data]
+    return record_token_usage(
+        "weekly_volume_gainer_stocks",
+        data,
+        format_table(
+            "weekly_volume_gainer_stocks",
+            ["symbol", "name"],
+            [[item.symbol, item.companyName] for item in data],
+        ),
+    )
 
 
 @mcp.tool()
 def search_nse_stocks_by_name_or_symbol(
     search_key: str,
-) -> list[dict[str, str]] | str:
+) -> str:
     """
     Search the NSE Database for companies whose name or symbol matches the search key and returns a complete list.
     The search key will be searched in Company name or Symbol and nowhere else.
@@ -194,32 +296,59 @@ def search_nse_stocks_by_name_or_symbol(
     :PARAMETERS:
         search_key: The key to search for in the NSE companies list.
 
-    Example Output: [
-            {"TCS" : "Tata Consultancy Services Limited"},
-            {"INFY" : "Infosys Limited"}
-        ]
+    Example Output:
+        symbol,name
+        TCS,Tata Consultancy Services Limited
+        INFY,Infosys Limited
     """
     companies = search_nse_company_by_name_or_symbol_indb(search_key)
 
-    return [{company.symbol: company.name} for company in companies]
+    # Next step usually asks price or history of the matched company, fetch it ahead
+    prefetcher = get_prefetcher()
+    match = get_confident_match(search_key, companies)
+    if prefetcher is not None and match is not None:
+        prefetcher.prefetch_symbol(match.symbol)
+
+    return record_token_usage(
+        "search_nse_stocks_by_name_or_symbol",
+        companies,
+        format_table(
+            "search_nse_stocks_by_name_or_symbol",
+            ["symbol", "name"],
+            [[company.symbol, company.name] for company in companies],
+        ),
+    )
 
 
 @mcp.tool()
-def search_nse_sector_or_industry_keys(search_key: str) -> list[str]:
+def search_nse_sector_or_industry_keys(search_key: str) -> str:
     """Returns a list of NSE registered Industries keys which match the search key.
     These keys can be used to search companies in specific industry.
 
     Example Input: "IT"
-    Example Output: ["IT - Hardware", "Information Technology"]
+    Example Output:
+        industry
+        IT - Hardware
+        Information Technology
     """
-    return search_sector_or_industry_indb(search_key)
+    industries = search_sector_or_industry_indb(search_key)
+
+    return record_token_usage(
+        "search_nse_sector_or_industry_keys",
+        industries,
+        format_table(
+            "search_nse_sector_or_industry_keys",
+            ["industry"],
+            [[industry] for industry in industries],
+        ),
+    )
 
 
 @mcp.tool()
 def get_top_stocks_in_industries_by_industry_keys(
     industry_keys: list[str],
     top_n: int | None = 10,
-) -> list[dict[str, str]]:
+) -> str:
     """
     Search the NSE database for list of companies which operate in provided industry and returns list of top n stocks by market cap.
     !IMPORTANT: The Industry key should match exactly with that in database.
@@ -230,39 +359,51 @@ def get_top_stocks_in_industries_by_industry_keys(
         top_n: Optional integer parameter to specify the top number of companies to return. Defaults to 10 if not provided.
 
     Example Input: ["Information Technology"]
-    Example Output: [
-            {"TCS" : "Tata Consultancy Services Limited"},
-            {"INFY" : "Infosys Limited"}
-        ]
+    Example Output:
+        symbol,name,market_cap_in_crore
+        TCS,Tata Consultancy Services Limited,1105000.5
+        INFY,Infosys Limited,620000.25
     """
     if top_n is None:
         top_n = 10
 
-    return get_companies_in_specified_industry(industry_keys, top_n)
+    companies = get_companies_in_specified_industry(industry_keys, top_n)
+
+    return record_token_usage(
+        "get_top_stocks_in_industries_by_industry_keys",
+        companies,
+        format_table(
+            "get_top_stocks_in_industries_by_industry_keys",
+            ["symbol", "name", "market_cap_in_crore"],
+            [
+                [company.symbol, company.name, company.total_market_cap_in_crore]
+                for company in companies
+            ],
+        ),
+    )
 
 
 @mcp.tool()
 def analyse_stock_corporate_filings_financial_results_and_actions(
     symbol: str,
-) -> dict[str, Any]:
-    """Returns a dictionary containing last board meeting detail, latest financial results,
+) -> str:
+    """Returns the last board meeting detail, latest financial results,
     corporate actions like dividend, last few announcements and Shareholding pattern for a given stock symbol.
 
     :PARAMETERS:
         symbol: The stock symbol to search for.
 
     Example Input: "TCS"
-    Example Output: {
-        "Latest Board Meeting": "<Details of latest board meeting>",
-        "Latest Financial Results": "<Latest Financial Results>",
-        "Latest Corporate Actions": "<Corporate Actions like dividend etc>",
-        "Latest Shareholding Pattern": <Current Shareholding Pattern like percent share held by public / employees>,
-    }
+    Example Output:
+        Latest Board Meeting: <Details of latest board meeting>
+        Financial Results: <Latest Financial Results>
+        Corporate Actions: <Corporate Actions like dividend etc>
+        Shareholding Pattern: <Current Shareholding Pattern like percent share held by public / employees>
     """
     detail = get_stock_corporate_filing_info(symbol)
 
     if detail is None:
-        return {"Error": f"Corporate filings not found for {symbol}"}
+        return f"Error: Corporate filings not found for {symbol}"
 
     # Latest Board Meeting annnouncement
     latest_board_meeting = (
@@ -283,12 +424,12 @@ def analyse_stock_corporate_filings_financial_results_and_actions(
     )
 
     latest_financial_results_details = (
-        f"from: {latest_financial_results.from_date if latest_financial_results.from_date else 'NA'}, "
-        + f"to: {latest_financial_results.to_date if latest_financial_results.to_date else 'NA'}, "
-        + f"income (₹ Crores): {latest_financial_results.income if latest_financial_results.income else 'NA'}, "
-        + f"earning per share (₹): {latest_financial_results.reDilEPS if latest_financial_results.reDilEPS else 'NA'}, "
-        + f"profit / loss before tax (₹ Crores): {latest_financial_results.reProLossBefTax if latest_financial_results.reProLossBefTax else 'NA'}, "
-        + f"net profit / loss (₹ Crores): {latest_financial_results.proLossAftTax if latest_financial_results.proLossAftTax else 'NA'}"
+        f"from: {compact_value(latest_financial_results.from_date)}, "
+        + f"to: {compact_value(latest_financial_results.to_date)}, "
+        + f"income (₹ Cr): {compact_value(latest_financial_results.income)}, "
+        + f"EPS (₹): {compact_value(latest_financial_results.reDilEPS)}, "
+        + f"profit before tax (₹ Cr): {compact_value(latest_financial_results.reProLossBefTax)}, "
+        + f"net profit (₹ Cr): {compact_value(latest_financial_results.proLossAftTax)}"
         if latest_financial_results
         else "No Information Available"
     )
@@ -321,7 +462,7 @@ def analyse_stock_corporate_filings_financial_results_and_actions(
         f"date: {latest_shareholding_pattern_date if latest_shareholding_pattern_date else 'NA'}, "
         + ", ".join(
             [
-                f"{list(shareholder.items())[0][0]}: {list(shareholder.items())[0][1]}%"
+                f"{list(shareholder.items())[0][0]}: {compact_value(list(shareholder.items())[0][1])}%"
                 for shareholder in latest_shareholding_pattern
                 if len(list(shareholder.items())) > 0
             ]
@@ -331,9 +472,18 @@ def analyse_stock_corporate_filings_financial_results_and_actions(
     )
 
     # Return Final Detail
-    return {
+    response = {
         "Latest Board Meeting": latest_board_meeting_details,
         "Financial Results": latest_financial_results_details,
         "Corporate Actions": latest_corporate_actions_details,
         "Shareholding Pattern": latest_shareholding_pattern_details,
     }
+
+    return record_token_usage(
+        "analyse_stock_corporate_filings_financial_results_and_actions",
+        detail,
+        format_mapping(
+            "analyse_stock_corporate_filings_financial_results_and_actions",
+            response,
+        ),
+    )
@@ -0,0 +1,35 @@
+"""Add pending refresh job unique index
+
+Revision ID: e5a7c3d9f214
+Revises: b41e8f2d6c90
+Create Date: 2026-10-19 15:21:43.106528
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c3d9f214'
+down_revision: Union[str, Sequence[str], None] = 'b41e8f2d6c90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep only the oldest pending job of each type before enforcing uniqueness
+    op.execute(
+        "UPDATE refresh_job SET status = 'failed', error = 'Duplicate pending job' "
+        "WHERE status IN ('queued', 'running') AND id NOT IN ("
+        "SELECT MIN(id) FROM refresh_job WHERE status IN ('queued', 'running') "
+        "GROUP BY job_type)"
+    )
+    op.create_index('ix_refresh_job_pending_job_type', 'refresh_job', ['job_type'], unique=True, postgresql_where=sa.text("status IN ('queued', 'running')"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_refresh_job_pending_job_type', table_name='refresh_job', postgresql_where=sa.text("status IN ('queued', 'running')"))
@@ -0,0 +1,76 @@
+import threading
+import time
+from functools import cache
+
+from server_config import get_server_config as sc
+from telemetry.metrics import NSE_CIRCUIT_OPEN
+
+
+class CircuitBreaker:
+    """
+    Stops calling an NSE endpoint after repeated failures, so callers fail fast.
+    After `open_seconds` one request is let through to probe, success closes the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, open_seconds: float):
+        self.name: str = name
+        self.failure_threshold: int = failure_threshold
+        self.open_seconds: float = open_seconds
+        # `closed`, `open` or `half_open`
+        self.state: str = "closed"
+        self.failures: int = 0
+        self.opened_at: float = 0
+        self._lock = threading.Lock()
+
+    def is_closed(self) -> bool:
+        return self.state == "closed"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+
+            # Let one probe through once open period is over, again if probe never finished
+            if time.monotonic() - self.opened_at >= self.open_seconds:
+                self.state = "half_open"
+                self.opened_at = time.monotonic()
+                return True
+
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+        NSE_CIRCUIT_OPEN.set(0, endpoint=self.name)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state != "half_open" and self.failures < self.failure_threshold:
+                return
+
+            if self.state == "closed":
+                print(f"Circuit opened for {self.name} after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+        NSE_CIRCUIT_OPEN.set(1, endpoint=self.name)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+@cache
+def _get_breaker_config() -> tuple[int, float]:
+    return sc().nse_circuit_failure_threshold, sc().nse_circuit_open_seconds
+
+
+def get_circuit_breaker(endpoint: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker(
+                endpoint, *_get_breaker_config()
+            )
+        return breaker
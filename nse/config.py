@@ -1,4 +1,6 @@
-BASE_URL = "https://www.nseindia.com"
+from server_config import get_server_config as sc
+
+BASE_URL = sc().nse_base_url
 EQUITY_URL = f"{BASE_URL}/get-quotes/equity?symbol="
 MARKET_STATUS_URL = f"{BASE_URL}/api/marketStatus"
 STOCK_QUOTE_URL = f"{BASE_URL}/api/quote-equity"
@@ -0,0 +1,152 @@
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict, deque
+from functools import cache
+from typing import Any, Callable
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from server_config import get_server_config as sc
+
+from . import synthetic
+from .fixtures import load_fixture
+
+# Local stand-in for NSE website to test and benchmark without hitting nseindia.com
+# Run with `uvicorn nse.emulator:app --port 8010` and set `NSE_BASE_URL=http://localhost:8010`
+app = FastAPI(title="NSE Emulator")
+
+COOKIE_NAME = "nsit"
+
+# Requests per path and status, used by benchmarks to count upstream traffic
+request_stats: Counter[str] = Counter()
+
+# Recent request times per client for rate limiting
+_client_requests: defaultdict[str, deque[float]] = defaultdict(deque)
+
+
+@cache
+def _get_symbols() -> list[str]:
+    return synthetic.get_symbols(sc().nse_emulator_symbols)
+
+
+def _is_rate_limited(client: str) -> bool:
+    if sc().nse_emulator_rate_limit <= 0:
+        return False
+
+    # Sliding window of 1 second
+    now = time.monotonic()
+    requests = _client_requests[client]
+    while requests and requests[0] < now - 1:
+        requests.popleft()
+
+    requests.append(now)
+    return len(requests) > sc().nse_emulator_rate_limit
+
+
+def _has_valid_cookie(request: Request) -> bool:
+    # Cookie value is the time when it was issued
+    issued_at = request.cookies.get(COOKIE_NAME)
+    if issued_at is None:
+        return False
+
+    try:
+        return time.time() - float(issued_at) < sc().nse_emulator_cookie_ttl
+    except ValueError:
+        return False
+
+
+@app.middleware("http")
+async def emulate_nse_behaviour(request: Request, call_next: Callable[..., Any]):
+    # Latency with jitter
+    if sc().nse_emulator_latency_ms > 0:
+        await asyncio.sleep(
+            sc().nse_emulator_latency_ms * random.uniform(0.5, 1.5) / 1000
+        )
+
+    # API needs cookie and is throttled like NSE, which answers with 403 in both cases
+    if request.url.path.startswith("/api/"):
+        client = request.client.host if request.client else "unknown"
+        if (
+            _is_rate_limited(client)
+            or not _has_valid_cookie(request)
+            or random.random() < sc().nse_emulator_403_rate
+        ):
+            request_stats[f"{request.url.path} 403"] += 1
+            return Response(status_code=403)
+
+    response = await call_next(request)
+    request_stats[f"{request.url.path} {response.status_code}"] += 1
+    return response
+
+
+def _respond(request: Request, synthetic_data: Callable[[], Any]) -> JSONResponse:
+    # Recorded response is preferred over synthetic data
+    data = load_fixture(str(request.url))
+    if data is None:
+        data = synthetic_data()
+
+    return JSONResponse(data)
+
+
+@app.get("/get-quotes/equity")
+async def equity_page():
+    response = Response(content="<html></html>", media_type="text/html")
+    response.set_cookie(
+        COOKIE_NAME, str(time.time()), max_age=sc().nse_emulator_cookie_ttl
+    )
+    return response
+
+
+@app.get("/api/marketStatus")
+async def market_status(request: Request):
+    return _respond(request, synthetic.market_status)
+
+
+@app.get("/api/quote-equity")
+async def quote_equity(request: Request, symbol: str, section: str | None = None):
+    if section == "trade_info":
+        return _respond(request, lambda: synthetic.stock_trade_info(symbol))
+
+    return _respond(request, lambda: synthetic.stock_quote(symbol))
+
+
+@app.get("/api/market-data-pre-open")
+async def market_pre_open(request: Request):
+    return _respond(request, lambda: synthetic.market_pre_open(_get_symbols()))
+
+
+@app.get("/api/live-analysis-data-52weekhighstock")
+async def stocks_52_week_high(request: Request):
+    return _respond(request, lambda: synthetic.stocks_52_week(_get_symbols(), True))
+
+
+@app.get("/api/live-analysis-data-52weeklowstock")
+async def stocks_52_week_low(request: Request):
+    return _respond(request, lambda: synthetic.stocks_52_week(_get_symbols(), False))
+
+
+@app.get("/api/live-analysis-volume-gainers")
+async def weekly_volume_gainers(request: Request):
+    return _respond(request, lambda: synthetic.weekly_volume_gainers(_get_symbols()))
+
+
+@app.get("/api/NextApi/apiClient/GetQuoteApi")
+async def stock_history(
+    request: Request,
+    symbol: str,
+    fromDate: str,
+    toDate: str,
+):
+    return _respond(request, lambda: synthetic.stock_history(symbol, fromDate, toDate))
+
+
+@app.get("/api/top-corp-info")
+async def corporate_filing_info(request: Request, symbol: str):
+    return _respond(request, lambda: synthetic.corporate_filing_info(symbol))
+
+
+@app.get("/emulator/stats")
+async def emulator_stats():
+    return dict(request_stats)
@@ -0,0 +1,43 @@
+import json
+import os
+import re
+import urllib.parse
+from typing import Any
+
+from server_config import get_server_config as sc
+
+
+def get_fixture_path(url: str) -> str:
+    """
+    Returns the fixture file path for given NSE URL.
+    Host is ignored so that fixtures recorded from NSE can be replayed against any base URL.
+    """
+    parsed_url = urllib.parse.urlsplit(url)
+
+    # Sort query params so that same request always maps to same file
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parsed_url.query)))
+    name = parsed_url.path.strip("/").replace("/", "_")
+    if query:
+        name = f"{name}__{query}"
+
+    # Keep file name safe for all OS
+    name = re.sub(r"[^A-Za-z0-9_.=&-]", "-", name)
+
+    return os.path.join(sc().nse_fixtures_dir, f"{name}.json")
+
+
+def load_fixture(url: str) -> Any | None:
+    fixture_path = get_fixture_path(url)
+    if not os.path.exists(fixture_path):
+        return None
+
+    with open(fixture_path, encoding="utf-8") as fixture:
+        return json.load(fixture)
+
+
+def save_fixture(url: str, data: Any):
+    fixture_path = get_fixture_path(url)
+    os.makedirs(os.path.dirname(fixture_path), exist_ok=True)
+
+    with open(fixture_path, "w", encoding="utf-8") as fixture:
+        json.dump(data, fixture, ensure_ascii=False)
@@ -1,4 +1,8 @@
+import asyncio
 from functools import cache
+from typing import Any
+
+from server_config import get_server_config as sc
 
 from . import config as conf
 from .models import (
@@ -28,8 +32,15 @@ def _get_nse_client() -> NSEHttpClient:
     return nse_client
 
 
-def get_all_markets_state() -> list[MarketStatusMcp] | None:
-    data = _get_nse_client().get_nse_data(conf.MARKET_STATUS_URL)
+def get_all_markets_state(
+    cache_ttl: float | None = None,
+) -> list[MarketStatusMcp] | None:
+    data = _get_nse_client().get_nse_data(
+        conf.MARKET_STATUS_URL,
+        cache_ttl=sc().shared_cache_market_state_ttl
+        if cache_ttl is None
+        else cache_ttl,
+    )
     if data is None:
         return None
 
@@ -63,7 +74,9 @@ def get_capital_market_state() -> MarketStatus | None:
 
 
 def get_all_market_pre_open() -> list[MarketPreOpenMcp] | None:
-    data = _get_nse_client().get_nse_data(conf.MARKET_PRE_OPEN_URL)
+    data = _get_nse_client().get_nse_data(
+        conf.MARKET_PRE_OPEN_URL, cache_ttl=sc().shared_cache_pre_open_ttl
+    )
     if data is None:
         return None
 
@@ -74,28 +87,32 @@ def get_all_market_pre_open() -> list[MarketPreOpenMcp] | None:
     ]
 
 
-def get_stock_details(
-    symbol: str,
-    with_trade: bool = False,
-) -> StockDetailResponse | None:
-    # Get Stock Data
-    data = _get_nse_client().get_nse_data(conf.STOCK_QUOTE_URL, {"symbol": symbol})
+async def get_nse_sections(
+    url: str,
+    sections: list[dict[str, str]],
+    cache_ttl: float = 0,
+) -> list[Any | None]:
+    """
+    Fetches several sections of same NSE API concurrently, like quote and its trade info.
+    Responses are returned in order of sections, None for failed ones.
+    """
+    return await asyncio.gather(
+        *(
+            _get_nse_client().aget_nse_data(url, params, cache_ttl=cache_ttl)
+            for params in sections
+        )
+    )
+
 
+def _parse_stock_details(
+    data: Any | None, trade_data: Any | None
+) -> StockDetailResponse | None:
     if data is None:
         return None
 
     data["tradeInfo"] = OrderBookTradeInfo().model_dump()
     stock_data = StockDetailResponse.model_validate(data)
 
-    # If trade info not requested, return the data
-    if not with_trade:
-        return stock_data
-
-    # Get Stock Trade Data
-    trade_data = _get_nse_client().get_nse_data(
-        conf.STOCK_QUOTE_URL, {"symbol": symbol, "section": "trade_info"}
-    )
-
     if trade_data is None:
         return stock_data
 
@@ -106,10 +123,50 @@ def get_stock_details(
     return stock_data
 
 
+async def aget_stock_details(
+    symbol: str,
+    with_trade: bool = False,
+    cache_ttl: float | None = None,
+) -> StockDetailResponse | None:
+    # Get Stock Data and Trade Data together
+    sections = [{"symbol": symbol}]
+    if with_trade:
+        sections.append({"symbol": symbol, "section": "trade_info"})
+
+    responses = await get_nse_sections(
+        conf.STOCK_QUOTE_URL,
+        sections,
+        cache_ttl=sc().shared_cache_quote_ttl if cache_ttl is None else cache_ttl,
+    )
+    return _parse_stock_details(responses[0], responses[1] if with_trade else None)
+
+
+def get_stock_details(
+    symbol: str,
+    with_trade: bool = False,
+    cache_ttl: float | None = None,
+) -> StockDetailResponse | None:
+    # Sections are fetched one after other, use `aget_stock_details` to fetch them together
+    sections = [{"symbol": symbol}]
+    if with_trade:
+        sections.append({"symbol": symbol, "section": "trade_info"})
+
+    responses = [
+        _get_nse_client().get_nse_data(
+            conf.STOCK_QUOTE_URL,
+            params,
+            cache_ttl=sc().shared_cache_quote_ttl if cache_ttl is None else cache_ttl,
+        )
+        for params in sections
+    ]
+    return _parse_stock_details(responses[0], responses[1] if with_trade else None)
+
+
 def get_stock_history_for_specific_range(
     symbol: str,
     from_date: str,
     to_date: str,
+    cache_ttl: float | None = None,
 ) -> list[StockHistoryData] | None:
     # Get Stock Detail
     detail = get_stock_details(symbol)
@@ -132,6 +189,7 @@ def get_stock_history_for_specific_range(
             "fromDate": from_date,
             "toDate": to_date,
         },
+        cache_ttl=sc().shared_cache_history_ttl if cache_ttl is None else cache_ttl,
     )
 
     if data is None:
@@ -0,0 +1,55 @@
+from datetime import date, datetime, time, timedelta
+from functools import cache
+from zoneinfo import ZoneInfo
+
+from server_config import get_server_config as sc
+
+IST = ZoneInfo("Asia/Kolkata")
+
+# Equity market session in IST
+PRE_OPEN_TIME = time(9, 0)
+OPEN_TIME = time(9, 15)
+CLOSE_TIME = time(15, 30)
+POST_CLOSE_TIME = time(16, 0)
+
+
+def parse_holidays(holidays: str) -> set[date]:
+    return {
+        date.fromisoformat(holiday.strip())
+        for holiday in holidays.split(",")
+        if holiday.strip()
+    }
+
+
+class MarketCalendar:
+    """
+    Trading days and session times of NSE equity market.
+    Weekends and configured holidays are not trading days.
+    """
+
+    def __init__(self, holidays: set[date]):
+        self.holidays: set[date] = holidays
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def next_trading_day(self, day: date) -> date:
+        day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+
+    def is_session_hours(self, now: datetime | None = None) -> bool:
+        """
+        True from pre-open to end of post-close on trading days.
+        """
+        now = (now or datetime.now(IST)).astimezone(IST)
+        return (
+            self.is_trading_day(now.date())
+            and PRE_OPEN_TIME <= now.time() < POST_CLOSE_TIME
+        )
+
+
+@cache
+def get_market_calendar() -> MarketCalendar:
+    return MarketCalendar(parse_holidays(sc().market_holidays))
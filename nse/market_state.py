@@ -0,0 +1,180 @@
+import threading
+from collections.abc import Callable
+from datetime import datetime, time, timedelta
+from functools import cache
+
+from server_config import get_server_config as sc
+from telemetry.metrics import MARKET_OPEN, MARKET_STATE_POLLS
+
+from .helper import get_all_markets_state
+from .market_calendar import (
+    CLOSE_TIME,
+    IST,
+    OPEN_TIME,
+    POST_CLOSE_TIME,
+    PRE_OPEN_TIME,
+    get_market_calendar,
+)
+from .models import MarketStatus, MarketStatusMcp
+from .request_scheduler import RequestPriority, request_priority
+
+CAPITAL_MARKET = "Capital Market"
+
+# Pre-open, open, close and post-close of equity market in IST
+SESSION_TRANSITIONS: list[time] = [
+    PRE_OPEN_TIME,
+    OPEN_TIME,
+    CLOSE_TIME,
+    POST_CLOSE_TIME,
+]
+
+# Called with market, previous status and new status when status of a market changes
+MarketStateListener = Callable[[str, MarketStatus | None, MarketStatus | None], None]
+
+
+class MarketStatePoller:
+    """
+    Polls NSE market state in background thread and keeps latest state of every market,
+    so tools read it without calling NSE. Polls faster around session transitions.
+    """
+
+    def __init__(
+        self,
+        poll_seconds: float,
+        fast_poll_seconds: float,
+        transition_window_minutes: int,
+    ):
+        self.poll_seconds: float = poll_seconds
+        self.fast_poll_seconds: float = fast_poll_seconds
+        self.transition_window: timedelta = timedelta(minutes=transition_window_minutes)
+        self.last_polled_at: datetime | None = None
+        self._states: dict[str, MarketStatusMcp] = {}
+        self._listeners: list[MarketStateListener] = []
+        self._lock = threading.Lock()
+        self._polled = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def get_poll_interval(self, now: datetime | None = None) -> float:
+        now = now or datetime.now(IST)
+        if not get_market_calendar().is_trading_day(now.date()):
+            return self.poll_seconds
+
+        for transition in SESSION_TRANSITIONS:
+            at = datetime.combine(now.date(), transition, IST)
+            if abs(now - at) <= self.transition_window:
+                return self.fast_poll_seconds
+
+        return self.poll_seconds
+
+    def poll(self):
+        """
+        Fetches state of all markets and notifies listeners of changed markets.
+        Last known state is kept if NSE can not be reached.
+        """
+        # Workers share one NSE call through shared cache, TTL up to the fast poll
+        # interval delays transitions by no more than one fast poll
+        states = get_all_markets_state(
+            cache_ttl=min(sc().shared_cache_market_state_ttl, self.fast_poll_seconds)
+        )
+        if states is None:
+            MARKET_STATE_POLLS.inc(result="error")
+            self._polled.set()
+            return
+
+        MARKET_STATE_POLLS.inc(result="ok")
+        new_states = {state.market: state for state in states}
+        with self._lock:
+            old_states = self._states
+            self._states = new_states
+            self.last_polled_at = datetime.now(IST)
+            listeners = list(self._listeners)
+        self._polled.set()
+
+        for market in old_states.keys() | new_states.keys():
+            old = old_states.get(market)
+            new = new_states.get(market)
+            old_status = old.marketStatus if old else None
+            new_status = new.marketStatus if new else None
+            MARKET_OPEN.set(1 if new_status == MarketStatus.OPEN else 0, market=market)
+            if old_status == new_status:
+                continue
+
+            for listener in listeners:
+                try:
+                    listener(market, old_status, new_status)
+                except Exception as e:
+                    print(f"Market state listener failed: {e}")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                with request_priority(RequestPriority.PREFETCH):
+                    self.poll()
+            except Exception as e:
+                print(f"Failed to poll market state: {e}")
+                self._polled.set()
+            self._stop_event.wait(self.get_poll_interval())
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def wait_for_first_poll(self, timeout: float = 10) -> bool:
+        """
+        Blocks until first poll finished, only for warm-up and never in a request.
+        """
+        self.start()
+        return self._polled.wait(timeout)
+
+    def get_state(self, market: str = CAPITAL_MARKET) -> MarketStatusMcp | None:
+        """
+        Latest state without waiting, None until first poll finished.
+        """
+        self.start()
+        return self._states.get(market)
+
+    def get_status(self, market: str = CAPITAL_MARKET) -> MarketStatus | None:
+        state = self.get_state(market)
+        return state.marketStatus if state is not None else None
+
+    def get_all_states(self) -> list[MarketStatusMcp]:
+        self.start()
+        return list(self._states.values())
+
+    def subscribe(self, listener: MarketStateListener) -> Callable[[], None]:
+        """
+        Registers listener for status changes, returns function to unsubscribe.
+        Listeners are called from poller thread and must not block.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+        def unsubscribe():
+            with self._lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+
+        return unsubscribe
+
+
+@cache
+def get_market_state_poller() -> MarketStatePoller:
+    return MarketStatePoller(
+        sc().market_state_poll_seconds,
+        sc().market_state_fast_poll_seconds,
+        sc().market_state_transition_window_minutes,
+    )
+
+
+def get_market_status(market: str = CAPITAL_MARKET) -> MarketStatus | None:
+    """
+    Latest status of market from poller, started on first use. None until first poll.
+    """
+    return get_market_state_poller().get_status(market)
@@ -1,41 +1,133 @@
+import asyncio
+import threading
 import time
 import urllib.parse
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
 from typing import Any
 
 import httpx
-from httpx_retries import Retry, RetryTransport
 
 from server_config import get_server_config as sc
+from telemetry.metrics import (
+    CACHE_REQUESTS,
+    NSE_COOKIE_REFRESHES,
+    NSE_HEDGED_REQUESTS,
+    NSE_REQUEST_DURATION,
+    NSE_REQUESTS,
+    NSE_RETRIES,
+    NSE_RETRIES_DENIED,
+    NSE_STALE_RESPONSES,
+)
+from telemetry.tracing import span, traced
 
 from . import config as conf
+from .circuit_breaker import get_circuit_breaker
+from .fixtures import load_fixture, save_fixture
+from .request_scheduler import RequestPriority, get_request_scheduler, request_priority
+from .retry_policy import RETRY_STATUS_CODES, get_retry_policy
+from .shared_cache import get_shared_cache
+from .stale_responses import StaleResponseCache
+
+# Shared cache key of NSE cookies
+COOKIES_CACHE_KEY = "nse:cookies"
 
 
 class NSEHttpClient:
     def __init__(self):
-        # Set Retry transport for Httpx
-        retry: Retry = Retry(total=3, backoff_factor=0.5)
-        self.retry_transport: RetryTransport = RetryTransport(retry=retry)
+        # Connection pool shared by all clients, retries are done by `get_retry_policy`
+        self.transport: httpx.HTTPTransport = httpx.HTTPTransport()
+        self.cookies: httpx.Cookies = httpx.Cookies()
+        self.cookies_expire_at: float = 0
 
-        # Set Initial Cookie
-        self._set_nse_cookies()
+        # Last good responses, served while NSE is failing
+        self.stale_responses: StaleResponseCache = StaleResponseCache(
+            sc().nse_stale_max_entries, sc().nse_stale_max_age_seconds
+        )
+        self._revalidating: set[str] = set()
+        self._revalidating_lock = threading.Lock()
+        self._revalidate_executor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="nse-revalidate"
+        )
+        self._hedge_executor = ThreadPoolExecutor(
+            max_workers=16, thread_name_prefix="nse-hedge"
+        )
 
-    def _set_nse_cookies(self):
+        # Set Initial Cookie, not needed when replaying recorded responses
+        if sc().nse_record_mode != "replay":
+            self._set_nse_cookies()
+
+    @traced("nse.cookie_refresh")
+    def _fetch_nse_cookies(self):
         """
         This method is used to set the cookies required for NSE API requests.
         It initializes a session and fetches the cookies from the base URL.
         """
-        client = httpx.Client(transport=self.retry_transport)
+        NSE_COOKIE_REFRESHES.inc()
+        client = httpx.Client(
+            transport=self.transport,
+            timeout=get_retry_policy().request_timeout_seconds,
+        )
         client.headers.update(conf.NSE_HEADER)
         client.get(f"{conf.EQUITY_URL}{sc().test_symbol}")
         self.cookies = client.cookies
 
+        # Refresh before first cookie expires
+        expiries = [cookie.expires for cookie in self.cookies.jar if cookie.expires]
+        ttl = sc().shared_cache_cookie_ttl
+        if expiries:
+            ttl = max(min(min(expiries) - time.time(), ttl), 1)
+        self.cookies_expire_at = time.time() + ttl
+
+    def _dump_cookies(self) -> list[list[str]]:
+        return sorted(
+            [cookie.name, cookie.value or "", cookie.domain, cookie.path]
+            for cookie in self.cookies.jar
+        )
+
+    def _load_cookies(self, cookies: list[list[str]], expires_at: float):
+        self.cookies = httpx.Cookies()
+        for name, value, domain, path in cookies:
+            self.cookies.set(name, value, domain=domain, path=path)
+        self.cookies_expire_at = expires_at
+
+    def _set_nse_cookies(self, rejected: bool = False):
+        """
+        Sets cookies shared by all workers, so only one of them fetches new cookies from NSE.
+        If current cookies were rejected by NSE, they are not reused from shared cache.
+        """
+        shared_cache = get_shared_cache()
+        if shared_cache is None:
+            self._fetch_nse_cookies()
+            return
+
+        rejected_cookies = self._dump_cookies() if rejected else None
+        with shared_cache.lock(COOKIES_CACHE_KEY):
+            # Reuse cookies fetched by other worker
+            entry = shared_cache.get_entry(COOKIES_CACHE_KEY)
+            if entry is not None and entry[0] != rejected_cookies:
+                self._load_cookies(*entry)
+                return
+
+            self._fetch_nse_cookies()
+            shared_cache.set(
+                COOKIES_CACHE_KEY,
+                self._dump_cookies(),
+                self.cookies_expire_at - time.time(),
+            )
+
     def _check_cookie_expired(self):
         """
         This method checks if the cookies have expired.
         If they have, it reinitializes the session and fetches new cookies.
         """
-        if not self.cookies or not self.cookies.jar:
+        if (
+            not self.cookies
+            or not self.cookies.jar
+            or time.time() > self.cookies_expire_at
+        ):
             self._set_nse_cookies()
+            return
 
         for cookie in self.cookies.jar:
             if cookie.is_expired():
@@ -51,48 +143,231 @@ class NSEHttpClient:
         return httpx.Client(
             cookies=self.cookies,
             headers=conf.NSE_HEADER,
-            transport=self.retry_transport,
+            transport=self.transport,
         )
 
     def get_nse_data(
         self,
         url: str,
         params: dict[str, str] | None = None,
+        cache_ttl: float = 0,
     ) -> Any | None:
         """
         This method fetches data from the given NSE URL.
         It returns the JSON response if successful, or None if there is an error.
+        With `cache_ttl`, response is shared by all workers for given seconds.
         """
         if params is not None and len(params) > 0:
             url_params = urllib.parse.urlencode(params)
             url = f"{url}?{url_params}"
 
-        try:
-            client = self._get_http_client()
-            response = client.get(url)
+        if sc().nse_record_mode == "replay":
+            return self._fetch_nse_data(url)
 
-            # Implement retry with cookie refresh if 403 error - Attempt 1
-            if response.status_code == 403:
-                time.sleep(1)
-                self._set_nse_cookies()
-                client = self._get_http_client()
-                response = client.get(url)
+        endpoint = urllib.parse.urlsplit(url).path
+        breaker = get_circuit_breaker(endpoint)
+        stale = self.stale_responses.get(url)
 
-            # Implement retry with cookie refresh if 403 error - Attempt 2
-            if response.status_code == 403:
-                time.sleep(2)
-                self._set_nse_cookies()
-                client = self._get_http_client()
-                response = client.get(url)
+        # NSE is failing, answer with last good response and check NSE in background
+        if stale is not None and not breaker.is_closed():
+            self._revalidate_in_background(url, cache_ttl)
+            return self._serve_stale(url, endpoint, *stale)
 
-            response.raise_for_status()
-            return response.json()
-        except httpx.ReadTimeout:
-            print("Fail to read NSE even after multiple retries")
-            return None
-        except httpx.HTTPStatusError as e:
-            print(f"HTTP error occurred: {e}")
-            return None
-        except Exception as e:
-            print(f"An error occurred: {e}")
+        # Fail fast while circuit is open
+        if not breaker.allow():
+            NSE_REQUESTS.inc(endpoint=endpoint, status="circuit_open")
             return None
+
+        data = self._get_fresh_nse_data(url, cache_ttl)
+        if data is None and stale is not None:
+            return self._serve_stale(url, endpoint, *stale)
+        return data
+
+    def _get_fresh_nse_data(self, url: str, cache_ttl: float) -> Any | None:
+        # Serve from cache shared by workers, only one of them fetches on miss
+        shared_cache = get_shared_cache()
+        if cache_ttl > 0 and shared_cache is not None and sc().nse_record_mode == "off":
+            with span("nse.shared_cache", path=urllib.parse.urlsplit(url).path):
+                data = shared_cache.get_or_set(
+                    f"nse:{url}", cache_ttl, lambda: self._fetch_nse_data(url)
+                )
+        else:
+            data = self._fetch_nse_data(url)
+
+        if data is not None:
+            self.stale_responses.put(url, data)
+        return data
+
+    def _serve_stale(self, url: str, endpoint: str, data: Any, age: float) -> Any:
+        NSE_STALE_RESPONSES.inc(endpoint=endpoint)
+        with span("nse.stale", path=endpoint, age_seconds=round(age, 1)):
+            return self.stale_responses.serve(url, data, age)
+
+    def _revalidate_in_background(self, url: str, cache_ttl: float):
+        with self._revalidating_lock:
+            if url in self._revalidating:
+                return
+            self._revalidating.add(url)
+
+        def revalidate():
+            try:
+                breaker = get_circuit_breaker(urllib.parse.urlsplit(url).path)
+                if breaker.allow():
+                    with request_priority(RequestPriority.PREFETCH):
+                        self._get_fresh_nse_data(url, cache_ttl)
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(url)
+
+        self._revalidate_executor.submit(revalidate)
+
+    async def aget_nse_data(
+        self,
+        url: str,
+        params: dict[str, str] | None = None,
+        cache_ttl: float = 0,
+    ) -> Any | None:
+        """
+        Async variant of `get_nse_data`, runs in a thread so several requests can run concurrently.
+        """
+        return await asyncio.to_thread(self.get_nse_data, url, params, cache_ttl)
+
+    def _get(self, url: str, endpoint: str, timeout: float) -> httpx.Response:
+        with get_request_scheduler().slot():
+            start = time.perf_counter()
+            response = self._get_http_client().get(url, timeout=timeout)
+        if response.status_code not in RETRY_STATUS_CODES:
+            get_retry_policy().latencies.observe(endpoint, time.perf_counter() - start)
+        return response
+
+    def _send(self, url: str, endpoint: str, deadline: float) -> httpx.Response:
+        """
+        Sends request, hedged endpoints send a second one if first is slower than p95.
+        """
+        policy = get_retry_policy()
+        timeout = policy.get_timeout(deadline)
+        hedge_delay = policy.get_hedge_delay(endpoint)
+        if hedge_delay is None:
+            return self._get(url, endpoint, timeout)
+
+        first = self._hedge_executor.submit(
+            copy_context().run, self._get, url, endpoint, timeout
+        )
+        done, _ = wait([first], timeout=hedge_delay)
+        if done or not policy.budget.try_spend():
+            return first.result()
+
+        second = self._hedge_executor.submit(
+            copy_context().run, self._get, url, endpoint, policy.get_timeout(deadline)
+        )
+
+        # Take first successful response, or error of first request if both fail
+        pending: set[Future[httpx.Response]] = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    NSE_HEDGED_REQUESTS.inc(
+                        endpoint=endpoint,
+                        winner="hedge" if future is second else "first",
+                    )
+                    return future.result()
+
+        NSE_HEDGED_REQUESTS.inc(endpoint=endpoint, winner="none")
+        return first.result()
+
+    def _fetch_nse_data(self, url: str) -> Any | None:
+        endpoint = urllib.parse.urlsplit(url).path
+        with span("nse.get", path=endpoint) as nse_span:
+            # Serve recorded response without network
+            if sc().nse_record_mode == "replay":
+                data = load_fixture(url)
+                CACHE_REQUESTS.inc(
+                    cache="nse_fixture", result="miss" if data is None else "hit"
+                )
+                if data is None:
+                    print(f"No recorded response found for {url}")
+                if nse_span is not None:
+                    nse_span.set(source="fixture", hit=data is not None)
+                return data
+
+            breaker = get_circuit_breaker(endpoint)
+            policy = get_retry_policy()
+            policy.budget.record_request()
+            deadline = policy.get_deadline()
+            retries = 0
+            start = time.perf_counter()
+            try:
+                # Retry failed attempts within deadline and process wide retry budget
+                attempt = 1
+                while True:
+                    response: httpx.Response | None = None
+                    error: httpx.TransportError | None = None
+                    try:
+                        response = self._send(url, endpoint, deadline)
+                        if response.status_code not in RETRY_STATUS_CODES:
+                            break
+                    except httpx.TransportError as e:
+                        error = e
+
+                    backoff = policy.get_backoff(attempt)
+                    denied = policy.get_retry_denial(attempt, deadline, backoff)
+                    if denied is not None:
+                        if denied != "attempts":
+                            NSE_RETRIES_DENIED.inc(endpoint=endpoint, reason=denied)
+                        if error is not None:
+                            raise error
+                        break
+
+                    attempt += 1
+                    retries += 1
+                    time.sleep(backoff)
+
+                    # Cookies were rejected, get new ones before next attempt
+                    if response is not None and response.status_code == 403:
+                        self._set_nse_cookies(rejected=True)
+
+                # Client errors like unknown symbol are not NSE failures
+                if response.status_code in (403, 429) or response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+
+                NSE_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+                NSE_REQUEST_DURATION.observe(
+                    time.perf_counter() - start, endpoint=endpoint
+                )
+                if retries:
+                    NSE_RETRIES.inc(retries, endpoint=endpoint)
+                if nse_span is not None:
+                    nse_span.set(
+                        source="nse",
+                        status=response.status_code,
+                        retries=retries,
+                        bytes=len(response.content),
+                    )
+
+                response.raise_for_status()
+                data = response.json()
+
+                # Record response for replay
+                if sc().nse_record_mode == "record":
+                    save_fixture(url, data)
+
+                return data
+            except httpx.TimeoutException:
+                print("Fail to read NSE even after multiple retries")
+                breaker.record_failure()
+                NSE_REQUESTS.inc(endpoint=endpoint, status="timeout")
+                if nse_span is not None:
+                    nse_span.error = "ReadTimeout"
+                return None
+            except httpx.HTTPStatusError as e:
+                print(f"HTTP error occurred: {e}")
+                return None
+            except Exception as e:
+                print(f"An error occurred: {e}")
+                breaker.record_failure()
+                if nse_span is not None:
+                    nse_span.error = f"{type(e).__name__}: {e}"
+                return None
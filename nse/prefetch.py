@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import cache
+
+from server_config import get_server_config as sc
+from telemetry.metrics import PREFETCH_HITS, PREFETCHES
+
+from .helper import get_stock_details, get_stock_history_for_specific_range
+from .request_scheduler import RequestPriority, request_priority
+from .shared_cache import get_shared_cache
+
+
+def quote_key(symbol: str) -> str:
+    return f"quote:{symbol.upper()}"
+
+
+def history_key(symbol: str, from_date: str, to_date: str) -> str:
+    return f"history:{symbol.upper()}:{from_date}:{to_date}"
+
+
+class Prefetcher:
+    """
+    Fetches quote and recent history of a symbol into shared cache in background,
+    so the tool call which usually follows a symbol search is a cache hit.
+    At most `max_pending` prefetches wait or run, others are dropped.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, ttl_seconds: float):
+        self.max_pending: int = max_pending
+        self.ttl_seconds: float = ttl_seconds
+        self._pending: int = 0
+        # Symbols prefetched recently and when
+        self._recent: OrderedDict[str, float] = OrderedDict()
+        # Keys of responses prefetched successfully and when they expire in cache
+        self._prefetched: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="nse-prefetch"
+        )
+
+    def _is_recent(self, symbol: str) -> bool:
+        prefetched_at = self._recent.get(symbol)
+        return (
+            prefetched_at is not None
+            and time.monotonic() - prefetched_at < self.ttl_seconds
+        )
+
+    def prefetch_symbol(self, symbol: str) -> bool:
+        """
+        Queues prefetch of symbol, returns False if it was skipped.
+        """
+        with self._lock:
+            if self._is_recent(symbol):
+                PREFETCHES.inc(result="recent")
+                return False
+            if self._pending >= self.max_pending:
+                PREFETCHES.inc(result="dropped")
+                return False
+
+            self._pending += 1
+            self._recent[symbol] = time.monotonic()
+            self._recent.move_to_end(symbol)
+            while len(self._recent) > 1000:
+                self._recent.popitem(last=False)
+
+        PREFETCHES.inc(result="queued")
+        self._executor.submit(self._prefetch, symbol)
+        return True
+
+    def _record_prefetched(self, key: str, ttl: float):
+        with self._lock:
+            self._prefetched[key] = time.monotonic() + ttl
+            self._prefetched.move_to_end(key)
+            while len(self._prefetched) > 2000:
+                self._prefetched.popitem(last=False)
+
+    def _prefetch(self, symbol: str):
+        try:
+            with request_priority(RequestPriority.PREFETCH):
+                # Quote is kept long enough to last until next LLM step
+                if get_stock_details(symbol, cache_ttl=self.ttl_seconds) is not None:
+                    self._record_prefetched(quote_key(symbol), self.ttl_seconds)
+
+                # Same window as history tool is usually asked for
+                now = datetime.now()
+                to_date = now.strftime("%d-%m-%Y")
+                from_date = (now - timedelta(days=sc().prefetch_history_days)).strftime(
+                    "%d-%m-%Y"
+                )
+                if (
+                    get_stock_history_for_specific_range(symbol, from_date, to_date)
+                    is not None
+                ):
+                    self._record_prefetched(
+                        history_key(symbol, from_date, to_date),
+                        sc().shared_cache_history_ttl,
+                    )
+            PREFETCHES.inc(result="done")
+        except Exception as e:
+            print(f"Failed to prefetch {symbol}: {e}")
+            PREFETCHES.inc(result="failed")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def record_use(self, key: str, tool: str):
+        """
+        Counts tool calls which read a response prefetched under same key, like `quote_key`.
+        """
+        with self._lock:
+            expires_at = self._prefetched.get(key)
+            if expires_at is not None and time.monotonic() < expires_at:
+                PREFETCH_HITS.inc(tool=tool)
+
+
+@cache
+def get_prefetcher() -> Prefetcher | None:
+    # Prefetched responses are kept only in shared cache
+    if not sc().prefetch_enabled or get_shared_cache() is None:
+        return None
+
+    return Prefetcher(
+        sc().prefetch_max_workers, sc().prefetch_max_pending, sc().prefetch_ttl_seconds
+    )
@@ -0,0 +1,113 @@
+import heapq
+import itertools
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from functools import cache
+
+from server_config import get_server_config as sc
+from telemetry.metrics import NSE_IN_FLIGHT, NSE_QUEUE_WAIT
+
+
+class RequestPriority(IntEnum):
+    # User is waiting for the answer, like tool calls
+    INTERACTIVE = 0
+    # Speculative or background fetches which make later answers faster
+    PREFETCH = 1
+    # Large batches like metadata refresh
+    BULK = 2
+
+
+# Priority of NSE requests made in current context, tool calls are interactive
+_request_priority: ContextVar[RequestPriority] = ContextVar(
+    "request_priority", default=RequestPriority.INTERACTIVE
+)
+
+
+@contextmanager
+def request_priority(priority: RequestPriority) -> Iterator[None]:
+    """
+    Runs NSE requests made inside the block with given priority.
+    """
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def get_request_priority() -> RequestPriority:
+    return _request_priority.get()
+
+
+class RequestScheduler:
+    """
+    Limits concurrent requests to NSE and grants free slots by priority.
+    Bulk requests also wait while interactive requests were seen in last `bulk_yield_seconds`,
+    so refresh backs off as soon as users start asking.
+    """
+
+    def __init__(self, max_concurrent: int, bulk_yield_seconds: float):
+        self.max_concurrent: int = max_concurrent
+        self.bulk_yield_seconds: float = bulk_yield_seconds
+        self._in_flight: int = 0
+        self._waiting: list[tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._last_interactive_at: float = 0
+        self._cond = threading.Condition()
+
+    def _can_start(self, ticket: tuple[int, int]) -> bool:
+        if self._waiting[0] != ticket or self._in_flight >= self.max_concurrent:
+            return False
+
+        if ticket[0] == RequestPriority.BULK:
+            return (
+                time.monotonic() - self._last_interactive_at >= self.bulk_yield_seconds
+            )
+
+        return True
+
+    @contextmanager
+    def slot(self, priority: RequestPriority | None = None) -> Iterator[None]:
+        """
+        Waits for a free slot, higher priority requests which are waiting go first.
+        """
+        priority = get_request_priority() if priority is None else priority
+        ticket = (int(priority), next(self._sequence))
+        start = time.perf_counter()
+
+        with self._cond:
+            if priority == RequestPriority.INTERACTIVE:
+                self._last_interactive_at = time.monotonic()
+            heapq.heappush(self._waiting, ticket)
+
+            # Bulk requests wake up to check if interactive load is over
+            while not self._can_start(ticket):
+                self._cond.wait(timeout=0.1)
+
+            heapq.heappop(self._waiting)
+            self._in_flight += 1
+            NSE_IN_FLIGHT.set(self._in_flight)
+            # Next waiter may also fit in free slots
+            self._cond.notify_all()
+
+        NSE_QUEUE_WAIT.observe(
+            time.perf_counter() - start, priority=priority.name.lower()
+        )
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                NSE_IN_FLIGHT.set(self._in_flight)
+                self._cond.notify_all()
+
+
+@cache
+def get_request_scheduler() -> RequestScheduler:
+    return RequestScheduler(
+        sc().nse_max_concurrent_requests, sc().nse_bulk_yield_seconds
+    )
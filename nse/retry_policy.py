@@ -0,0 +1,137 @@
+import random
+import threading
+import time
+from collections import deque
+from functools import cache
+
+from server_config import get_server_config as sc
+
+# Responses worth retrying, 403 is retried with new cookies
+RETRY_STATUS_CODES: set[int] = {403, 429, 500, 502, 503, 504}
+
+
+class RetryBudget:
+    """
+    Process wide cap on extra requests. Every request adds `ratio` tokens and every
+    retry or hedged request spends one, so extra traffic stays near `ratio` of requests
+    even when NSE is failing. Budget starts with `min_tokens` so a fresh process can retry.
+    """
+
+    def __init__(self, ratio: float, min_tokens: float, max_tokens: float):
+        self.ratio: float = ratio
+        self.max_tokens: float = max_tokens
+        self.tokens: float = min_tokens
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class LatencyTracker:
+    """
+    Recent latencies of each endpoint, used to decide when to hedge a request.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window: int = window
+        self.min_samples: int = min_samples
+        self._latencies: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint: str, seconds: float):
+        with self._lock:
+            self._latencies.setdefault(endpoint, deque(maxlen=self.window)).append(
+                seconds
+            )
+
+    def get_percentile(self, endpoint: str, percentile: float) -> float | None:
+        with self._lock:
+            latencies = sorted(self._latencies.get(endpoint, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percentile))]
+
+
+class RetryPolicy:
+    """
+    Single retry policy of NSE requests. A logical fetch makes at most `max_attempts`
+    attempts within `deadline_seconds`, and each retry must fit in the retry budget.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int,
+        deadline_seconds: float,
+        backoff_seconds: float,
+        request_timeout_seconds: float,
+        budget: RetryBudget,
+        hedge_endpoints: set[str],
+    ):
+        self.max_attempts: int = max_attempts
+        self.deadline_seconds: float = deadline_seconds
+        self.backoff_seconds: float = backoff_seconds
+        self.request_timeout_seconds: float = request_timeout_seconds
+        self.budget: RetryBudget = budget
+        self.hedge_endpoints: set[str] = hedge_endpoints
+        self.latencies: LatencyTracker = LatencyTracker()
+
+    def get_deadline(self) -> float:
+        return time.monotonic() + self.deadline_seconds
+
+    def get_timeout(self, deadline: float) -> float:
+        return max(0.1, min(self.request_timeout_seconds, deadline - time.monotonic()))
+
+    def get_backoff(self, attempt: int) -> float:
+        # Exponential backoff with full jitter
+        return random.uniform(0, self.backoff_seconds * 2 ** (attempt - 1))
+
+    def get_retry_denial(
+        self, attempt: int, deadline: float, backoff: float
+    ) -> str | None:
+        """
+        Returns why next attempt is not allowed, `attempts`, `deadline` or `budget`.
+        Budget is spent only when retry is allowed.
+        """
+        if attempt >= self.max_attempts:
+            return "attempts"
+        if time.monotonic() + backoff >= deadline:
+            return "deadline"
+        if not self.budget.try_spend():
+            return "budget"
+        return None
+
+    def get_hedge_delay(self, endpoint: str) -> float | None:
+        """
+        Delay after which a second request is sent, None if endpoint is not hedged.
+        """
+        if endpoint not in self.hedge_endpoints:
+            return None
+        return self.latencies.get_percentile(endpoint, 0.95)
+
+
+@cache
+def get_retry_policy() -> RetryPolicy:
+    return RetryPolicy(
+        max_attempts=sc().nse_retry_max_attempts,
+        deadline_seconds=sc().nse_retry_deadline_seconds,
+        backoff_seconds=sc().nse_retry_backoff_seconds,
+        request_timeout_seconds=sc().nse_request_timeout_seconds,
+        budget=RetryBudget(
+            sc().nse_retry_budget_ratio,
+            min_tokens=sc().nse_retry_budget_min_tokens,
+            max_tokens=max(sc().nse_retry_budget_min_tokens, 100),
+        ),
+        hedge_endpoints={
+            endpoint.strip()
+            for endpoint in sc().nse_hedge_endpoints.split(",")
+            if endpoint.strip()
+        },
+    )
@@ -0,0 +1,275 @@
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, ExitStack, contextmanager
+from datetime import datetime, timedelta
+from functools import cache
+from typing import Any
+
+from server_config import get_server_config as sc
+from telemetry.metrics import CACHE_REQUESTS
+
+
+class SharedCache(ABC):
+    """
+    Cache shared by all worker processes, values must be JSON serializable.
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def get_entry(self, key: str) -> tuple[Any, float] | None:
+        """
+        Returns value and its expiry as unix time, None if missing or expired.
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float): ...
+
+    @abstractmethod
+    def lock(self, key: str) -> AbstractContextManager[None]:
+        """
+        Lock held by one process at a time, so only one of them loads missing value.
+        """
+
+    def get(self, key: str) -> Any | None:
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_or_set(self, key: str, ttl: float, loader: Callable[[], Any]) -> Any:
+        """
+        Returns cached value, or loads it while holding the lock so concurrent
+        misses in other workers wait and reuse it. None values are not cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            CACHE_REQUESTS.inc(cache=f"shared_{self.name}", result="hit")
+            return value
+
+        with self.lock(key):
+            # Another worker may have loaded it while we waited for lock
+            value = self.get(key)
+            if value is not None:
+                CACHE_REQUESTS.inc(cache=f"shared_{self.name}", result="hit")
+                return value
+
+            CACHE_REQUESTS.inc(cache=f"shared_{self.name}", result="miss")
+            value = loader()
+            if value is not None:
+                self.set(key, value, ttl)
+            return value
+
+
+class ShmSharedCache(SharedCache):
+    """
+    Cache for workers on same host. One file per key in shared memory (`/dev/shm`),
+    written atomically with rename and locked with `flock`.
+    """
+
+    name = "shm"
+
+    def __init__(self, directory: str):
+        self.directory: str = directory
+        os.makedirs(directory, exist_ok=True)
+        self._cleanup_thread: threading.Thread | None = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(
+            self.directory, hashlib.sha256(key.encode()).hexdigest()[:32]
+        )
+
+    def get_entry(self, key: str) -> tuple[Any, float] | None:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if entry["expires_at"] < time.time():
+            return None
+        return entry["value"], entry["expires_at"]
+
+    def set(self, key: str, value: Any, ttl: float):
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.directory, suffix=".tmp", delete=False, encoding="utf-8"
+        ) as f:
+            json.dump({"expires_at": time.time() + ttl, "value": value}, f)
+        os.replace(f.name, self._path(key))
+
+    def _remove_lock_file(self, lock_path: str):
+        # Lock held by a loader is left alone, it is removed in a later cleanup
+        try:
+            with open(lock_path, "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                os.remove(lock_path)
+        except OSError:
+            return
+
+    def remove_expired(self, min_age_seconds: float):
+        """
+        Removes expired entries with their lock files, and lock and temp files
+        older than `min_age_seconds` which have no entry, like when loader found nothing.
+        """
+        now = time.time()
+        with os.scandir(self.directory) as files:
+            filenames = [file.name for file in files]
+
+        for filename in filenames:
+            path = os.path.join(self.directory, filename)
+            try:
+                if filename.endswith((".lock", ".tmp")):
+                    # Entry of a lock file is removed first, so lock file is kept while it exists
+                    entry_path = path.removesuffix(".lock")
+                    if entry_path != path and os.path.exists(entry_path):
+                        continue
+                    if now - os.path.getmtime(path) < min_age_seconds:
+                        continue
+                    if filename.endswith(".lock"):
+                        self._remove_lock_file(path)
+                    else:
+                        os.remove(path)
+                    continue
+
+                with open(path, encoding="utf-8") as f:
+                    if json.load(f)["expires_at"] >= now:
+                        continue
+                os.remove(path)
+                self._remove_lock_file(f"{path}.lock")
+            except (OSError, ValueError, KeyError):
+                continue
+
+    def _run_cleanup(self, interval_seconds: float):
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                self.remove_expired(interval_seconds)
+            except Exception as e:
+                print(f"Failed to clean shared cache: {e}")
+
+    def start_cleanup(self, interval_seconds: float):
+        """
+        Removes expired entries in background thread, so requests never list the directory.
+        """
+        if self._cleanup_thread is not None or interval_seconds <= 0:
+            return
+        self._cleanup_thread = threading.Thread(
+            target=self._run_cleanup, args=(interval_seconds,), daemon=True
+        )
+        self._cleanup_thread.start()
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        with open(f"{self._path(key)}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class PostgresSharedCache(SharedCache):
+    """
+    Cache for workers across hosts in Postgres `UNLOGGED` table, locked with advisory locks.
+    Errors are treated as cache miss so NSE data is still served if database is down.
+    """
+
+    name = "postgres"
+
+    def get_entry(self, key: str) -> tuple[Any, float] | None:
+        from dbman.helper import get_shared_cache_entry
+
+        try:
+            entry = get_shared_cache_entry(key)
+        except Exception as e:
+            print(f"Failed to read shared cache: {e}")
+            return None
+
+        if entry is None:
+            return None
+        return entry.value, entry.expires_at.timestamp()
+
+    def set(self, key: str, value: Any, ttl: float):
+        from dbman.helper import save_shared_cache_entry
+        from dbman.shared_cache_entry import SharedCacheEntry
+
+        try:
+            save_shared_cache_entry(
+                SharedCacheEntry(
+                    key=key,
+                    value=value,
+                    expires_at=datetime.now() + timedelta(seconds=ttl),
+                )
+            )
+        except Exception as e:
+            print(f"Failed to write shared cache: {e}")
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        from dbman.helper import shared_cache_lock
+
+        with ExitStack() as stack:
+            try:
+                stack.enter_context(shared_cache_lock(key))
+            except Exception as e:
+                print(f"Failed to lock shared cache: {e}")
+            yield
+
+
+class TieredSharedCache(SharedCache):
+    """
+    Checks tiers in order and fills faster tiers on hit in slower one.
+    Lock is taken on the last tier, which is shared most widely.
+    """
+
+    def __init__(self, tiers: list[SharedCache]):
+        self.tiers: list[SharedCache] = tiers
+        self.name = "_".join(tier.name for tier in tiers)
+
+    def get_entry(self, key: str) -> tuple[Any, float] | None:
+        for idx, tier in enumerate(self.tiers):
+            entry = tier.get_entry(key)
+            if entry is None:
+                continue
+
+            # Fill faster tiers for remaining TTL
+            value, expires_at = entry
+            for faster_tier in self.tiers[:idx]:
+                faster_tier.set(key, value, expires_at - time.time())
+            return entry
+
+        return None
+
+    def set(self, key: str, value: Any, ttl: float):
+        for tier in self.tiers:
+            tier.set(key, value, ttl)
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        with self.tiers[-1].lock(key):
+            yield
+
+
+@cache
+def get_shared_cache() -> SharedCache | None:
+    if sc().shared_cache == "none":
+        return None
+
+    # Shared memory is tmpfs on Linux, fall back to temp directory elsewhere
+    directory = sc().shared_cache_dir or (
+        "/dev/shm/nse-chatbot"
+        if os.path.isdir("/dev/shm")
+        else os.path.join(tempfile.gettempdir(), "nse-chatbot-cache")
+    )
+    shm_cache = ShmSharedCache(directory)
+    shm_cache.start_cleanup(sc().shared_cache_cleanup_seconds)
+
+    if sc().shared_cache == "postgres":
+        return TieredSharedCache([shm_cache, PostgresSharedCache()])
+
+    return shm_cache
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class StaleResponse:
+    url: str
+    age_seconds: float
+
+
+# Stale responses served during current tool call, list is shared with worker threads
+_served_stale: ContextVar[list[StaleResponse] | None] = ContextVar(
+    "served_stale", default=None
+)
+
+
+@contextmanager
+def track_stale_responses() -> Iterator[list[StaleResponse]]:
+    """
+    Collects stale responses served inside the block, so callers can tell users their age.
+    """
+    served: list[StaleResponse] = []
+    token = _served_stale.set(served)
+    try:
+        yield served
+    finally:
+        _served_stale.reset(token)
+
+
+def format_stale_note(served: list[StaleResponse]) -> str:
+    age = max(response.age_seconds for response in served)
+    if age < 120:
+        age_text = f"{age:.0f} seconds"
+    elif age < 7200:
+        age_text = f"{age / 60:.0f} minutes"
+    else:
+        age_text = f"{age / 3600:.1f} hours"
+    return (
+        f"Note: NSE is not responding, data is from last good response {age_text} ago."
+    )
+
+
+class StaleResponseCache:
+    """
+    Last good response of recent NSE URLs, served when NSE fails or its circuit is open.
+    """
+
+    def __init__(self, max_entries: int, max_age_seconds: float):
+        self.max_entries: int = max_entries
+        self.max_age_seconds: float = max_age_seconds
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, url: str, data: Any):
+        with self._lock:
+            self._entries[url] = (data, time.time())
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, url: str) -> tuple[Any, float] | None:
+        """
+        Returns last good response and its age in seconds.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry is None:
+            return None
+
+        data, fetched_at = entry
+        age = time.time() - fetched_at
+        if age > self.max_age_seconds:
+            return None
+        return data, age
+
+    def serve(self, url: str, data: Any, age: float) -> Any:
+        served = _served_stale.get()
+        if served is not None:
+            served.append(StaleResponse(url, age))
+        return data
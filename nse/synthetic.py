@@ -0,0 +1,417 @@
+import random
+from datetime import datetime, timedelta
+from typing import Any
+from zoneinfo import ZoneInfo
+
+# Well known symbols used by examples and docs, rest of the market is generated
+_KNOWN_COMPANIES: dict[str, tuple[str, str]] = {
+    "TCS": ("Tata Consultancy Services Limited", "Computers - Software & Consulting"),
+    "INFY": ("Infosys Limited", "Computers - Software & Consulting"),
+    "HCLTECH": ("HCL Technologies Limited", "Computers - Software & Consulting"),
+    "WIPRO": ("Wipro Limited", "Computers - Software & Consulting"),
+    "RELIANCE": ("Reliance Industries Limited", "Refineries & Marketing"),
+    "HDFCBANK": ("HDFC Bank Limited", "Private Sector Bank"),
+    "ICICIBANK": ("ICICI Bank Limited", "Private Sector Bank"),
+    "COALINDIA": ("Coal India Limited", "Coal"),
+    "TMPV": (
+        "Tata Motors Passenger Vehicles Limited",
+        "Passenger Cars & Utility Vehicles",
+    ),
+    "IRCTC": (
+        "Indian Railway Catering And Tourism Corporation Limited",
+        "Tour, Travel Related Services",
+    ),
+    "WABAG": ("VA Tech Wabag Limited", "Water Supply & Management"),
+    "HFCL": ("HFCL Limited", "Telecom - Equipment & Accessories"),
+    "ENGINERSIN": ("Engineers India Limited", "Civil Construction"),
+    "63MOONS": ("63 moons technologies limited", "Computers - Software & Consulting"),
+}
+
+_INDUSTRIES: list[tuple[str, str, str, str]] = [
+    (
+        "Information Technology",
+        "Information Technology",
+        "IT - Services",
+        "Computers - Software & Consulting",
+    ),
+    ("Financial Services", "Financial Services", "Banks", "Private Sector Bank"),
+    (
+        "Energy",
+        "Oil Gas & Consumable Fuels",
+        "Petroleum Products",
+        "Refineries & Marketing",
+    ),
+    ("Commodities", "Chemicals", "Petrochemicals", "Petrochemicals"),
+    ("Healthcare", "Healthcare", "Pharmaceuticals & Biotechnology", "Pharmaceuticals"),
+    (
+        "Consumer Discretionary",
+        "Automobile and Auto Components",
+        "Automobiles",
+        "Passenger Cars & Utility Vehicles",
+    ),
+    ("Industrials", "Construction", "Construction", "Civil Construction"),
+]
+
+IST = ZoneInfo("Asia/Kolkata")
+
+
+def _rng(*seed: Any) -> random.Random:
+    # Same symbol always generates same data
+    return random.Random("|".join(str(s) for s in seed))
+
+
+def get_symbols(count: int) -> list[str]:
+    symbols = list(_KNOWN_COMPANIES.keys())[:count]
+    symbols.extend(f"SYN{i:04d}" for i in range(count - len(symbols)))
+    return symbols
+
+
+def _company(symbol: str) -> tuple[str, tuple[str, str, str, str]]:
+    rng = _rng("company", symbol)
+    if symbol in _KNOWN_COMPANIES:
+        name, basic_industry = _KNOWN_COMPANIES[symbol]
+        industry = next(
+            (i for i in _INDUSTRIES if i[3] == basic_industry),
+            (*_INDUSTRIES[0][:3], basic_industry),
+        )
+        return name, industry
+
+    return f"Synthetic {symbol.title()} Limited", rng.choice(_INDUSTRIES)
+
+
+def _price(symbol: str) -> float:
+    return round(_rng("price", symbol).uniform(20, 5000), 2)
+
+
+def is_market_open(now: datetime | None = None) -> bool:
+    now = now or datetime.now(IST)
+    return now.weekday() < 5 and (9, 15) <= (now.hour, now.minute) < (15, 30)
+
+
+def market_status() -> dict[str, Any]:
+    status = "Open" if is_market_open() else "Closed"
+    trade_date = datetime.now(IST).strftime("%d-%b-%Y")
+    return {
+        "marketState": [
+            {
+                "market": market,
+                "marketStatus": status,
+                "tradeDate": trade_date,
+                "index": index,
+                "last": 25000.5,
+                "variation": 12.3,
+                "percentChange": 0.05,
+                "marketStatusMessage": f"Normal Market is {status}",
+            }
+            for market, index in [
+                ("Capital Market", "NIFTY 50"),
+                ("Currency", ""),
+                ("Commodity", ""),
+                ("Debt", ""),
+            ]
+        ]
+    }
+
+
+def stock_quote(symbol: str) -> dict[str, Any]:
+    rng = _rng("quote", symbol, datetime.now(IST).date())
+    name, (macro, sector, industry, basic_industry) = _company(symbol)
+    previous_close = _price(symbol)
+    last_price = round(previous_close * rng.uniform(0.95, 1.05), 2)
+    change = round(last_price - previous_close, 2)
+
+    return {
+        "info": {
+            "symbol": symbol,
+            "companyName": name,
+            "industry": basic_industry,
+            "activeSeries": ["EQ"],
+            "debtSeries": [],
+            "isFNOSec": False,
+            "isCASec": False,
+            "isSLBSec": False,
+            "isDebtSec": False,
+            "isSuspended": False,
+            "tempSuspendedSeries": [],
+            "isETFSec": False,
+            "isDelisted": False,
+            "listingDate": "01-Jan-2004",
+            "isMunicipalBond": False,
+            "isHybridSymbol": False,
+            "identifier": f"{symbol}EQN",
+        },
+        "metadata": {"series": "EQ", "symbol": symbol},
+        "securityInfo": {"issuedSize": 1000000},
+        "sddDetails": {"SDDAuditor": "-", "SDDStatus": "-"},
+        "currentMarketType": "NM",
+        "priceInfo": {
+            "lastPrice": last_price,
+            "change": change,
+            "pChange": round(change / previous_close * 100, 2),
+            "previousClose": previous_close,
+            "open": previous_close,
+            "close": last_price,
+            "vwap": last_price,
+            "stockIndClosePrice": 0,
+            "lowerCP": f"{previous_close * 0.8:.2f}",
+            "upperCP": f"{previous_close * 1.2:.2f}",
+            "pPriceBand": "20",
+            "basePrice": previous_close,
+            "intraDayHighLow": {
+                "min": min(last_price, previous_close),
+                "max": max(last_price, previous_close),
+                "value": last_price,
+            },
+            "weekHighLow": {
+                "min": round(previous_close * 0.7, 2),
+                "minDate": "07-Apr-2025",
+                "max": round(previous_close * 1.3, 2),
+                "maxDate": "26-Sep-2025",
+                "value": last_price,
+            },
+            "iNavValue": None,
+            "checkINAV": False,
+            "tickSize": 0.05,
+            "ieq": "",
+        },
+        "industryInfo": {
+            "macro": macro,
+            "sector": sector,
+            "industry": industry,
+            "basicIndustry": basic_industry,
+        },
+        "preOpenMarket": {
+            "preopen": [{"price": previous_close, "buyQty": 10, "sellQty": 0}],
+            "ato": {"buy": 0, "sell": 0},
+            "IEP": previous_close,
+            "totalTradedVolume": 1000,
+            "finalPrice": previous_close,
+            "finalQuantity": 1000,
+            "lastUpdateTime": datetime.now(IST).strftime("%d-%b-%Y 09:07:59"),
+            "totalBuyQuantity": 5000,
+            "totalSellQuantity": 4000,
+            "atoBuyQty": 0,
+            "atoSellQty": 0,
+            "Change": 0,
+            "perChange": 0,
+            "prevClose": previous_close,
+        },
+    }
+
+
+def stock_trade_info(symbol: str) -> dict[str, Any]:
+    rng = _rng("trade", symbol)
+    price = _price(symbol)
+    volume = round(rng.uniform(0.1, 500), 2)
+
+    return {
+        "bulkBlockDeals": [],
+        "marketDeptOrderBook": {
+            "bid": [{"price": price, "quantity": 100}],
+            "ask": [{"price": round(price + 0.05, 2), "quantity": 100}],
+            "open": price,
+            "totalBuyQuantity": 50000,
+            "totalSellQuantity": 40000,
+            "tradeInfo": {
+                "activeSeries": "EQ",
+                "cmAnnualVolatility": "25.5",
+                "cmDailyVolatility": "1.3",
+                "ffmc": round(rng.uniform(100, 500000), 2),
+                "impactCost": 0.02,
+                "totalMarketCap": round(rng.uniform(100, 1500000), 2),
+                "totalTradedValue": round(volume * price / 100, 2),
+                "totalTradedVolume": volume,
+            },
+        },
+        "noBlockDeals": True,
+        "securityWiseDP": {
+            "deliveryQuantity": 1000,
+            "deliveryToTradedQuantity": 45.5,
+            "quantityTraded": 2200,
+            "secWiseDelPosDate": datetime.now(IST).strftime("%d-%b-%Y EOD"),
+            "seriesRemarks": None,
+        },
+    }
+
+
+def market_pre_open(symbols: list[str]) -> dict[str, Any]:
+    data = []
+    for symbol in symbols:
+        price = _price(symbol)
+        data.append(
+            {
+                "metadata": {
+                    "symbol": symbol,
+                    "identifier": f"{symbol}EQN",
+                    "purpose": None,
+                    "lastPrice": price,
+                    "change": 0,
+                    "pChange": 0,
+                    "previousClose": price,
+                    "finalQuantity": 1000,
+                    "totalTurnover": round(price * 1000, 2),
+                    "marketCap": "-",
+                    "yearHigh": round(price * 1.3, 2),
+                    "yearLow": round(price * 0.7, 2),
+                    "iep": price,
+                    "chartTodayPath": None,
+                },
+                "detail": {},
+            }
+        )
+
+    return {
+        "declines": len(symbols) // 3,
+        "unchanged": len(symbols) // 3,
+        "data": data,
+        "advances": len(symbols) - 2 * (len(symbols) // 3),
+        "timestamp": datetime.now(IST).strftime("%d-%b-%Y 09:08:00"),
+        "totalTradedValue": 1000000.0,
+        "totalmarketcap": 40000000.0,
+        "totalTradedVolume": 100000.0,
+    }
+
+
+def stocks_52_week(symbols: list[str], high: bool) -> dict[str, Any]:
+    # Every 7th symbol is at 52 week high / low
+    selected = symbols[0 if high else 3 :: 7]
+    data = []
+    for symbol in selected:
+        name, _ = _company(symbol)
+        price = _price(symbol)
+        data.append(
+            {
+                "symbol": symbol,
+                "series": "EQ",
+                "comapnyName": name,
+                "new52WHL": price,
+                "prev52WHL": round(price * (0.98 if high else 1.02), 2),
+                "prevHLDate": "01-Sep-2025",
+                "ltp": price,
+                "prevClose": price,
+                "change": 0,
+                "pChange": 0,
+            }
+        )
+
+    response: dict[str, Any] = {
+        "data": data,
+        "timestamp": datetime.now(IST).strftime("%d-%b-%Y %H:%M:%S"),
+    }
+    response["high" if high else "low"] = len(data)
+    return response
+
+
+def weekly_volume_gainers(symbols: list[str]) -> dict[str, Any]:
+    data = []
+    for symbol in symbols[1::11]:
+        rng = _rng("volume", symbol)
+        name, _ = _company(symbol)
+        volume = rng.randint(100000, 10000000)
+        data.append(
+            {
+                "symbol": symbol,
+                "companyName": name,
+                "volume": volume,
+                "week1AvgVolume": volume // 3,
+                "week1volChange": 3.0,
+                "week2AvgVolume": volume // 4,
+                "week2volChange": 4.0,
+                "ltp": _price(symbol),
+                "pChange": round(rng.uniform(-5, 5), 2),
+                "turnover": round(volume * _price(symbol) / 10000000, 2),
+            }
+        )
+
+    return {"data": data, "timestamp": datetime.now(IST).strftime("%d-%b-%Y")}
+
+
+def stock_history(symbol: str, from_date: str, to_date: str) -> list[dict[str, Any]]:
+    start = datetime.strptime(from_date, "%d-%m-%Y")
+    end = datetime.strptime(to_date, "%d-%m-%Y")
+    rng = _rng("history", symbol, from_date)
+    price = _price(symbol)
+
+    history = []
+    day = start
+    while day <= end:
+        # Skip weekends like NSE
+        if day.weekday() < 5:
+            open_price = price
+            price = round(price * rng.uniform(0.97, 1.03), 2)
+            history.append(
+                {
+                    "chSymbol": symbol,
+                    "chSeries": "EQ",
+                    "mtimestamp": day.strftime("%d-%b-%Y"),
+                    "chTradeHighPrice": round(max(open_price, price) * 1.01, 2),
+                    "chTradeLowPrice": round(min(open_price, price) * 0.99, 2),
+                    "chOpeningPrice": open_price,
+                    "chClosingPrice": price,
+                }
+            )
+        day += timedelta(days=1)
+
+    # NSE returns latest day first
+    return list(reversed(history))
+
+
+def corporate_filing_info(symbol: str) -> dict[str, Any]:
+    rng = _rng("corp", symbol)
+    income = round(rng.uniform(100, 100000), 2)
+    promoter = round(rng.uniform(30, 75), 2)
+
+    return {
+        "borad_meeting": {
+            "data": [
+                {
+                    "meetingdate": "09-Oct-2025",
+                    "purpose": "Financial Results",
+                    "symbol": symbol,
+                }
+            ]
+        },
+        "corporate_actions": {
+            "data": [
+                {
+                    "exdate": "16-Oct-2025",
+                    "purpose": "Interim Dividend - Rs 11 Per Share",
+                    "symbol": symbol,
+                }
+            ]
+        },
+        "financial_results": {
+            "data": [
+                {
+                    "from_date": "01-Jul-2025",
+                    "to_date": "30-Sep-2025",
+                    "income": str(income),
+                    "expenditure": str(round(income * 0.8, 2)),
+                    "reProLossBefTax": str(round(income * 0.2, 2)),
+                    "proLossAftTax": str(round(income * 0.15, 2)),
+                    "reDilEPS": str(round(rng.uniform(1, 100), 2)),
+                }
+            ]
+        },
+        "latest_announcements": {
+            "data": [
+                {
+                    "broadcastdate": "10-Oct-2025 18:30:00",
+                    "subject": "Outcome of Board Meeting",
+                    "symbol": symbol,
+                }
+            ]
+        },
+        "shareholdings_patterns": {
+            "data": {
+                "30-Jun-2025": [
+                    {"Promoter & Promoter Group": str(promoter)},
+                    {"Public": str(round(100 - promoter, 2))},
+                ],
+                "30-Sep-2025": [
+                    {"Promoter & Promoter Group": str(promoter)},
+                    {"Public": str(round(100 - promoter, 2))},
+                ],
+            }
+        },
+    }
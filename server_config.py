@@ -12,6 +12,13 @@ class ServerConfig(BaseSettings):
     # Symbol for testing
     test_symbol: str = "TCS"
 
+    # Server Role
+    # `all` - UI, MCP server and refresh worker in one process
+    # `ui` - Chat UI and agent, reaches MCP server at `mcp_server_url`
+    # `mcp` - MCP server only
+    # `refresh-worker` - Runs refresh jobs queued in Postgres
+    server_role: str = "all"
+
     # Server Config
     host: str = "0.0.0.0"
     port: int = 8000
@@ -20,6 +27,102 @@ class ServerConfig(BaseSettings):
     favicon_path: str = "assets/favicon.ico"
     temp_assets_dir: str = "temp_assets"
 
+    # NSE Config
+    # Point to local emulator (`nse.emulator`) for testing without hitting NSE
+    nse_base_url: str = "https://www.nseindia.com"
+    # `off` - Always fetch from NSE
+    # `record` - Fetch from NSE and save responses in fixtures directory
+    # `replay` - Serve responses from fixtures directory without network
+    nse_record_mode: str = "off"
+    nse_fixtures_dir: str = "nse_fixtures"
+
+    # Shared Cache Config, for NSE cookies and hot responses shared by all workers
+    # `none` - Not shared, every worker fetches from NSE
+    # `shm` - Shared by workers on same host through shared memory
+    # `postgres` - Shared memory backed by Postgres UNLOGGED table, shared across hosts
+    shared_cache: str = "shm"
+    # Directory for `shm` cache, defaults to `/dev/shm/nse-chatbot`
+    shared_cache_dir: str = ""
+    # Interval in seconds of removing expired `shm` entries and their lock files
+    shared_cache_cleanup_seconds: int = 60
+    # TTL in seconds of shared responses
+    shared_cache_cookie_ttl: int = 300
+    shared_cache_market_state_ttl: int = 15
+    shared_cache_quote_ttl: int = 5
+    shared_cache_history_ttl: int = 300
+    shared_cache_pre_open_ttl: int = 60
+
+    # NSE Retry Config, one policy for all retries of a request
+    nse_request_timeout_seconds: float = 5
+    nse_retry_max_attempts: int = 3
+    # Retries stop when request can not finish before deadline
+    nse_retry_deadline_seconds: float = 10
+    nse_retry_backoff_seconds: float = 0.5
+    # Retries and hedged requests allowed per request across process, like 10% extra traffic
+    nse_retry_budget_ratio: float = 0.1
+    nse_retry_budget_min_tokens: float = 10
+    # Comma separated endpoints which send second request when first is slower than p95
+    nse_hedge_endpoints: str = "/api/quote-equity"
+
+    # NSE Request Scheduling, interactive requests go first and bulk ones yield to them
+    nse_max_concurrent_requests: int = 8
+    # Seconds bulk requests wait after last interactive request
+    nse_bulk_yield_seconds: float = 1
+
+    # NSE Outage Config
+    # Consecutive failures of an endpoint to open its circuit and seconds to keep it open
+    nse_circuit_failure_threshold: int = 5
+    nse_circuit_open_seconds: float = 30
+    # Last good responses served while NSE is failing, with their age
+    nse_stale_max_entries: int = 500
+    nse_stale_max_age_seconds: int = 86400
+
+    # Startup Warm-up Config, `/ready` reports ready once warm-up is done or timed out
+    warmup_enabled: bool = True
+    warmup_timeout_seconds: float = 60
+    # Quotes of top companies by market cap fetched on startup
+    warmup_top_symbols: int = 20
+
+    # Speculative Prefetch Config
+    # Quote and recent history of confidently matched search result are fetched in background
+    prefetch_enabled: bool = True
+    prefetch_max_workers: int = 2
+    # Prefetches waiting or running, more are dropped
+    prefetch_max_pending: int = 10
+    # TTL of prefetched quote, long enough to last until next LLM step
+    prefetch_ttl_seconds: float = 30
+    # History window prefetched, ending today
+    prefetch_history_days: int = 90
+
+    # Market State Poller Config, polls faster around pre-open, open and close
+    market_state_poll_seconds: float = 60
+    market_state_fast_poll_seconds: float = 5
+    # Minutes before and after each transition to use fast poll
+    market_state_transition_window_minutes: int = 10
+
+    # NSE Emulator Config
+    nse_emulator_latency_ms: int = 50
+    # Fraction of API requests randomly rejected with 403
+    nse_emulator_403_rate: float = 0
+    # Max API requests per second per client, 0 to disable
+    nse_emulator_rate_limit: int = 0
+    nse_emulator_cookie_ttl: int = 600
+    nse_emulator_symbols: int = 2000
+
+    # Refresh Job Queue Config
+    refresh_worker_poll_seconds: float = 5
+    # Running jobs older than this are considered abandoned and run again
+    refresh_job_timeout_seconds: int = 3600
+
+    # Scheduler Config, queues jobs on trading days from refresh worker
+    scheduler_enabled: bool = True
+    scheduler_poll_seconds: float = 30
+    # IST time to warm caches before pre-open (only with `postgres` shared cache) and to refresh metadata after close
+    scheduler_warmup_time: str = "08:55"
+    scheduler_refresh_time: str = "16:30"
+    # Comma separated market holidays like `2026-10-20,2026-11-10`
+    market_holidays: str = ""
+
     # Postgres DB Config
     pg_host: str = "localhost"
     pg_port: int = 5432
@@ -28,9 +131,23 @@ class ServerConfig(BaseSettings):
     pg_db: str = "postgres"
 
     # MCP Config
+    # URL of MCP server used by agent, defaults to MCP server of this process
+    mcp_server_url: str = ""
     llm_api_key: str = ""
     llm_api_url: str = ""
     llm_model: str = ""
+    # Send prompt cache hints to LLM providers which support them
+    llm_prompt_cache: bool = True
+
+    # Fake LLM Config (`agent.fake_llm`)
+    fake_llm_first_token_ms: int = 200
+    fake_llm_token_latency_ms: float = 5
+
+    # MCP Tool Response Config
+    # Default token budget for tool response, see `mcp_format.TOOL_TOKEN_BUDGETS` for per tool budget
+    mcp_tool_token_budget: int = 1000
+    # Record tokens of verbose vs compact tool responses
+    mcp_token_report: bool = False
 
     # Agent Type
     # `react` - Simple ReAct Agent
@@ -38,6 +155,65 @@ class ServerConfig(BaseSettings):
     # `flow` - MultiAgent Flow
     select_agent_type: str = "flow"
 
+    # Chat Session Store Config
+    # `memory` - In process LRU store
+    # or
+    # `postgres` - Persisted in Postgres with in process LRU
+    session_store: str = "memory"
+    session_store_max_sessions: int = 1000
+
+    # Answer Cache Config
+    answer_cache_enabled: bool = True
+    # Minimum trigram similarity of question to answer from cache
+    answer_cache_similarity: float = 0.92
+    # TTL in seconds for cached answers while market is open and closed
+    answer_cache_ttl_open: int = 60
+    answer_cache_ttl_closed: int = 1800
+    answer_cache_max_entries: int = 1000
+
+    # Chat Fast Path Config
+    # Answer simple questions like price of a stock with a direct tool call, without LLM
+    fast_path_enabled: bool = True
+
+    # Entity Resolution Config
+    # Find companies in question and give their symbols to agent, saving a search step
+    entity_resolution_enabled: bool = True
+    # Company names are reloaded from database after this many seconds
+    entity_index_ttl_seconds: int = 3600
+    # Search keys learned as aliases of the symbol agent used
+    entity_alias_cache_max_entries: int = 1000
+
+    # Conversation Context Config
+    # Number of latest turns sent to LLM verbatim, older turns are summarized
+    context_max_turns: int = 6
+    # Token ceiling for conversation sent to LLM
+    context_max_tokens: int = 4000
+
+    # Tracing Config
+    # Record spans of each chat turn, see `/debug/traces` for waterfall of recent turns
+    tracing_enabled: bool = False
+    # Export finished spans to JSONL file and / or OTLP HTTP collector like `http://localhost:4318/v1/traces`
+    tracing_jsonl_path: str = ""
+    tracing_otlp_url: str = ""
+    tracing_service_name: str = "nse-chatbot"
+    # Number of recent traces kept in memory
+    tracing_buffer_size: int = 100
+
+    # Profiler Config
+    # Allow profiling chat turns and MCP requests with `X-Profile: 1` header or `profile=1`
+    # query, and serve profiles at `/debug/profiles`
+    profiler_enabled: bool = False
+    # Fraction of chat turns and MCP requests profiled without flag
+    profiler_sample_rate: float = 0
+    profiler_interval_ms: float = 5
+    # Directory of saved profiles, defaults to `nse-chatbot-profiles` in temp directory
+    profiler_dir: str = ""
+
+    # Event Loop Monitor Config
+    # Record stack of calls blocking the event loop longer than threshold, see `/debug/loop-stalls`
+    loop_monitor_enabled: bool = False
+    loop_monitor_threshold_ms: float = 100
+
     # Generate DB URL from Config
     @computed_field
     @property
@@ -48,6 +224,8 @@ class ServerConfig(BaseSettings):
     @computed_field
     @property
     def nse_mcp_url(self) -> str:
+        if self.mcp_server_url:
+            return self.mcp_server_url
         return f"http://localhost:{self.port}{self.mcp_path}/"
 
     # Path to temporary assets
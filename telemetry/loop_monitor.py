@@ -0,0 +1,139 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cache
+from typing import Any
+
+from server_config import get_server_config as sc
+
+from .metrics import LOOP_STALL_DURATION, LOOP_STALLS
+
+# Code of this project, used to find which of our calls blocked the loop
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class LoopStall:
+    started_at: datetime
+    call_site: str
+    stack: list[str]
+    duration_ms: float = 0
+    ended: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 1),
+            "ended": self.ended,
+            "call_site": self.call_site,
+            "stack": self.stack,
+        }
+
+
+def _is_project_file(filename: str) -> bool:
+    return (
+        filename.startswith(_PROJECT_DIR)
+        and "site-packages" not in filename
+        and not filename.startswith(os.path.dirname(__file__))
+    )
+
+
+def _get_call_site(stack: traceback.StackSummary) -> str:
+    # Innermost frame in project code, else innermost frame
+    for frame in reversed(stack):
+        if _is_project_file(frame.filename):
+            filename = os.path.relpath(frame.filename, _PROJECT_DIR)
+            return f"{filename}:{frame.lineno} {frame.name}"
+
+    frame = stack[-1]
+    return f"{frame.filename}:{frame.lineno} {frame.name}"
+
+
+class LoopMonitor:
+    """
+    Detects blocking calls in the event loop.
+    A task on the loop updates heartbeat at short interval, a watchdog thread checks it
+    and captures stack of the loop thread when heartbeat is older than threshold.
+    """
+
+    def __init__(self, threshold_ms: float, history_size: int = 100):
+        self.threshold: float = threshold_ms / 1000
+        self.interval: float = self.threshold / 5
+        self.stalls: deque[LoopStall] = deque(maxlen=history_size)
+        self.call_sites: Counter[str] = Counter()
+        self._last_beat: float = time.monotonic()
+        self._current: LoopStall | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    async def _heartbeat(self):
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _capture_stall(self) -> LoopStall | None:
+        frame = sys._current_frames().get(self._loop_thread_id or 0)
+        if frame is None:
+            return None
+
+        stack = traceback.extract_stack(frame)
+        return LoopStall(
+            started_at=datetime.now(),
+            call_site=_get_call_site(stack),
+            stack=[line.rstrip() for line in stack.format()],
+        )
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            lag = time.monotonic() - self._last_beat
+
+            # Loop is blocked, capture stack once per stall
+            if lag > self.threshold + self.interval:
+                if self._current is None:
+                    self._current = self._capture_stall()
+                    if self._current is not None:
+                        self.stalls.append(self._current)
+                        self.call_sites[self._current.call_site] += 1
+                        LOOP_STALLS.inc(call_site=self._current.call_site)
+                if self._current is not None:
+                    self._current.duration_ms = lag * 1000
+
+            # Loop is running again
+            elif self._current is not None:
+                self._current.ended = True
+                LOOP_STALL_DURATION.observe(
+                    self._current.duration_ms / 1000,
+                    call_site=self._current.call_site,
+                )
+                self._current = None
+
+    def start(self):
+        """
+        Starts monitoring the running event loop, must be called from the loop.
+        """
+        if self._task is not None:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    def get_report(self) -> dict[str, Any]:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "call_sites": dict(self.call_sites.most_common()),
+            "recent_stalls": [stall.to_dict() for stall in reversed(self.stalls)],
+        }
+
+
+@cache
+def get_loop_monitor() -> LoopMonitor:
+    return LoopMonitor(sc().loop_monitor_threshold_ms)
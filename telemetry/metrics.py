@@ -0,0 +1,319 @@
+import bisect
+import functools
+import inspect
+import math
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+# Default buckets in seconds, from fast cache hits to slow LLM calls
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+)
+
+
+# All metrics created in process
+_registry: list["Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    return "+Inf" if math.isinf(value) else repr(float(value))
+
+
+class Metric:
+    """
+    Base of metrics with labels, values are kept per label values in a dict.
+    Updates take a single lock, so they are cheap enough for hot paths.
+    """
+
+    kind: str = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name: str = name
+        self.documentation: str = documentation
+        self.label_names: tuple[str, ...] = labels
+        self._lock: threading.Lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        return "\n".join(
+            [
+                f"# HELP {self.name} {self.documentation}",
+                f"# TYPE {self.name} {self.kind}",
+                *self.samples(),
+            ]
+        )
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        # Per label values - count per bucket (last is +Inf), sum and count
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, totals = self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0, 0])
+            )
+            counts[idx] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = [
+                (key, list(counts), list(totals))
+                for key, (counts, totals) in self._values.items()
+            ]
+
+        lines: list[str] = []
+        for key, counts, totals in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.label_names + ("le",), key + (_format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(totals[0])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(totals[1])}")
+        return lines
+
+
+def timed(histogram: Histogram, **labels: Any) -> Callable[[Callable[..., Any]], Any]:
+    """
+    Decorator to observe duration of every call of sync or async function in seconds.
+    """
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start, **labels)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+
+        return wrapper
+
+    return decorator
+
+
+def render_metrics() -> str:
+    """
+    Renders all metrics in Prometheus text exposition format.
+    """
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+# NSE Metrics
+NSE_REQUESTS = Counter(
+    "nse_requests_total",
+    "Requests to NSE by endpoint and status",
+    ("endpoint", "status"),
+)
+NSE_REQUEST_DURATION = Histogram(
+    "nse_request_duration_seconds", "Duration of requests to NSE", ("endpoint",)
+)
+NSE_COOKIE_REFRESHES = Counter("nse_cookie_refreshes_total", "NSE cookie refreshes")
+NSE_RETRIES = Counter(
+    "nse_retries_total", "Retries of failed NSE requests", ("endpoint",)
+)
+NSE_RETRIES_DENIED = Counter(
+    "nse_retries_denied_total",
+    "Retries not made as deadline passed or retry budget ran out",
+    ("endpoint", "reason"),
+)
+NSE_HEDGED_REQUESTS = Counter(
+    "nse_hedged_requests_total",
+    "Hedged requests by which request answered first",
+    ("endpoint", "winner"),
+)
+NSE_QUEUE_WAIT = Histogram(
+    "nse_queue_wait_seconds",
+    "Time NSE requests waited for a free slot by priority",
+    ("priority",),
+)
+NSE_IN_FLIGHT = Gauge("nse_requests_in_flight", "NSE requests in flight")
+NSE_CIRCUIT_OPEN = Gauge(
+    "nse_circuit_open", "1 while circuit of NSE endpoint is open", ("endpoint",)
+)
+NSE_STALE_RESPONSES = Counter(
+    "nse_stale_responses_total",
+    "Last good responses served while NSE is failing",
+    ("endpoint",),
+)
+
+# Prefetch Metrics
+PREFETCHES = Counter(
+    "nse_prefetches_total",
+    "Speculative prefetches by result, `queued`, `recent`, `dropped`, `done` or `failed`",
+    ("result",),
+)
+PREFETCH_HITS = Counter(
+    "nse_prefetch_hits_total", "Tool calls which read a prefetched response", ("tool",)
+)
+
+# Market State Metrics
+MARKET_OPEN = Gauge("nse_market_open", "1 while market is open", ("market",))
+MARKET_STATE_POLLS = Counter(
+    "nse_market_state_polls_total", "Polls of NSE market state by result", ("result",)
+)
+
+# Cache Metrics, hit ratio is hits / (hits + misses)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by cache and result", ("cache", "result")
+)
+
+# Chat Fast Path Metrics
+FAST_PATH_REQUESTS = Counter(
+    "chat_fast_path_requests_total",
+    "Simple questions matched by fast path, `answered` or `fallthrough` to agent",
+    ("intent", "result"),
+)
+
+ENTITY_RESOLUTIONS = Counter(
+    "chat_entity_resolutions_total",
+    "Companies resolved in questions before agent runs by source, `alias`, `learned`, `symbol` or `name`",
+    ("source",),
+)
+
+# Database Metrics
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Duration of database helper calls", ("helper",)
+)
+
+# MCP Tool Metrics
+TOOL_CALL_DURATION = Histogram(
+    "mcp_tool_call_duration_seconds", "Duration of MCP tool calls", ("tool", "status")
+)
+
+# LLM Metrics
+LLM_CALL_DURATION = Histogram(
+    "llm_call_duration_seconds",
+    "Latency of LLM calls",
+    ("provider", "model", "status"),
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Tokens used in LLM calls", ("provider", "model", "type")
+)
+
+# Metadata Refresh Metrics
+REFRESH_SYMBOLS_TOTAL = Gauge(
+    "refresh_symbols_total", "Symbols to refresh in current or last refresh"
+)
+REFRESH_SYMBOLS_DONE = Counter(
+    "refresh_symbols_done_total", "Symbols refreshed by result", ("result",)
+)
+REFRESH_RUNNING = Gauge("refresh_running", "1 while metadata refresh is running")
+REFRESH_LAST_SUCCESS = Gauge(
+    "refresh_last_success_timestamp_seconds", "Unix time of last completed refresh"
+)
+REFRESH_JOB_DURATION = Histogram(
+    "refresh_job_duration_seconds",
+    "Duration of refresh jobs",
+    ("job_type", "status"),
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600),
+)
+REFRESH_JOB_LAST_RUN = Gauge(
+    "refresh_job_last_run_timestamp_seconds",
+    "Unix time of last finished job",
+    ("job_type",),
+)
+
+# Event Loop Metrics
+LOOP_STALLS = Counter(
+    "event_loop_stalls_total", "Event loop stalls by blocking call site", ("call_site",)
+)
+LOOP_STALL_DURATION = Histogram(
+    "event_loop_stall_duration_seconds",
+    "Duration of event loop stalls",
+    ("call_site",),
+)
@@ -0,0 +1,259 @@
+import asyncio
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from collections.abc import AsyncIterator, Mapping
+from contextlib import asynccontextmanager
+from datetime import datetime
+from types import FrameType
+from typing import Any
+
+from server_config import get_server_config as sc
+
+# Innermost frames of threads waiting for work, not useful in profile
+_IDLE_FRAMES: set[tuple[str, str]] = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+}
+
+# Limit number of requests profiled at same time
+_profiler_slots = threading.BoundedSemaphore(2)
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    # Shorten path to package or project relative
+    for marker in ("site-packages" + os.sep, os.getcwd() + os.sep):
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+# Root of stacks sampled in threads other than event loop
+OTHER_THREADS_LABEL = "[other threads, process wide]"
+
+
+class SamplingProfiler:
+    """
+    Samples stacks of all threads at fixed interval from a background thread.
+    Covers the event loop and worker threads running sync tools and DB queries,
+    and several profilers can run at same time unlike cProfile.
+    When `task_frame` is given, event loop samples are kept only while the loop runs
+    the task of that frame, so other requests are left out. Worker threads can not be
+    told apart by request, their stacks are kept under `OTHER_THREADS_LABEL`.
+    """
+
+    def __init__(
+        self,
+        interval_ms: float,
+        loop_thread: int | None = None,
+        task_frame: FrameType | None = None,
+    ):
+        self.interval: float = interval_ms / 1000
+        self.loop_thread: int | None = loop_thread
+        self.task_frame: FrameType | None = task_frame
+        self.samples: Counter[str] = Counter()
+        self.sample_count: int = 0
+        self.started_at: float = 0
+        self.duration: float = 0
+        self._stop: threading.Event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self):
+        own_thread = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+                continue
+
+            # Stack from outermost to innermost frame
+            stack: list[str] = []
+            in_task = False
+            current: FrameType | None = frame
+            while current is not None:
+                stack.append(_frame_label(current))
+                in_task = in_task or current is self.task_frame
+                current = current.f_back
+            stack.reverse()
+
+            if thread_id == self.loop_thread:
+                # Event loop is running another request
+                if self.task_frame is not None and not in_task:
+                    continue
+            elif self.loop_thread is not None:
+                stack.insert(0, OTHER_THREADS_LABEL)
+
+            self.samples[";".join(stack)] += 1
+
+        self.sample_count += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def collapsed(self) -> str:
+        """
+        Stacks in collapsed format, can be opened in speedscope or flamegraph.pl
+        """
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.items())
+
+    def summary(self, title: str, top_n: int = 40) -> str:
+        """
+        Functions with most samples, inclusive and self.
+        """
+        inclusive: Counter[str] = Counter()
+        exclusive: Counter[str] = Counter()
+        for stack, count in self.samples.items():
+            frames = stack.split(";")
+            exclusive[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+
+        total = max(sum(self.samples.values()), 1)
+        lines = [
+            title,
+            f"Duration: {self.duration * 1000:.1f} ms, "
+            + f"Ticks: {self.sample_count}, Stack samples: {total}",
+            "",
+            f"{'Inclusive %':>12} {'Self %':>8}  Function",
+        ]
+        for frame, count in inclusive.most_common(top_n):
+            lines.append(
+                f"{count / total * 100:>11.1f}% {exclusive[frame] / total * 100:>7.1f}%  {frame}"
+            )
+
+        return "\n".join(lines)
+
+
+def should_profile(headers: Mapping[str, str], query: Mapping[str, str]) -> bool:
+    """
+    Requested with `X-Profile: 1` header or `profile=1` query, or picked by random sample.
+    """
+    if sc().profiler_enabled and (
+        headers.get("x-profile") in ("1", "true")
+        or query.get("profile") in ("1", "true")
+    ):
+        return True
+
+    return random.random() < sc().profiler_sample_rate
+
+
+def get_profiles_dir() -> str:
+    # Kept out of temp assets, which are served publicly
+    return sc().profiler_dir or os.path.join(
+        tempfile.gettempdir(), "nse-chatbot-profiles"
+    )
+
+
+def get_profile_path(filename: str) -> str | None:
+    """
+    Path of saved profile, None for unknown or invalid file names.
+    """
+    if not re.fullmatch(r"[\w.-]+\.(?:txt|folded)", filename):
+        return None
+    path = os.path.join(get_profiles_dir(), filename)
+    return path if os.path.isfile(path) else None
+
+
+def _save_profile(profiler: SamplingProfiler, name: str, title: str):
+    profiles_dir = get_profiles_dir()
+    os.makedirs(profiles_dir, exist_ok=True)
+
+    with open(os.path.join(profiles_dir, f"{name}.txt"), "w") as f:
+        f.write(profiler.summary(title))
+    with open(os.path.join(profiles_dir, f"{name}.folded"), "w") as f:
+        f.write(profiler.collapsed())
+
+
+@asynccontextmanager
+async def profile_task(
+    name: str, title: str, task_frame: FrameType
+) -> AsyncIterator[str | None]:
+    """
+    Profiles the block, event loop samples are kept only while `task_frame` is on stack.
+    Yields URL of profile served with `profiler_enabled`, None if too many are running.
+    """
+    # Skip profiling if too many requests are being profiled
+    if not _profiler_slots.acquire(blocking=False):
+        yield None
+        return
+
+    name = (
+        datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        + "_"
+        + re.sub(r"[^\w-]", "_", name).strip("_")
+    )
+    profiler = SamplingProfiler(
+        sc().profiler_interval_ms,
+        loop_thread=threading.get_ident(),
+        task_frame=task_frame,
+    )
+    profiler.start()
+    try:
+        yield f"/debug/profiles/{name}.txt"
+    finally:
+        profiler.stop()
+        _profiler_slots.release()
+        await asyncio.to_thread(_save_profile, profiler, name, title)
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware to profile requests to MCP, see `should_profile`.
+    Chat turns run in Gradio's queue, not in UI request, so they are profiled in chat.
+    Profile URL is returned in `X-Profile-Url` response header.
+    """
+
+    def __init__(self, app: Any):
+        self.app: Any = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any):
+        if scope["type"] != "http" or not scope["path"].startswith(sc().mcp_path):
+            return await self.app(scope, receive, send)
+
+        headers = {
+            key.decode().lower(): value.decode()
+            for key, value in scope.get("headers") or []
+        }
+        query = dict(urllib.parse.parse_qsl(scope.get("query_string", b"").decode()))
+        if not should_profile(headers, query):
+            return await self.app(scope, receive, send)
+
+        # Event loop samples are kept only while this frame is on the stack
+        async with profile_task(
+            scope["path"], f"{scope['method']} {scope['path']}", sys._getframe()
+        ) as url:
+
+            async def send_with_profile_url(message: dict[str, Any]):
+                if message["type"] == "http.response.start" and url is not None:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-profile-url", url.encode())
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_profile_url)
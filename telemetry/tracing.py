@@ -0,0 +1,359 @@
+import functools
+import html
+import inspect
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+from server_config import get_server_config as sc
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1_000_000
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+# Span of current execution, copied to threads and tasks with context
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+# Finished spans of recent traces for debug endpoint
+_recent_traces: OrderedDict[str, list[Span]] = OrderedDict()
+_recent_traces_lock = threading.Lock()
+
+# Spans waiting to be exported by background thread
+_export_queue: queue.Queue[Span] = queue.Queue(maxsize=10000)
+_exporter_started = False
+_exporter_lock = threading.Lock()
+
+
+def get_current_span() -> Span | None:
+    return _current_span.get()
+
+
+def get_traceparent() -> str | None:
+    """
+    Returns W3C `traceparent` header value for current span to continue trace in other service.
+    """
+    current = _current_span.get()
+    if current is None:
+        return None
+    return f"00-{current.trace_id}-{current.span_id}-01"
+
+
+def parse_traceparent(traceparent: str | None) -> tuple[str, str] | None:
+    if not traceparent:
+        return None
+
+    parts = traceparent.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+
+    return parts[1], parts[2]
+
+
+def start_span(
+    name: str,
+    parent: Span | None = None,
+    remote_parent: tuple[str, str] | None = None,
+    **attributes: Any,
+) -> Span:
+    parent = parent or _current_span.get()
+    if parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    elif remote_parent is not None:
+        trace_id, parent_id = remote_parent
+    else:
+        trace_id, parent_id = secrets.token_hex(16), None
+
+    return Span(
+        name=name,
+        trace_id=trace_id,
+        span_id=secrets.token_hex(8),
+        parent_id=parent_id,
+        start_ns=time.time_ns(),
+        attributes=attributes,
+    )
+
+
+def end_span(span: Span, error: BaseException | None = None):
+    span.end_ns = time.time_ns()
+    if error is not None:
+        span.error = f"{type(error).__name__}: {error}"
+
+    # Keep for debug endpoint
+    with _recent_traces_lock:
+        spans = _recent_traces.setdefault(span.trace_id, [])
+        spans.append(span)
+        _recent_traces.move_to_end(span.trace_id)
+        while len(_recent_traces) > sc().tracing_buffer_size:
+            _recent_traces.popitem(last=False)
+
+    # Export in background
+    if sc().tracing_jsonl_path or sc().tracing_otlp_url:
+        _start_exporter()
+        try:
+            _export_queue.put_nowait(span)
+        except queue.Full:
+            pass
+
+
+@contextmanager
+def span(
+    name: str,
+    remote_parent: tuple[str, str] | None = None,
+    **attributes: Any,
+) -> Iterator[Span | None]:
+    """
+    Records the wrapped block as a span, child of current span.
+    Yields None when tracing is disabled.
+    """
+    if not sc().tracing_enabled:
+        yield None
+        return
+
+    current = start_span(name, remote_parent=remote_parent, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        end_span(current, e)
+        raise
+    else:
+        end_span(current)
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator to record every call of sync or async function as a span.
+    """
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(name):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+async def inject_traceparent(request: httpx.Request):
+    """
+    Httpx request hook to continue current trace in the called service.
+    """
+    traceparent = get_traceparent()
+    if traceparent is not None:
+        request.headers["traceparent"] = traceparent
+
+
+def get_recent_traces() -> list[dict[str, Any]]:
+    """
+    Returns summary of recent traces, newest first.
+    """
+    with _recent_traces_lock:
+        traces = [list(spans) for spans in reversed(_recent_traces.values())]
+
+    summaries = []
+    for spans in traces:
+        start_ns = min(s.start_ns for s in spans)
+        end_ns = max(s.end_ns or s.start_ns for s in spans)
+        summaries.append(
+            {
+                "trace_id": spans[0].trace_id,
+                "root": min(spans, key=lambda s: s.start_ns).name,
+                "spans": len(spans),
+                "duration_ms": round((end_ns - start_ns) / 1_000_000, 3),
+                "errors": sum(1 for s in spans if s.error),
+            }
+        )
+
+    return summaries
+
+
+def get_trace(trace_id: str) -> list[Span]:
+    with _recent_traces_lock:
+        return sorted(_recent_traces.get(trace_id, []), key=lambda s: s.start_ns)
+
+
+def _to_otlp(spans: list[Span]) -> dict[str, Any]:
+    def attribute(key: str, value: Any) -> dict[str, Any]:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [attribute("service.name", sc().tracing_service_name)]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "nse-chatbot"},
+                        "spans": [
+                            {
+                                "traceId": s.trace_id,
+                                "spanId": s.span_id,
+                                "parentSpanId": s.parent_id or "",
+                                "name": s.name,
+                                "kind": 1,
+                                "startTimeUnixNano": str(s.start_ns),
+                                "endTimeUnixNano": str(s.end_ns),
+                                "attributes": [
+                                    attribute(k, v) for k, v in s.attributes.items()
+                                ],
+                                "status": {"code": 2, "message": s.error}
+                                if s.error
+                                else {"code": 1},
+                            }
+                            for s in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+def _export_spans(spans: list[Span]):
+    if sc().tracing_jsonl_path:
+        os.makedirs(
+            os.path.dirname(os.path.abspath(sc().tracing_jsonl_path)), exist_ok=True
+        )
+        with open(sc().tracing_jsonl_path, "a", encoding="utf-8") as jsonl:
+            for s in spans:
+                jsonl.write(json.dumps(s.to_dict(), default=str) + "\n")
+
+    if sc().tracing_otlp_url:
+        try:
+            httpx.post(sc().tracing_otlp_url, json=_to_otlp(spans), timeout=5)
+        except httpx.HTTPError as e:
+            print(f"Failed to export spans: {e}")
+
+
+def _export_loop():
+    while True:
+        # Send in batches to reduce writes and requests
+        spans = [_export_queue.get()]
+        deadline = time.monotonic() + 1
+        while len(spans) < 512 and time.monotonic() < deadline:
+            try:
+                spans.append(_export_queue.get(timeout=0.1))
+            except queue.Empty:
+                continue
+
+        try:
+            _export_spans(spans)
+        except Exception as e:
+            print(f"Failed to export spans: {e}")
+
+
+def _start_exporter():
+    global _exporter_started
+
+    if _exporter_started:
+        return
+
+    with _exporter_lock:
+        if not _exporter_started:
+            threading.Thread(target=_export_loop, daemon=True).start()
+            _exporter_started = True
+
+
+def render_waterfall(spans: list[Span]) -> str:
+    """
+    Renders spans of a trace as HTML waterfall, each span is a bar on common time axis.
+    """
+    if not spans:
+        return "<p>Trace not found</p>"
+
+    trace_start = min(s.start_ns for s in spans)
+    trace_end = max(s.end_ns or s.start_ns for s in spans)
+    total_ns = max(trace_end - trace_start, 1)
+
+    # Depth of each span for indentation
+    parents = {s.span_id: s.parent_id for s in spans}
+
+    def depth(s: Span) -> int:
+        level, parent_id = 0, s.parent_id
+        while parent_id in parents and level < 50:
+            level, parent_id = level + 1, parents[parent_id]
+        return level
+
+    rows = []
+    for s in spans:
+        left = (s.start_ns - trace_start) / total_ns * 100
+        width = max(((s.end_ns or trace_end) - s.start_ns) / total_ns * 100, 0.2)
+        attributes = html.escape(", ".join(f"{k}={v}" for k, v in s.attributes.items()))
+        color = "#d9534f" if s.error else "#5b8def"
+        rows.append(
+            "<tr>"
+            + f'<td style="padding-left:{depth(s) * 16}px">{html.escape(s.name)}</td>'
+            + f"<td>{s.duration_ms:.1f} ms</td>"
+            + '<td style="width:60%"><div style="position:relative;height:14px">'
+            + f'<div title="{attributes}" style="position:absolute;left:{left:.2f}%;'
+            + f'width:{width:.2f}%;height:100%;background:{color}"></div></div></td>'
+            + f"<td>{attributes} {html.escape(s.error or '')}</td>"
+            + "</tr>"
+        )
+
+    return (
+        f"<h3>Trace {spans[0].trace_id} - {total_ns / 1_000_000:.1f} ms</h3>"
+        + '<table style="width:100%;font-family:monospace;font-size:12px">'
+        + "".join(rows)
+        + "</table>"
+    )
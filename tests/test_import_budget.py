@@ -0,0 +1,23 @@
+import pytest
+
+from benchmarks.bench_imports import (
+    get_forbidden_loaded,
+    get_import_entries,
+    measure_import,
+)
+
+
+# Every entry is imported in a fresh interpreter, a slow or heavy import fails its case
+@pytest.mark.parametrize(
+    ("module", "role", "budget_ms", "forbidden"),
+    [entry[1:] for entry in get_import_entries()],
+    ids=[entry[0] for entry in get_import_entries()],
+)
+def test_import_within_budget(
+    module: str, role: str | None, budget_ms: float, forbidden: list[str]
+):
+    measured = measure_import(module, role)
+
+    assert measured["ok"], measured["error"]
+    assert get_forbidden_loaded(forbidden, measured["modules"]) == []
+    assert measured["import_ms"] <= budget_ms
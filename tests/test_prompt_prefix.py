@@ -0,0 +1,195 @@
+import asyncio
+import json
+from collections.abc import Iterator
+from typing import Any
+
+import httpx
+import pytest
+from langchain.messages import AIMessage, HumanMessage
+from langchain_core.messages import BaseMessage
+from langchain_core.tools import BaseTool, tool
+from pydantic import SecretStr
+
+from agent import graph
+from agent.messages import get_turn_context_message
+from server_config import get_server_config as sc
+
+
+@tool
+def get_current_stock_price(symbol: str) -> str:
+    """Returns the current price of the given stock symbol."""
+    return "Symbol,CurrentPrice,PreviousClosePrice"
+
+
+@tool
+def get_stock_running_at_52week_high() -> str:
+    """Returns the list of stocks running at their 52 week high."""
+    return "symbol,name"
+
+
+@tool
+def search_nse_stocks_by_name_or_symbol(search_key: str) -> str:
+    """Searches NSE companies by name or symbol."""
+    return "symbol,name"
+
+
+MCP_TOOLS: list[BaseTool] = [
+    get_current_stock_price,
+    get_stock_running_at_52week_high,
+    search_nse_stocks_by_name_or_symbol,
+]
+
+# Shortlist picked by fake LLM, differs between turns
+SHORTLISTS: dict[str, list[str]] = {
+    "What is current price of TCS?": ["get_current_stock_price"],
+    "Which stocks are at 52 week high?": ["get_stock_running_at_52week_high"],
+}
+
+
+class FakeMCPClient:
+    # MCP server does not promise tool order, every client lists them rotated
+    clients: int = 0
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        FakeMCPClient.clients += 1
+
+    async def get_tools(self) -> list[BaseTool]:
+        shift = FakeMCPClient.clients % len(MCP_TOOLS)
+        return MCP_TOOLS[shift:] + MCP_TOOLS[:shift]
+
+
+def _completion(content: str) -> dict[str, Any]:
+    return {
+        "id": "fake",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "fake",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+@pytest.fixture
+def llm_requests(monkeypatch: pytest.MonkeyPatch) -> Iterator[list[dict[str, Any]]]:
+    """
+    Replaces LLM provider and MCP server, returns request bodies sent to LLM.
+    """
+    import langchain_mcp_adapters.client
+    from langchain_openai import ChatOpenAI
+
+    requests: list[dict[str, Any]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+
+        # Shortlist asks for structured output
+        if "response_format" in body:
+            # Conversation ends with the latest question
+            conversation = body["messages"][-1]["content"]
+            question = max(SHORTLISTS, key=conversation.rfind)
+            return httpx.Response(
+                200, json=_completion(json.dumps({"tools": SHORTLISTS[question]}))
+            )
+        return httpx.Response(200, json=_completion("Done"))
+
+    transport = httpx.MockTransport(handler)
+
+    def get_llm_model(prompt_cache_key: str | None = None) -> ChatOpenAI:
+        return ChatOpenAI(
+            base_url="http://fake-llm/v1",
+            api_key=SecretStr("fake"),
+            model="fake",
+            http_client=httpx.Client(transport=transport),
+            http_async_client=httpx.AsyncClient(transport=transport),
+        )
+
+    monkeypatch.setattr(
+        langchain_mcp_adapters.client, "MultiServerMCPClient", FakeMCPClient
+    )
+    monkeypatch.setattr(graph, "_get_llm_model", get_llm_model)
+    # Flow graph is built once with or without shortlist node
+    graph.get_agent_flow.cache_clear()
+    yield requests
+    graph.get_agent_flow.cache_clear()
+
+
+async def _run_turn(messages: list[BaseMessage]):
+    # Same as chat turns, agent is created for every turn
+    from chat.utils import generate_agent_state
+
+    agent = await graph.get_agent()
+    await agent.ainvoke(generate_agent_state(messages))
+
+
+def _run_turns():
+    history: list[BaseMessage] = []
+    for question in SHORTLISTS:
+        history.append(HumanMessage(content=question))
+        asyncio.run(_run_turn(history + [get_turn_context_message([])]))
+        history.append(AIMessage(content="Done"))
+
+
+def _prefix(body: dict[str, Any]) -> bytes:
+    # Static part of prompt, tool schemas and system prompt
+    return json.dumps(
+        {"tools": body.get("tools"), "system": body["messages"][0]}, sort_keys=True
+    ).encode()
+
+
+def _assert_only_first_message_is_system(body: dict[str, Any]):
+    # Several providers reject system messages after the first one
+    roles = [message["role"] for message in body["messages"]]
+    assert roles[0] == "system"
+    assert "system" not in roles[1:]
+
+
+def test_flow_agent_prompt_prefix_is_identical_across_turns(
+    llm_requests: list[dict[str, Any]], monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(sc(), "select_agent_type", "flow")
+    monkeypatch.setattr(sc(), "llm_prompt_cache", True)
+    _run_turns()
+
+    # Shortlist is skipped and all tools are bound
+    assert len(llm_requests) == len(SHORTLISTS)
+    assert all("response_format" not in body for body in llm_requests)
+    assert _prefix(llm_requests[0]) == _prefix(llm_requests[1])
+    assert len(llm_requests[0]["tools"]) == len(MCP_TOOLS) + 1
+    for body in llm_requests:
+        _assert_only_first_message_is_system(body)
+
+
+def test_flow_agent_binds_shortlisted_tools_without_prompt_cache(
+    llm_requests: list[dict[str, Any]], monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(sc(), "select_agent_type", "flow")
+    monkeypatch.setattr(sc(), "llm_prompt_cache", False)
+    _run_turns()
+
+    shortlist = [body for body in llm_requests if "response_format" in body]
+    execution = [body for body in llm_requests if "response_format" not in body]
+    assert len(shortlist) == len(execution) == len(SHORTLISTS)
+
+    assert _prefix(shortlist[0]) == _prefix(shortlist[1])
+    for body, tools in zip(execution, SHORTLISTS.values(), strict=True):
+        assert [tool["function"]["name"] for tool in body["tools"]] == tools
+        _assert_only_first_message_is_system(body)
+
+
+def test_react_agent_prompt_prefix_is_identical_across_turns(
+    llm_requests: list[dict[str, Any]], monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(sc(), "select_agent_type", "react")
+    _run_turns()
+
+    assert len(llm_requests) == len(SHORTLISTS)
+    assert _prefix(llm_requests[0]) == _prefix(llm_requests[1])
+    for body in llm_requests:
+        _assert_only_first_message_is_system(body)
@@ -1,13 +1,22 @@
 import gradio as gr
 
 from agent.config import get_provider_models, get_provider_url, set_llm_config
-from chat.agent_chat import agent_chat_fn, send_message_to_ui
+from chat.agent_chat import agent_chat_fn
 
 from .components.docs import docs_page
 from .components.navbar import navbar
 from .config import socials
 from .examples import get_examples, strip_example
 
+# Runs in browser, so chat history is not sent back to server
+APPEND_CHAT_DELTA_JS = """
+(history, delta) => delta
+    ? (history ?? []).slice(0, delta.offset).concat(
+        delta.messages.map((message) => ({ metadata: null, options: null, ...message }))
+    )
+    : history
+"""
+
 
 def llm_form_by_provider(provider: str) -> tuple[gr.Textbox, gr.Dropdown]:
     url = get_provider_url(provider)
@@ -119,6 +128,9 @@ with gr.Blocks(
                     variant="primary",
                 )
 
+            # Messages of current turn, appended to chat in browser
+            chat_delta = gr.JSON(visible="hidden")
+
     with gr.Row():
         gr.HTML(
             """
@@ -152,15 +164,17 @@ with gr.Blocks(
         )
 
     # Event Handlers
+    # History is kept in server side session store, so only the question is sent
+    # and only messages of the turn come back
     send_button.click(
-        send_message_to_ui, inputs=[text_input, chatbot], outputs=[chatbot, text_input]
+        agent_chat_fn, inputs=[text_input], outputs=[chat_delta, text_input]
     )
-    send_button.click(agent_chat_fn, inputs=[text_input, chatbot], outputs=chatbot)
-
     text_input.submit(
-        send_message_to_ui, inputs=[text_input, chatbot], outputs=[chatbot, text_input]
+        agent_chat_fn, inputs=[text_input], outputs=[chat_delta, text_input]
+    )
+    chat_delta.change(
+        None, inputs=[chatbot, chat_delta], outputs=chatbot, js=APPEND_CHAT_DELTA_JS
     )
-    text_input.submit(agent_chat_fn, inputs=[text_input, chatbot], outputs=chatbot)
 
 # Add more pages In app
 with ui.route("Docs", "/docs"):
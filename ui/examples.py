@@ -1,34 +1,72 @@
 from random import choice
 
-simple_examples: list[str] = [
-    "What is current price of Infosys?",
-    "What was last closing price of Tata Motors?",
-    "What is current price of VA Tech Wabag?",
-    "What is current price of HCL Tech?",
+# Examples are question templates with the company they ask about, if any
+Example = tuple[str, str | None]
+
+simple_examples: list[Example] = [
+    ("What is current price of {company}?", "Infosys"),
+    ("What was last closing price of {company}?", "Tata Motors"),
+    ("What is current price of {company}?", "VA Tech Wabag"),
+    ("What is current price of {company}?", "HCL Tech"),
 ]
 
-analytical_examples: list[str] = [
-    "What is current price of TCS and how has it change from previous market day?",
-    "What is current price of Coal India and has it gone up or down in 1 month? Show with chart.",
-    "What is current price of Tata Motors Passenger Vehicle against Commercial Vehicle?",
-    "How has HCL Tech performed in last 3 months? Provide insight with full chart.",
+analytical_examples: list[Example] = [
+    (
+        "What is current price of {company} and how has it change from previous market day?",
+        "TCS",
+    ),
+    (
+        "What is current price of {company} and has it gone up or down in 1 month? Show with chart.",
+        "Coal India",
+    ),
+    (
+        "What is current price of {company} Passenger Vehicle against Commercial Vehicle?",
+        "Tata Motors",
+    ),
+    (
+        "How has {company} performed in last 3 months? Provide insight with full chart.",
+        "HCL Tech",
+    ),
 ]
 
-trend_examples: list[str] = [
-    "Give me list of 10 Stocks which are currently at their 52 week high.",
-    "Give me list of 10 Stocks in Petrochemicals Sector.",
-    "Give me list of 5 Stocks in Pharmaceutical Industry.",
-    "Give me list of 5 Stocks operating in Information Technology Sector.",
-    "Give me list of 5 stocks which have gained volume in this week.",
+trend_examples: list[Example] = [
+    ("Give me list of 10 Stocks which are currently at their 52 week high.", None),
+    ("Give me list of 10 Stocks in Petrochemicals Sector.", None),
+    ("Give me list of 5 Stocks in Pharmaceutical Industry.", None),
+    ("Give me list of 5 Stocks operating in Information Technology Sector.", None),
+    ("Give me list of 5 stocks which have gained volume in this week.", None),
 ]
 
-complex_analytics_examples: list[str] = [
-    "Analyse HFCL Stock's financials and show growth in last 2 months.",
-    "Analyse Engineers India stocks current financials, last 3 months growth and provide a brief report about this stock.",
-    "Analyse 63 Moons stock and provide detail analysis result.",
-    "Analyse Landmark Property stock's financial results and show growth trend.",
+complex_analytics_examples: list[Example] = [
+    ("Analyse {company} Stock's financials and show growth in last 2 months.", "HFCL"),
+    (
+        "Analyse {company} stocks current financials, last 3 months growth and provide a brief report about this stock.",
+        "Engineers India",
+    ),
+    ("Analyse {company} stock and provide detail analysis result.", "63 Moons"),
+    (
+        "Analyse {company} stock's financial results and show growth trend.",
+        "Landmark Property",
+    ),
 ]
 
+# Companies asked about in examples, warmed up on startup
+example_companies: list[str] = list(
+    dict.fromkeys(
+        company
+        for _, company in simple_examples
+        + analytical_examples
+        + trend_examples
+        + complex_analytics_examples
+        if company is not None
+    )
+)
+
+
+def get_example_question(example: Example) -> str:
+    template, company = example
+    return template.format(company=company) if company is not None else template
+
 
 def format_example(exp: str) -> str:
     return f"{exp:^100}"
@@ -40,8 +78,8 @@ def strip_example(exp: str) -> str:
 
 def get_examples() -> tuple[str, str, str, str]:
     return (
-        format_example(choice(simple_examples)),
-        format_example(choice(analytical_examples)),
-        format_example(choice(trend_examples)),
-        format_example(choice(complex_analytics_examples)),
+        format_example(get_example_question(choice(simple_examples))),
+        format_example(get_example_question(choice(analytical_examples))),
+        format_example(get_example_question(choice(trend_examples))),
+        format_example(get_example_question(choice(complex_analytics_examples))),
     )
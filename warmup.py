@@ -0,0 +1,160 @@
+import asyncio
+import io
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import cache
+from typing import Any
+
+from server_config import get_server_config as sc
+
+
+@dataclass
+class WarmupState:
+    ready: bool = False
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    # Duration and error of each step
+    steps: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "steps": self.steps,
+        }
+
+
+@cache
+def get_warmup_state() -> WarmupState:
+    return WarmupState()
+
+
+def _run_step(name: str, step: Callable[[], Any]):
+    start = time.perf_counter()
+    error = None
+    try:
+        step()
+    except Exception as e:
+        print(f"Warm-up step {name} failed: {e}")
+        error = str(e)
+
+    get_warmup_state().steps[name] = {
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+        "error": error,
+    }
+
+
+def _warm_nse_client():
+    # Fetches NSE cookies
+    from nse.helper import _get_nse_client
+
+    _get_nse_client()
+
+
+def _warm_market_state():
+    from nse.market_state import get_market_state_poller
+
+    get_market_state_poller().wait_for_first_poll()
+
+
+def _warm_pre_open():
+    from nse.helper import get_all_market_pre_open
+
+    get_all_market_pre_open()
+
+
+def _get_warmup_symbols() -> list[str]:
+    from dbman.helper import (
+        get_confident_match,
+        get_top_companies_by_market_cap,
+        search_nse_company_by_name_or_symbol_indb,
+    )
+    from ui.examples import example_companies
+
+    symbols = [
+        company.symbol
+        for company in get_top_companies_by_market_cap(sc().warmup_top_symbols)
+    ]
+
+    # Resolving example companies also warms search queries
+    for name in example_companies:
+        match = get_confident_match(
+            name, search_nse_company_by_name_or_symbol_indb(name)
+        )
+        if match is not None and match.symbol not in symbols:
+            symbols.append(match.symbol)
+
+    return symbols
+
+
+def _warm_quotes():
+    """
+    Fetches quotes of hot symbols, which fills the shared cache, last good responses
+    served during NSE failures and latency samples used for hedging.
+    """
+    from nse.helper import get_stock_details
+    from nse.request_scheduler import RequestPriority, request_priority
+
+    def warm_quote(symbol: str):
+        with request_priority(RequestPriority.PREFETCH):
+            get_stock_details(symbol)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(warm_quote, _get_warmup_symbols()))
+
+
+def _warm_entity_index():
+    # Loads company names used to resolve companies in questions
+    from chat.entity_resolution import get_entity_resolver
+
+    get_entity_resolver().resolve_name("")
+
+
+def _warm_charts():
+    # Loads charting libraries and renders once, like first chart in chat
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=(4, 2))
+    fig = sns.lineplot(x=["a", "b"], y=[1.0, 2.0])
+    fig.get_figure().savefig(io.BytesIO(), format="png")
+    plt.close("all")
+
+
+def run_warmup(serves_ui: bool, serves_mcp: bool):
+    """
+    Loads what first requests of this process would otherwise wait for.
+    """
+    state = get_warmup_state()
+    state.started_at = datetime.now()
+
+    if serves_mcp:
+        _run_step("nse_client", _warm_nse_client)
+        _run_step("market_state", _warm_market_state)
+        _run_step("pre_open", _warm_pre_open)
+        _run_step("quotes", _warm_quotes)
+
+    if serves_ui:
+        _run_step("entity_index", _warm_entity_index)
+        _run_step("charts", _warm_charts)
+
+    state.finished_at = datetime.now()
+
+
+async def warm_up(serves_ui: bool, serves_mcp: bool):
+    """
+    Runs warm-up in a thread and marks process ready when done or timed out.
+    """
+    try:
+        await asyncio.wait_for(
+            asyncio.to_thread(run_warmup, serves_ui, serves_mcp),
+            sc().warmup_timeout_seconds,
+        )
+    except TimeoutError:
+        print("Warm-up timed out, serving traffic anyway")
+    finally:
+        get_warmup_state().ready = True